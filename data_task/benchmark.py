@@ -0,0 +1,293 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Run from anywhere: the job modules are imported flat from this directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from report_writer import write_json
+
+WORDS = (
+    "bitcoin ethereum solana layer2 rollup defi staking airdrop wallet bridge liquidity "
+    "protocol token governance validator upgrade exchange market stablecoin yield nft "
+    "oracle security audit mainnet testnet launch regulation etf halving mining"
+).split()
+
+# Input sizes per benchmark; --scale multiplies them
+SIZES = {
+    "process_tutorials": [10, 40, 160],
+    "generate_trend_chart": [30, 90, 180],
+    "calculate_performance_metrics": [10, 100, 1000],
+    "calculate_wallet_stats": [1000, 10000, 100000],
+    "extract_keywords": [100, 1000, 10000],
+}
+
+def max_rss_mb():
+    """
+    Peak resident set size of this process so far, in MB
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+# Each setup_* builds the inputs for one size and returns (run, items, unit).
+# run() is the timed call; items / wall time is the reported throughput.
+
+def setup_process_tutorials(size, rng, workdir):
+    from build_tutorial_index import process_tutorials
+    import nbformat
+
+    tutorials_dir = os.path.join(workdir, "tutorials")
+    output_dir = os.path.join(workdir, "output")
+    for i in range(size):
+        section = os.path.join(tutorials_dir, f"section{i % 5}")
+        os.makedirs(section, exist_ok=True)
+        title = " ".join(rng.choice(WORDS) for _ in range(4)).title()
+        body = "\n\n".join(" ".join(rng.choice(WORDS) for _ in range(80)) for _ in range(10))
+        if i % 2:
+            notebook = nbformat.v4.new_notebook()
+            notebook.cells = [nbformat.v4.new_markdown_cell(f"# {title}\n\n{body}")] + [
+                nbformat.v4.new_code_cell(f"x_{j} = {j} ** 2\nprint(x_{j})") for j in range(10)
+            ]
+            nbformat.write(notebook, os.path.join(section, f"tutorial{i}.ipynb"))
+        else:
+            with open(os.path.join(section, f"tutorial{i}.md"), "w") as f:
+                f.write(f"---\ntitle: '{title}'\ndate: '2024-01-{i % 28 + 1:02d}'\ntags: [defi]\n---\n\n{body}\n")
+
+    def run():
+        process_tutorials(tutorials_dir, output_dir)
+
+    return run, size, "files"
+
+def setup_generate_trend_chart(size, rng, workdir, items=50):
+    import matplotlib
+    matplotlib.use("Agg")
+    from ranking_store import RankingStore
+    from update_tool_rankings import generate_trend_chart
+
+    store = RankingStore(
+        os.path.join(workdir, "ranking_series.json"),
+        retention={"daily": timedelta(days=max(size + 1, 7)), "weekly": timedelta(days=size + 14)}
+    )
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    base = [rng.uniform(1e4, 1e6) for _ in range(items)]
+    for day in range(size, 0, -1):
+        snapshot = [
+            {"name": f"Item {i}", "users_24h": base[i] * rng.uniform(0.8, 1.2)} for i in range(items)
+        ]
+        store.upsert("dapps", snapshot, today - timedelta(days=day - 1, hours=-12))
+    img_dir = os.path.join(workdir, "img")
+
+    def run():
+        generate_trend_chart(store, "dapps", "users_24h", 5, img_dir, days=size)
+
+    return run, size * items, "points"
+
+def setup_calculate_performance_metrics(size, rng, workdir, days=1260):
+    from generate_strategy_md import calculate_performance_metrics
+
+    np_rng = np.random.default_rng(rng.randrange(2 ** 32))
+    dates = pd.date_range("2019-01-01", periods=days, freq="B")
+    frames = [
+        pd.DataFrame({"date": dates, "returns": np_rng.normal(0.0005, 0.01, days)}) for _ in range(size)
+    ]
+
+    def run():
+        for df in frames:
+            calculate_performance_metrics(df)
+
+    return run, size, "strategies"
+
+def setup_calculate_wallet_stats(size, rng, workdir):
+    from fetch_wallet_data import calculate_wallet_stats
+
+    wallet = {
+        "tokens": [
+            {
+                "id": f"0x{i:040x}",
+                "chain": rng.choice(["eth", "bsc", "arb"]),
+                "symbol": f"TK{i}",
+                "price": rng.paretovariate(1.5) if i % 3 else 0,
+                "amount": rng.paretovariate(1.1) * 100
+            }
+            for i in range(size)
+        ],
+        "protocols": [
+            {"name": f"Protocol {i}", "portfolio_item_list": [
+                {"stats": {"net_usd_value": rng.random() * 1e6}} for _ in range(rng.randint(1, 4))
+            ]}
+            for i in range(50)
+        ]
+    }
+
+    def run():
+        calculate_wallet_stats(wallet)
+
+    return run, size, "tokens"
+
+def setup_extract_keywords(size, rng, workdir):
+    from gen_daily_headlines import extract_keywords
+
+    news = [
+        {
+            "title": " ".join(rng.choice(WORDS) for _ in range(12)),
+            "description": " ".join(rng.choice(WORDS) for _ in range(40)),
+            "source": {"name": "Bench"}
+        }
+        for _ in range(size)
+    ]
+    topics = [{"topic": " ".join(rng.choice(WORDS) for _ in range(2))} for _ in range(10)]
+
+    def run():
+        extract_keywords(news, topics)
+
+    return run, size, "articles"
+
+BENCHMARKS = {
+    "process_tutorials": setup_process_tutorials,
+    "generate_trend_chart": setup_generate_trend_chart,
+    "calculate_performance_metrics": setup_calculate_performance_metrics,
+    "calculate_wallet_stats": setup_calculate_wallet_stats,
+    "extract_keywords": setup_extract_keywords,
+}
+
+def run_case(name, size, repeat, seed, queue):
+    """
+    Build the inputs for one benchmark size and time it; runs in a fresh
+    process so the peak RSS belongs to this case alone
+    """
+    try:
+        workdir = tempfile.mkdtemp(prefix=f"bench_{name}_")
+        try:
+            # The jobs report progress on stdout; keep it out of the results table
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                run, items, unit = BENCHMARKS[name](size, random.Random(seed), workdir)
+                setup_rss = max_rss_mb()
+
+                times = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    run()
+                    times.append(time.perf_counter() - start)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        wall_time = statistics.median(times)
+        queue.put({
+            "benchmark": name,
+            "size": size,
+            "unit": unit,
+            "repeat": repeat,
+            "wall_time_s": wall_time,
+            "wall_times_s": times,
+            "throughput_per_s": items / wall_time if wall_time > 0 else None,
+            "peak_rss_mb": max_rss_mb(),
+            "rss_growth_mb": max_rss_mb() - setup_rss
+        })
+    except Exception as e:
+        queue.put({"benchmark": name, "size": size, "error": f"{type(e).__name__}: {e}"})
+
+def run_benchmark(name, size, repeat=3, seed=42):
+    """
+    Run one benchmark size in a child process and return its result
+    """
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=run_case, args=(name, size, repeat, seed, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_path):
+    """
+    Print the wall time ratio of each case against a saved results file
+    """
+    with open(baseline_path, "r") as f:
+        baseline = {(r["benchmark"], r["size"]): r for r in json.load(f)["results"] if "error" not in r}
+
+    print(f"\nComparison with {baseline_path} (new / old wall time):")
+    for result in results:
+        old = baseline.get((result["benchmark"], result["size"]))
+        if old is None or "error" in result:
+            continue
+        ratio = result["wall_time_s"] / old["wall_time_s"] if old["wall_time_s"] else float("inf")
+        flag = "  <-- slower" if ratio > 1.1 else ""
+        print(f"  {result['benchmark']:32} {result['size']:>8}  {ratio:6.2f}x{flag}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the data_task pipelines over synthetic inputs")
+    parser.add_argument("benchmarks", nargs="*", help=f"Benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every input size")
+    parser.add_argument("--sizes", type=int, nargs="+", help="Explicit sizes, overriding the defaults")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per size; the median is reported")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="logs/benchmarks", help="Directory for the JSON results")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = args.benchmarks or list(BENCHMARKS)
+    commit = git_commit()
+
+    results = []
+    for name in names:
+        sizes = args.sizes or [max(1, int(size * args.scale)) for size in SIZES[name]]
+        for size in sizes:
+            result = run_benchmark(name, size, args.repeat, args.seed)
+            results.append(result)
+            if "error" in result:
+                print(f"{name:32} {size:>8}  ERROR {result['error']}")
+            else:
+                print(
+                    f"{name:32} {size:>8}  {result['wall_time_s']:9.4f}s  "
+                    f"{result['throughput_per_s']:12,.1f} {result['unit']}/s  {result['peak_rss_mb']:8.1f} MB"
+                )
+
+    now = datetime.now()
+    output_path = os.path.join(args.output, f"{now.strftime('%Y%m%d-%H%M%S')}-{commit or 'nogit'}.json")
+    write_json(output_path, {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "scale": args.scale,
+        "results": results,
+        "generated_at": now.strftime("%Y-%m-%d %H:%M:%S")
+    })
+    print(f"\nSaved results to {output_path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,14 @@
 import os
-import json
 import re
 import glob
 import nbformat
 from nbconvert import MarkdownExporter
 from datetime import datetime
 import yaml
-import shutil
+
+from instrumentation import span
+from profiling import launch
+from report_writer import copy_file, write_json, write_report
 
 def scan_tutorials(tutorials_dir):
     """
@@ -171,8 +173,7 @@ def convert_jupyter_to_markdown(notebook_path, output_dir):
                                                      f"![{img_name}](images/{base_name.replace('.md', '')}/{img_name})")
         
         # Save the markdown file
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(hugo_markdown)
+        write_report(output_path, hugo_markdown)
         
         print(f"Converted {notebook_path} to {output_path}")
         return output_path
@@ -205,9 +206,9 @@ def categorize_tutorials(tutorials):
         "by_tag": tags
     }
 
-def generate_index_page(tutorials, output_path):
+def iter_index_page(tutorials, output_path):
     """
-    Generate an index page for all tutorials
+    Yield the tutorials index page section by section
     """
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
@@ -223,7 +224,7 @@ def generate_index_page(tutorials, output_path):
     frontmatter_yaml = yaml.dump(frontmatter, default_flow_style=False)
     
     # Start building the markdown content
-    markdown = f"""---
+    yield f"""---
 {frontmatter_yaml}---
 
 # Tutorial Index
@@ -240,52 +241,54 @@ Welcome to our comprehensive tutorial collection. Browse by category or explore
     categorized = categorize_tutorials(tutorials)
     
     for category, category_tutorials in sorted(categorized["by_category"].items()):
-        markdown += f"### {category.title()}\n\n"
+        yield f"### {category.title()}\n\n"
         
         for tutorial in sorted(category_tutorials, key=lambda x: x.get("title", "")):
             relative_path = os.path.relpath(tutorial["path"], os.path.dirname(output_path))
             relative_path = relative_path.replace(".md", "/").replace("\\", "/")
             
-            markdown += f"- [{tutorial['title']}]({relative_path})"
+            yield f"- [{tutorial['title']}]({relative_path})"
             
             if tutorial.get("description"):
-                markdown += f" - {tutorial['description']}"
+                yield f" - {tutorial['description']}"
             
-            markdown += "\n"
+            yield "\n"
         
-        markdown += "\n"
+        yield "\n"
     
     # Add tags section
-    markdown += "## Tags\n\n"
+    yield "## Tags\n\n"
     
     for tag, tag_tutorials in sorted(categorized["by_tag"].items()):
-        markdown += f"### #{tag}\n\n"
+        yield f"### #{tag}\n\n"
         
         for tutorial in sorted(tag_tutorials, key=lambda x: x.get("title", "")):
             relative_path = os.path.relpath(tutorial["path"], os.path.dirname(output_path))
             relative_path = relative_path.replace(".md", "/").replace("\\", "/")
             
-            markdown += f"- [{tutorial['title']}]({relative_path})\n"
+            yield f"- [{tutorial['title']}]({relative_path})\n"
         
-        markdown += "\n"
+        yield "\n"
     
     # Add all tutorials section
-    markdown += "## All Tutorials\n\n"
+    yield "## All Tutorials\n\n"
     
     for tutorial in sorted(tutorials, key=lambda x: x.get("title", "")):
         relative_path = os.path.relpath(tutorial["path"], os.path.dirname(output_path))
         relative_path = relative_path.replace(".md", "/").replace("\\", "/")
         
-        markdown += f"- [{tutorial['title']}]({relative_path})"
+        yield f"- [{tutorial['title']}]({relative_path})"
         
         if tutorial.get("date"):
-            markdown += f" ({tutorial['date']})"
+            yield f" ({tutorial['date']})"
         
-        markdown += "\n"
-    
-    # Save the index page
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(markdown)
+        yield "\n"
+
+def generate_index_page(tutorials, output_path):
+    """
+    Generate an index page for all tutorials
+    """
+    write_report(output_path, iter_index_page(tutorials, output_path))
     
     print(f"Generated index page at {output_path}")
     return output_path
@@ -302,41 +305,45 @@ def process_tutorials(tutorials_dir, output_dir):
     
     # Process markdown files
     markdown_tutorials = []
-    for md_file in tutorial_files["markdown"]:
-        metadata = extract_metadata_from_markdown(md_file)
-        markdown_tutorials.append(metadata)
-        
-        # Copy the file to output directory if needed
-        if tutorials_dir != output_dir:
-            rel_path = os.path.relpath(md_file, tutorials_dir)
-            dest_path = os.path.join(output_dir, rel_path)
-            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-            shutil.copy2(md_file, dest_path)
+    with span("markdown", stage="parse") as attrs:
+        for md_file in tutorial_files["markdown"]:
+            metadata = extract_metadata_from_markdown(md_file)
+            markdown_tutorials.append(metadata)
             
-            # Update the path in metadata
-            metadata["path"] = dest_path
+            # Copy the file to output directory if needed
+            if tutorials_dir != output_dir:
+                rel_path = os.path.relpath(md_file, tutorials_dir)
+                dest_path = os.path.join(output_dir, rel_path)
+                copy_file(md_file, dest_path)
+                
+                # Update the path in metadata
+                metadata["path"] = dest_path
+        attrs["files"] = len(markdown_tutorials)
     
     # Process Jupyter notebooks
     jupyter_tutorials = []
-    for ipynb_file in tutorial_files["jupyter"]:
-        # Convert to markdown
-        md_path = convert_jupyter_to_markdown(ipynb_file, output_dir)
-        
-        if md_path:
-            metadata = extract_metadata_from_markdown(md_path)
-            jupyter_tutorials.append(metadata)
+    with span("notebooks", stage="render") as attrs:
+        for ipynb_file in tutorial_files["jupyter"]:
+            # Convert to markdown
+            md_path = convert_jupyter_to_markdown(ipynb_file, output_dir)
+            
+            if md_path:
+                metadata = extract_metadata_from_markdown(md_path)
+                jupyter_tutorials.append(metadata)
+        attrs["files"] = len(jupyter_tutorials)
     
     # Combine all tutorials
     all_tutorials = markdown_tutorials + jupyter_tutorials
     
     # Generate index page
     index_path = os.path.join(output_dir, "index.md")
-    generate_index_page(all_tutorials, index_path)
+    with span("index", stage="render"):
+        generate_index_page(all_tutorials, index_path)
     
     # Save metadata for all tutorials
     metadata_path = os.path.join(output_dir, "tutorials_metadata.json")
-    with open(metadata_path, 'w', encoding='utf-8') as f:
-        json.dump(all_tutorials, f, indent=2)
+    with span("write"):
+        write_json(metadata_path, all_tutorials)
     
     return {
         "total_tutorials": len(all_tutorials),
@@ -362,4 +369,4 @@ def main():
     print(f"Saved metadata to {result['metadata_path']}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    launch("build_tutorial_index", main)
\ No newline at end of file
@@ -1,12 +1,15 @@
-import requests
 import pandas as pd
-import json
 import time
 from datetime import datetime, timedelta
 import os
 from bs4 import BeautifulSoup
 import re
 
+import http_client
+from instrumentation import span
+from profiling import launch
+from report_writer import write_json, write_page
+
 def fetch_twitter_info(project_handle):
     """
     Fetch project information from Twitter
@@ -20,7 +23,7 @@ def fetch_twitter_info(project_handle):
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
-        response = requests.get(url, headers=headers)
+        response = http_client.get(url, headers=headers)
         
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, 'html.parser')
@@ -58,7 +61,7 @@ def fetch_zealy_quests(project_slug):
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
-        response = requests.get(url, headers=headers)
+        response = http_client.get(url, headers=headers)
         
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, 'html.parser')
@@ -97,7 +100,7 @@ def fetch_galxe_campaigns(project_name):
     try:
         # Search for the project
         search_url = f"https://galxe.com/api/v1/search?keyword={project_name}"
-        response = requests.get(search_url)
+        response = http_client.get(search_url)
         
         if response.status_code == 200:
             search_data = response.json()
@@ -115,7 +118,7 @@ def fetch_galxe_campaigns(project_name):
             
             # Fetch campaigns for the project
             campaigns_url = f"https://galxe.com/api/v1/spaces/{project_id}/campaigns"
-            campaigns_response = requests.get(campaigns_url)
+            campaigns_response = http_client.get(campaigns_url)
             
             if campaigns_response.status_code == 200:
                 campaigns_data = campaigns_response.json()
@@ -272,83 +275,40 @@ def generate_airdrop_calendar(projects):
     
     return calendar, project_dates
 
-def generate_markdown_report(projects, calendar, project_dates):
+def build_tracker_page(projects, calendar, project_dates, top_quests=5):
     """
-    Generate markdown report with airdrop projects and calendar
+    Everything the airdrop tracker shows, as plain values for the
+    airdrop-tracker shortcode: the projects with their tasks and top Zealy
+    quests, and the calendar entries sorted by date
     """
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    # Create projects table
-    markdown = f"""# Airdrop Projects Tracker
-
-*Generated on: {now}*
-
-## Upcoming Airdrop Projects
-
-| Project | Category | Expected Airdrop | Twitter | Tasks |
-|---------|----------|------------------|---------|-------|
-"""
-    
-    for project in projects:
-        twitter_link = f"[@{project['twitter']}](https://twitter.com/{project['twitter']})"
-        tasks = ", ".join(project['tasks'][:2]) + (", ..." if len(project['tasks']) > 2 else "")
-        
-        markdown += f"| [{project['name']}](#{project['name'].lower().replace(' ', '-')}) | {project['category']} | {project['expected_airdrop']} | {twitter_link} | {tasks} |\n"
-    
-    # Create calendar section
-    markdown += """
-## Airdrop Task Calendar
-
-| Date | Project | Task | Link |
-|------|---------|------|------|
-"""
-    
-    # Sort calendar by date
-    sorted_dates = sorted(calendar.keys())
-    for date in sorted_dates:
-        tasks = calendar[date]
-        if tasks:
-            for task in tasks:
-                markdown += f"| {date} | {task['project']} | {task['task']} | [Complete Tasks]({task['link']}) |\n"
-    
-    # Create detailed project sections
-    markdown += "\n## Project Details\n\n"
-    
+    tracker_projects = []
     for project in projects:
-        markdown += f"### {project['name']}\n\n"
-        markdown += f"**Category:** {project['category']}\n\n"
-        markdown += f"**Description:** {project['description']}\n\n"
-        markdown += f"**Expected Airdrop:** {project['expected_airdrop']}\n\n"
-        
-        # Add Twitter info if available
-        if project.get('twitter_info'):
-            twitter_info = project['twitter_info']
-            markdown += f"**Twitter:** [@{project['twitter']}](https://twitter.com/{project['twitter']})"
-            if twitter_info.get('follower_count'):
-                markdown += f" ({twitter_info['follower_count']} followers)\n\n"
-            else:
-                markdown += "\n\n"
-        
-        # Add tasks
-        markdown += "**Required Tasks:**\n\n"
-        for task in project['tasks']:
-            markdown += f"- {task}\n"
-        
-        # Add Zealy quests if available
-        if project.get('zealy_info') and project['zealy_info'].get('quests'):
-            markdown += "\n**Zealy Quests:**\n\n"
-            for quest in project['zealy_info']['quests'][:5]:  # Show top 5 quests
-                markdown += f"- {quest.get('title')} ({quest.get('points')})\n"
-            
-            markdown += f"\n[View All Quests on Zealy](https://zealy.io/c/{project['zealy']}/questboard)\n"
-        
-        # Add calendar date if available
-        if project['name'] in project_dates:
-            markdown += f"\n**Next Task Deadline:** {project_dates[project['name']]}\n"
-        
-        markdown += "\n---\n\n"
+        twitter_info = project.get('twitter_info') or {}
+        zealy_info = project.get('zealy_info') or {}
+        tracker_projects.append({
+            "name": project['name'],
+            "anchor": project['name'].lower().replace(' ', '-'),
+            "category": project['category'],
+            "description": project['description'],
+            "expected_airdrop": project['expected_airdrop'],
+            "twitter": project['twitter'],
+            "followers": twitter_info.get('follower_count'),
+            "tasks": project['tasks'],
+            "zealy": project['zealy'],
+            "zealy_quests": [
+                {"title": quest.get('title'), "points": quest.get('points')}
+                for quest in (zealy_info.get('quests') or [])[:top_quests]
+            ],
+            "next_deadline": project_dates.get(project['name'])
+        })
     
-    return markdown
+    return {
+        "projects": tracker_projects,
+        "calendar": [
+            {"date": date, **task} for date in sorted(calendar) for task in calendar[date]
+        ],
+        "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
 
 def main():
     # Create directories
@@ -357,39 +317,46 @@ def main():
     
     # Fetch airdrop projects
     print("Fetching airdrop projects...")
-    projects = fetch_airdrop_projects()
+    with span("fetch", source="projects") as attrs:
+        projects = fetch_airdrop_projects()
+        attrs["items"] = len(projects)
     
     # Enrich project data
     print("Enriching project data...")
-    enriched_projects = enrich_project_data(projects)
+    with span("fetch", source="enrichment"):
+        enriched_projects = enrich_project_data(projects)
     
     # Generate airdrop calendar
     print("Generating airdrop calendar...")
-    calendar, project_dates = generate_airdrop_calendar(enriched_projects)
+    with span("calendar", stage="compute"):
+        calendar, project_dates = generate_airdrop_calendar(enriched_projects)
     
-    # Generate markdown report
-    print("Generating markdown report...")
-    markdown = generate_markdown_report(enriched_projects, calendar, project_dates)
-    
-    # Save markdown report
-    with open("content/airdrops/index.md", "w") as f:
-        f.write(markdown)
+    # The tracker is rendered by the airdrop-tracker shortcode from
+    # data/airdrops/tracker.json; the section page is only created if missing
+    print("Saving tracker data...")
+    with span("tracker", stage="write"):
+        write_json("data/airdrops/tracker.json", build_tracker_page(enriched_projects, calendar, project_dates), indent=None)
+        write_page(
+            "content/airdrops/index.md",
+            {"title": "Airdrop Projects Tracker"},
+            "{{< airdrop-tracker >}}",
+            overwrite=False
+        )
     
     # Save raw data as JSON
-    with open("data/airdrops/projects.json", "w") as f:
-        # Convert to serializable format
-        serializable_projects = []
-        for project in enriched_projects:
-            serializable_project = {k: v for k, v in project.items() if k not in ['twitter_info', 'zealy_info', 'galxe_info']}
-            serializable_projects.append(serializable_project)
-        
-        json.dump(serializable_projects, f, indent=2)
+    # Convert to serializable format
+    serializable_projects = []
+    for project in enriched_projects:
+        serializable_project = {k: v for k, v in project.items() if k not in ['twitter_info', 'zealy_info', 'galxe_info']}
+        serializable_projects.append(serializable_project)
     
-    # Save calendar as JSON
-    with open("data/airdrops/calendar.json", "w") as f:
-        json.dump(calendar, f, indent=2)
+    with span("write"):
+        write_json("data/airdrops/projects.json", serializable_projects)
+        
+        # Save calendar as JSON
+        write_json("data/airdrops/calendar.json", calendar)
     
     print("Airdrop data processing complete!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    launch("fetch_airdrop_tasks", main)
\ No newline at end of file
@@ -1,16 +1,22 @@
-import requests
 import pandas as pd
-import json
 import time
 from datetime import datetime, timedelta
 import os
 import re
 from bs4 import BeautifulSoup
 import markdown
+from functools import partial
 
-def fetch_github_releases(repo_owner, repo_name, token=None):
+import http_client
+from instrumentation import span
+from profiling import launch
+from report_writer import write_json, write_report
+from source_cache import SourceCache, source_cache_path, stale_while_revalidate
+
+def fetch_github_releases(repo_owner, repo_name, token=None, fallback=True):
     """
-    Fetch releases from GitHub API
+    Fetch releases from GitHub API. On failure an empty list is returned, or
+    with fallback=False an error is raised.
     """
     url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/releases"
     headers = {
@@ -21,20 +27,23 @@ def fetch_github_releases(repo_owner, repo_name, token=None):
         headers["Authorization"] = f"token {token}"
     
     try:
-        response = requests.get(url, headers=headers)
+        response = http_client.get(url, headers=headers)
         
         if response.status_code == 200:
             return response.json()
-        else:
-            print(f"Failed to fetch releases for {repo_owner}/{repo_name}: {response.status_code}")
-            return []
+        message = f"Failed to fetch releases for {repo_owner}/{repo_name}: {response.status_code}"
     except Exception as e:
-        print(f"Error fetching releases for {repo_owner}/{repo_name}: {e}")
-        return []
+        message = f"Error fetching releases for {repo_owner}/{repo_name}: {e}"
+    
+    if not fallback:
+        raise RuntimeError(message)
+    print(message)
+    return []
 
-def fetch_github_repo_info(repo_owner, repo_name, token=None):
+def fetch_github_repo_info(repo_owner, repo_name, token=None, fallback=True):
     """
-    Fetch repository information from GitHub API
+    Fetch repository information from GitHub API. On failure an empty dict
+    is returned, or with fallback=False an error is raised.
     """
     url = f"https://api.github.com/repos/{repo_owner}/{repo_name}"
     headers = {
@@ -45,59 +54,68 @@ def fetch_github_repo_info(repo_owner, repo_name, token=None):
         headers["Authorization"] = f"token {token}"
     
     try:
-        response = requests.get(url, headers=headers)
+        response = http_client.get(url, headers=headers)
         
         if response.status_code == 200:
             return response.json()
-        else:
-            print(f"Failed to fetch repo info for {repo_owner}/{repo_name}: {response.status_code}")
-            return {}
+        message = f"Failed to fetch repo info for {repo_owner}/{repo_name}: {response.status_code}"
     except Exception as e:
-        print(f"Error fetching repo info for {repo_owner}/{repo_name}: {e}")
-        return {}
+        message = f"Error fetching repo info for {repo_owner}/{repo_name}: {e}"
+    
+    if not fallback:
+        raise RuntimeError(message)
+    print(message)
+    return {}
 
-def fetch_npm_package_info(package_name):
+def fetch_npm_package_info(package_name, fallback=True):
     """
-    Fetch package information from NPM registry
+    Fetch package information from NPM registry. On failure an empty dict
+    is returned, or with fallback=False an error is raised.
     """
     url = f"https://registry.npmjs.org/{package_name}"
     
     try:
-        response = requests.get(url)
+        response = http_client.get(url)
         
         if response.status_code == 200:
             return response.json()
-        else:
-            print(f"Failed to fetch NPM info for {package_name}: {response.status_code}")
-            return {}
+        message = f"Failed to fetch NPM info for {package_name}: {response.status_code}"
     except Exception as e:
-        print(f"Error fetching NPM info for {package_name}: {e}")
-        return {}
+        message = f"Error fetching NPM info for {package_name}: {e}"
+    
+    if not fallback:
+        raise RuntimeError(message)
+    print(message)
+    return {}
 
-def fetch_pypi_package_info(package_name):
+def fetch_pypi_package_info(package_name, fallback=True):
     """
-    Fetch package information from PyPI
+    Fetch package information from PyPI. On failure an empty dict is
+    returned, or with fallback=False an error is raised.
     """
     url = f"https://pypi.org/pypi/{package_name}/json"
     
     try:
-        response = requests.get(url)
+        response = http_client.get(url)
         
         if response.status_code == 200:
             return response.json()
-        else:
-            print(f"Failed to fetch PyPI info for {package_name}: {response.status_code}")
-            return {}
+        message = f"Failed to fetch PyPI info for {package_name}: {response.status_code}"
     except Exception as e:
-        print(f"Error fetching PyPI info for {package_name}: {e}")
-        return {}
+        message = f"Error fetching PyPI info for {package_name}: {e}"
+    
+    if not fallback:
+        raise RuntimeError(message)
+    print(message)
+    return {}
 
-def fetch_documentation_updates(doc_url):
+def fetch_documentation_updates(doc_url, fallback=True):
     """
-    Fetch documentation updates from a URL
+    Fetch documentation updates from a URL. On failure the result carries
+    an error field, or with fallback=False an error is raised.
     """
     try:
-        response = requests.get(doc_url)
+        response = http_client.get(doc_url)
         
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, 'html.parser')
@@ -124,18 +142,19 @@ def fetch_documentation_updates(doc_url):
                 "last_updated": last_updated,
                 "content_sample": content[:500] + "..." if len(content) > 500 else content
             }
-        else:
-            print(f"Failed to fetch documentation from {doc_url}: {response.status_code}")
-            return {
-                "url": doc_url,
-                "error": f"HTTP {response.status_code}"
-            }
+        message = f"Failed to fetch documentation from {doc_url}: {response.status_code}"
+        error = f"HTTP {response.status_code}"
     except Exception as e:
-        print(f"Error fetching documentation from {doc_url}: {e}")
-        return {
-            "url": doc_url,
-            "error": str(e)
-        }
+        message = f"Error fetching documentation from {doc_url}: {e}"
+        error = str(e)
+    
+    if not fallback:
+        raise RuntimeError(message)
+    print(message)
+    return {
+        "url": doc_url,
+        "error": error
+    }
 
 def extract_code_examples(release_notes):
     """
@@ -152,17 +171,24 @@ def extract_code_examples(release_notes):
     
     return code_blocks
 
-def generate_sdk_update_report(sdk_data):
+def iter_sdk_update_report(sdk_data, fetched_at=None):
     """
-    Generate a markdown report for SDK updates
+    Yield the SDK updates report section by section. fetched_at is when the
+    oldest of the SDK data was fetched, shown under the title.
     """
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    # A "Last updated" line is volatile, so a republish that only changes it is
+    # skipped. It holds an absolute time only: a relative age would go stale
+    # on the pages that are not rewritten.
+    age = ""
+    if fetched_at:
+        age = f"*Last updated: GitHub data from {fetched_at.strftime('%Y-%m-%d %H:%M')}*\n\n"
     
-    markdown_content = f"""# SDK Updates Report
+    yield f"""# SDK Updates Report
 
 *Generated on: {now}*
 
-This report tracks updates to popular Web3 SDKs and developer tools.
+{age}This report tracks updates to popular Web3 SDKs and developer tools.
 
 ## Latest SDK Releases
 
@@ -183,97 +209,86 @@ This report tracks updates to popular Web3 SDKs and developer tools.
         changes_summary = changes[:100] + "..." if len(changes) > 100 else changes
         changes_summary = changes_summary.replace("\n", " ")
         
-        markdown_content += f"| [{sdk['name']}]({sdk['repo_url']}) | {version} | {date} | {changes_summary} |\n"
+        yield f"| [{sdk['name']}]({sdk['repo_url']}) | {version} | {date} | {changes_summary} |\n"
     
     # Add detailed sections for each SDK
-    markdown_content += "\n## SDK Details\n\n"
+    yield "\n## SDK Details\n\n"
     
     for sdk in sdk_data:
-        markdown_content += f"### {sdk['name']}\n\n"
+        yield f"### {sdk['name']}\n\n"
         
         # Add repository info
         repo_info = sdk.get("repo_info", {})
-        markdown_content += f"**Repository:** [{sdk['repo_owner']}/{sdk['repo_name']}]({sdk['repo_url']})\n\n"
-        markdown_content += f"**Description:** {repo_info.get('description', 'N/A')}\n\n"
-        markdown_content += f"**Stars:** {repo_info.get('stargazers_count', 'N/A')} | "
-        markdown_content += f"**Forks:** {repo_info.get('forks_count', 'N/A')} | "
-        markdown_content += f"**Open Issues:** {repo_info.get('open_issues_count', 'N/A')}\n\n"
+        yield f"**Repository:** [{sdk['repo_owner']}/{sdk['repo_name']}]({sdk['repo_url']})\n\n"
+        yield f"**Description:** {repo_info.get('description', 'N/A')}\n\n"
+        yield f"**Stars:** {repo_info.get('stargazers_count', 'N/A')} | "
+        yield f"**Forks:** {repo_info.get('forks_count', 'N/A')} | "
+        yield f"**Open Issues:** {repo_info.get('open_issues_count', 'N/A')}\n\n"
         
         # Add latest release info
         latest_release = sdk.get("latest_release", {})
         if latest_release:
-            markdown_content += f"**Latest Release:** [{latest_release.get('tag_name', 'N/A')}]({latest_release.get('html_url', '#')})\n\n"
-            markdown_content += f"**Released on:** {latest_release.get('published_at', 'N/A').split('T')[0] if latest_release.get('published_at') else 'N/A'}\n\n"
+            yield f"**Latest Release:** [{latest_release.get('tag_name', 'N/A')}]({latest_release.get('html_url', '#')})\n\n"
+            yield f"**Released on:** {latest_release.get('published_at', 'N/A').split('T')[0] if latest_release.get('published_at') else 'N/A'}\n\n"
             
             # Add release notes
             if latest_release.get("body"):
-                markdown_content += "**Release Notes:**\n\n"
-                markdown_content += f"```\n{latest_release['body']}\n```\n\n"
+                yield "**Release Notes:**\n\n"
+                yield f"```\n{latest_release['body']}\n```\n\n"
         
         # Add code examples
         code_examples = sdk.get("code_examples", [])
         if code_examples:
-            markdown_content += "**Code Examples:**\n\n"
+            yield "**Code Examples:**\n\n"
             
             for i, example in enumerate(code_examples[:3]):  # Show up to 3 examples
-                markdown_content += f"Example {i+1}:\n\n```\n{example}\n```\n\n"
+                yield f"Example {i+1}:\n\n```\n{example}\n```\n\n"
         
         # Add documentation info
         doc_info = sdk.get("documentation", {})
         if doc_info:
-            markdown_content += f"**Documentation:** [{doc_info.get('url', '#')}]({doc_info.get('url', '#')})\n\n"
+            yield f"**Documentation:** [{doc_info.get('url', '#')}]({doc_info.get('url', '#')})\n\n"
             
             if doc_info.get("last_updated"):
-                markdown_content += f"**Last Updated:** {doc_info['last_updated']}\n\n"
+                yield f"**Last Updated:** {doc_info['last_updated']}\n\n"
         
         # Add package info
         package_info = sdk.get("package_info", {})
         if package_info:
             if "npm" in package_info:
                 npm_info = package_info["npm"]
-                markdown_content += f"**NPM Package:** [{npm_info.get('name', 'N/A')}](https://www.npmjs.com/package/{npm_info.get('name', '')})\n\n"
-                markdown_content += f"**Weekly Downloads:** {npm_info.get('weekly_downloads', 'N/A')}\n\n"
+                yield f"**NPM Package:** [{npm_info.get('name', 'N/A')}](https://www.npmjs.com/package/{npm_info.get('name', '')})\n\n"
+                yield f"**Weekly Downloads:** {npm_info.get('weekly_downloads', 'N/A')}\n\n"
             
             if "pypi" in package_info:
                 pypi_info = package_info["pypi"]
-                markdown_content += f"**PyPI Package:** [{pypi_info.get('name', 'N/A')}](https://pypi.org/project/{pypi_info.get('name', '')})\n\n"
+                yield f"**PyPI Package:** [{pypi_info.get('name', 'N/A')}](https://pypi.org/project/{pypi_info.get('name', '')})\n\n"
         
-        markdown_content += "---\n\n"
-    
-    return markdown_content
+        yield "---\n\n"
 
-def track_sdk_updates(sdks, output_dir, data_dir):
+def fetch_sdk_data(sdk, github_token=None, fallback=True):
     """
-    Track updates for a list of SDKs
+    Fetch releases, repository, package and documentation info for one SDK.
+    With fallback=False any failed request raises instead of leaving its
+    fields empty, so only complete data is cached as the SDK's last good data.
     """
-    # Ensure directories exist
-    os.makedirs(output_dir, exist_ok=True)
-    os.makedirs(data_dir, exist_ok=True)
-    
-    # GitHub token (optional)
-    github_token = os.environ.get("GITHUB_TOKEN")
-    
-    sdk_data = []
-    
-    for sdk in sdks:
-        print(f"Processing {sdk['name']}...")
-        
+    with span("fetch", sdk=sdk["name"]):
         repo_owner = sdk["repo_owner"]
         repo_name = sdk["repo_name"]
         repo_url = f"https://github.com/{repo_owner}/{repo_name}"
         
         # Fetch GitHub releases
-        releases = fetch_github_releases(repo_owner, repo_name, github_token)
+        releases = fetch_github_releases(repo_owner, repo_name, github_token, fallback)
         latest_release = releases[0] if releases else {}
         
         # Fetch repository info
-        repo_info = fetch_github_repo_info(repo_owner, repo_name, github_token)
+        repo_info = fetch_github_repo_info(repo_owner, repo_name, github_token, fallback)
         
         # Fetch package info if available
         package_info = {}
         
         if "npm_package" in sdk:
-            npm_info = fetch_npm_package_info(sdk["npm_package"])
+            npm_info = fetch_npm_package_info(sdk["npm_package"], fallback)
             if npm_info:
                 package_info["npm"] = {
                     "name": sdk["npm_package"],
@@ -282,7 +297,7 @@ def track_sdk_updates(sdks, output_dir, data_dir):
                 }
         
         if "pypi_package" in sdk:
-            pypi_info = fetch_pypi_package_info(sdk["pypi_package"])
+            pypi_info = fetch_pypi_package_info(sdk["pypi_package"], fallback)
             if pypi_info:
                 package_info["pypi"] = {
                     "name": sdk["pypi_package"],
@@ -292,56 +307,105 @@ def track_sdk_updates(sdks, output_dir, data_dir):
         # Fetch documentation updates if URL provided
         doc_info = {}
         if "documentation_url" in sdk:
-            doc_info = fetch_documentation_updates(sdk["documentation_url"])
+            doc_info = fetch_documentation_updates(sdk["documentation_url"], fallback)
         
         # Extract code examples from release notes
         code_examples = []
         if latest_release and "body" in latest_release:
             code_examples = extract_code_examples(latest_release["body"])
-        
-        # Compile SDK data
-        sdk_data.append({
+    
+    # Compile SDK data
+    return {
+        "name": sdk["name"],
+        "repo_owner": repo_owner,
+        "repo_name": repo_name,
+        "repo_url": repo_url,
+        "repo_info": repo_info,
+        "latest_release": latest_release,
+        "all_releases": releases[:5],  # Store only the 5 most recent releases
+        "package_info": package_info,
+        "documentation": doc_info,
+        "code_examples": code_examples
+    }
+
+def sdk_placeholder(sdk):
+    """
+    Entry for an SDK that has never been fetched successfully
+    """
+    return {
+        "name": sdk["name"],
+        "repo_owner": sdk["repo_owner"],
+        "repo_name": sdk["repo_name"],
+        "repo_url": f"https://github.com/{sdk['repo_owner']}/{sdk['repo_name']}",
+        "repo_info": {},
+        "latest_release": {},
+        "all_releases": [],
+        "package_info": {},
+        "documentation": {},
+        "code_examples": []
+    }
+
+def publish_sdk_updates(sdk_data, output_dir, data_dir, fetched_at=None):
+    """
+    Write the SDK updates report and data file
+    """
+    # Generate and save markdown report
+    with span("report", stage="render"):
+        write_report(os.path.join(output_dir, "index.md"), iter_sdk_update_report(sdk_data, fetched_at))
+    
+    # Save raw data as JSON
+    # Convert to serializable format (remove complex objects)
+    serializable_data = []
+    for sdk in sdk_data:
+        serializable_sdk = {
             "name": sdk["name"],
-            "repo_owner": repo_owner,
-            "repo_name": repo_name,
-            "repo_url": repo_url,
-            "repo_info": repo_info,
-            "latest_release": latest_release,
-            "all_releases": releases[:5],  # Store only the 5 most recent releases
-            "package_info": package_info,
-            "documentation": doc_info,
-            "code_examples": code_examples
-        })
+            "repo_url": sdk["repo_url"],
+            "latest_version": sdk.get("latest_release", {}).get("tag_name", "N/A"),
+            "latest_release_date": sdk.get("latest_release", {}).get("published_at", "N/A"),
+            "stars": sdk.get("repo_info", {}).get("stargazers_count", "N/A"),
+            "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        serializable_data.append(serializable_sdk)
+    
+    write_json(os.path.join(data_dir, "sdk_updates.json"), serializable_data, volatile_keys=("*.updated_at",))
+
+def track_sdk_updates(sdks, output_dir, data_dir):
+    """
+    Track updates for a list of SDKs
+
+    The report is published at once from the last good data of every SDK
+    while all of them are refreshed, and republished only if anything changed.
+    """
+    # Ensure directories exist
+    os.makedirs(output_dir, exist_ok=True)
+    os.makedirs(data_dir, exist_ok=True)
+    
+    # GitHub token (optional)
+    github_token = os.environ.get("GITHUB_TOKEN")
+    
+    def fetch(sdk):
+        print(f"Processing {sdk['name']}...")
+        data = fetch_sdk_data(sdk, github_token, fallback=False)
         
         # Avoid rate limiting
         time.sleep(1)
+        return data
     
-    # Generate markdown report
-    markdown_report = generate_sdk_update_report(sdk_data)
-    
-    # Save markdown report
-    with open(os.path.join(output_dir, "index.md"), "w") as f:
-        f.write(markdown_report)
+    def publish(payloads, fetched_at, fresh):
+        known = [t for t in fetched_at.values() if t is not None]
+        publish_sdk_updates([payloads[sdk["name"]] for sdk in sdks], output_dir, data_dir, min(known) if known else None)
     
-    # Save raw data as JSON
-    with open(os.path.join(data_dir, "sdk_updates.json"), "w") as f:
-        # Convert to serializable format (remove complex objects)
-        serializable_data = []
-        for sdk in sdk_data:
-            serializable_sdk = {
-                "name": sdk["name"],
-                "repo_url": sdk["repo_url"],
-                "latest_version": sdk.get("latest_release", {}).get("tag_name", "N/A"),
-                "latest_release_date": sdk.get("latest_release", {}).get("published_at", "N/A"),
-                "stars": sdk.get("repo_info", {}).get("stargazers_count", "N/A"),
-                "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-            serializable_data.append(serializable_sdk)
-        
-        json.dump(serializable_data, f, indent=2)
+    # One SDK at a time, as before, to stay within the GitHub rate limit
+    sdk_data = stale_while_revalidate(
+        SourceCache(source_cache_path("sdk_updates")),
+        fetchers={sdk["name"]: partial(fetch, sdk) for sdk in sdks},
+        fallbacks={sdk["name"]: partial(sdk_placeholder, sdk) for sdk in sdks},
+        publish=publish,
+        workers=1
+    )
     
     print(f"SDK update report generated with {len(sdk_data)} SDKs")
-    return sdk_data
+    return [sdk_data[sdk["name"]] for sdk in sdks]
 
 def main():
     # List of SDKs to track
@@ -391,4 +455,4 @@ def main():
     track_sdk_updates(sdks, output_dir, data_dir)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    launch("fetch_sdk_update", main)
\ No newline at end of file
@@ -1,8 +1,15 @@
-import requests
-import pandas as pd
-import json
+import numpy as np
+import os
 import time
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import http_client
+from instrumentation import span
+from profiling import launch
+from report_writer import write_json, write_page
+from transaction_store import TransactionStore
+from wallet_aggregate import WalletAggregate
 
 def fetch_debank_wallet_data(address):
     """
@@ -10,12 +17,12 @@ def fetch_debank_wallet_data(address):
     """
     # Fetch token list
     token_url = f"https://openapi.debank.com/v1/user/token_list?id={address}&is_all=true"
-    token_response = requests.get(token_url)
+    token_response = http_client.get(token_url, last_good=False)
     tokens = token_response.json()
     
     # Fetch protocol list (DeFi positions)
     protocol_url = f"https://openapi.debank.com/v1/user/complex_protocol_list?id={address}"
-    protocol_response = requests.get(protocol_url)
+    protocol_response = http_client.get(protocol_url, last_good=False)
     protocols = protocol_response.json()
     
     return {
@@ -23,111 +30,237 @@ def fetch_debank_wallet_data(address):
         "protocols": protocols
     }
 
-def fetch_covalent_transactions(address, chain_id=1):
+COVALENT_URL = "https://api.covalenthq.com/v1/{chain_id}/address/{address}/transactions_v2/"
+
+# Ethereum, BNB Chain, Polygon, Arbitrum, Optimism, Base
+COVALENT_CHAIN_IDS = (1, 56, 137, 42161, 10, 8453)
+
+def fetch_covalent_transactions(address, chain_id=1, api_key=None, since_block=None, page_size=100, max_pages=20):
     """
-    Fetch recent transactions from Covalent API
-    Requires API key from https://www.covalenthq.com/
+    Fetch transactions from Covalent API, newest first, stopping at the
+    first page that reaches since_block. Returns (items, complete): the
+    transactions in blocks after since_block, and whether the fetch reached
+    since_block or the end of history rather than stopping at max_pages.
+    Requires API key from https://www.covalenthq.com/ (COVALENT_API_KEY)
     """
-    # Replace with your actual API key
-    api_key = "YOUR_COVALENT_API_KEY"
-    
-    url = f"https://api.covalenthq.com/v1/{chain_id}/address/{address}/transactions_v2/"
-    headers = {"Authorization": f"Basic {api_key}"}
-    
-    response = requests.get(url, headers=headers)
-    return response.json()
+    api_key = api_key or os.environ.get("COVALENT_API_KEY")
+    if not api_key:
+        raise ValueError("COVALENT_API_KEY is not set")
+
+    url = COVALENT_URL.format(chain_id=chain_id, address=address)
+    items = []
+    complete = False
+
+    for page in range(max_pages):
+        params = {
+            "page-number": page,
+            "page-size": page_size,
+            "block-signed-at-asc": "false"
+        }
+        response = http_client.get(url, auth=(api_key, ""), params=params, last_good=False)
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code} for chain {chain_id} page {page}")
+
+        data = response.json().get("data") or {}
+        page_items = data.get("items") or []
+        new_items = [
+            item for item in page_items
+            if since_block is None or (item.get("block_height") or 0) > since_block
+        ]
+        items.extend(new_items)
+
+        # Reached already ingested blocks, or the end of history
+        if len(new_items) < len(page_items) or not (data.get("pagination") or {}).get("has_more"):
+            complete = True
+            break
 
-def calculate_wallet_stats(wallet_data):
+    return items, complete
+
+def ingest_transactions(store, addresses, chain_ids=COVALENT_CHAIN_IDS, api_key=None, workers=8):
     """
-    Calculate statistics from wallet data
+    Fetch new transactions for every (address, chain) pair concurrently and
+    add them to the store, which advances each pair's block checkpoint to
+    the newest block fetched. Busy wallets are capped at the fetcher's
+    max_pages per run. Returns the number of transactions added.
     """
-    tokens = wallet_data["tokens"]
-    protocols = wallet_data["protocols"]
-    
-    # Calculate total value
-    total_token_value = sum(token.get("price", 0) * token.get("amount", 0) for token in tokens)
-    total_protocol_value = sum(protocol.get("portfolio_item_list", [{}])[0].get("stats", {}).get("net_usd_value", 0) 
-                              for protocol in protocols)
-    
-    total_value = total_token_value + total_protocol_value
-    
-    # Get token distribution
-    token_distribution = []
-    for token in tokens:
-        if token.get("price", 0) * token.get("amount", 0) > 0:
-            token_distribution.append({
-                "symbol": token.get("symbol", "Unknown"),
-                "value_usd": token.get("price", 0) * token.get("amount", 0),
-                "percentage": (token.get("price", 0) * token.get("amount", 0) / total_value * 100) if total_value > 0 else 0
-            })
-    
-    # Sort by value
-    token_distribution = sorted(token_distribution, key=lambda x: x["value_usd"], reverse=True)
-    
+    pairs = [(address, chain_id) for address in addresses for chain_id in chain_ids]
+    added = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                fetch_covalent_transactions, address, chain_id, api_key, store.checkpoint(address, chain_id)
+            ): (address, chain_id)
+            for address, chain_id in pairs
+        }
+
+        # SQLite writes stay on this thread
+        for future in as_completed(futures):
+            address, chain_id = futures[future]
+            try:
+                items, complete = future.result()
+                added += store.add_transactions(address, chain_id, items, complete)
+            except Exception as e:
+                print(f"Error ingesting transactions for {address} on chain {chain_id}: {e}")
+
+    return added
+
+# Tokens kept in each wallet's token distribution; the long tail still counts towards totals
+TOP_TOKENS = 100
+
+def build_token_table(token_lists):
+    """
+    Columnar table of the tokens of one or more wallets. Rows are grouped by
+    wallet (rows offsets[i]:offsets[i+1] belong to wallet i) and value is
+    price * amount, computed once for every token.
+    """
+    counts = np.fromiter((len(tokens) for tokens in token_lists), dtype=np.int64, count=len(token_lists))
+    flat = [token for tokens in token_lists for token in tokens]
+    price = np.fromiter((token.get("price") or 0 for token in flat), dtype=np.float64, count=len(flat))
+    amount = np.fromiter((token.get("amount") or 0 for token in flat), dtype=np.float64, count=len(flat))
+
     return {
-        "total_value_usd": total_value,
-        "token_value_usd": total_token_value,
-        "defi_value_usd": total_protocol_value,
-        "token_distribution": token_distribution
+        "wallet": np.repeat(np.arange(len(token_lists)), counts),
+        "offsets": np.concatenate(([0], np.cumsum(counts))),
+        # Upstream sends explicit nulls as well as missing keys; both become defaults
+        "id": np.array([token.get("id") or token.get("symbol") or "Unknown" for token in flat], dtype=object),
+        "chain": np.array([token.get("chain") or "" for token in flat], dtype=object),
+        "symbol": np.array([token.get("symbol") or "Unknown" for token in flat], dtype=object),
+        "price": price,
+        "amount": amount,
+        "value": price * amount
     }
 
-def generate_markdown_report(address, wallet_data, stats):
+def build_protocol_table(protocol_lists):
     """
-    Generate a markdown report from wallet data
+    Columnar table of the DeFi protocols of one or more wallets, grouped by
+    wallet like build_token_table. Each protocol's value is the sum of the
+    net USD value of all its portfolio items.
     """
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    markdown = f"""# Whale Wallet Analysis: {address}
+    counts = np.fromiter((len(protocols) for protocols in protocol_lists), dtype=np.int64, count=len(protocol_lists))
+    flat = [protocol for protocols in protocol_lists for protocol in protocols]
 
-*Generated on: {now}*
+    # One entry per portfolio item, pointing at the protocol it belongs to
+    item_owner = []
+    item_value = []
+    for index, protocol in enumerate(flat):
+        for item in protocol.get("portfolio_item_list") or []:
+            item_owner.append(index)
+            item_value.append((item.get("stats") or {}).get("net_usd_value") or 0)
 
-## Portfolio Summary
+    value = np.bincount(
+        np.asarray(item_owner, dtype=np.int64),
+        weights=np.asarray(item_value, dtype=np.float64),
+        minlength=len(flat)
+    )
 
-- **Total Portfolio Value:** ${stats['total_value_usd']:,.2f}
-- **Token Holdings Value:** ${stats['token_value_usd']:,.2f}
-- **DeFi Positions Value:** ${stats['defi_value_usd']:,.2f}
+    return {
+        "wallet": np.repeat(np.arange(len(protocol_lists)), counts),
+        "offsets": np.concatenate(([0], np.cumsum(counts))),
+        "name": np.array([protocol.get("name", "Unknown") for protocol in flat], dtype=object),
+        "value": value
+    }
 
-## Top Token Holdings
+def top_distribution(labels, values, total_value, key, top_k=None):
+    """
+    Positive values sorted descending (only the top_k, found with a partial
+    sort, if given) with their share of total_value
+    """
+    index = np.flatnonzero(values > 0)
+    if top_k is not None and len(index) > top_k:
+        index = index[np.argpartition(values[index], -top_k)[-top_k:]]
+    index = index[np.argsort(-values[index], kind="stable")]
 
-| Token | Value (USD) | % of Portfolio |
-|-------|-------------|----------------|
-"""
-    
-    # Add top 10 tokens
-    for token in stats['token_distribution'][:10]:
-        markdown += f"| {token['symbol']} | ${token['value_usd']:,.2f} | {token['percentage']:.2f}% |\n"
-    
-    markdown += """
-## DeFi Positions
+    shares = values[index] / total_value * 100 if total_value > 0 else np.zeros(len(index))
+    return [
+        {key: label, "value_usd": float(value), "percentage": float(share)}
+        for label, value, share in zip(labels[index], values[index], shares)
+    ]
+
+def wallet_stats_from_tables(tokens, protocols, top_k=TOP_TOKENS):
+    """
+    Calculate per-wallet statistics from a token table and a protocol table
+    """
+    n_wallets = len(tokens["offsets"]) - 1
 
-| Protocol | Value (USD) |
-|----------|-------------|
-"""
+    # Per-wallet totals in one pass over all rows
+    token_totals = np.bincount(tokens["wallet"], weights=tokens["value"], minlength=n_wallets)
+    protocol_totals = np.bincount(protocols["wallet"], weights=protocols["value"], minlength=n_wallets)
+    totals = token_totals + protocol_totals
+
+    stats = []
+    for i in range(n_wallets):
+        t_lo, t_hi = tokens["offsets"][i], tokens["offsets"][i + 1]
+        p_lo, p_hi = protocols["offsets"][i], protocols["offsets"][i + 1]
+
+        stats.append({
+            "total_value_usd": float(totals[i]),
+            "token_value_usd": float(token_totals[i]),
+            "defi_value_usd": float(protocol_totals[i]),
+            "token_distribution": top_distribution(
+                tokens["symbol"][t_lo:t_hi], tokens["value"][t_lo:t_hi], totals[i], "symbol", top_k
+            ),
+            "protocol_distribution": top_distribution(
+                protocols["name"][p_lo:p_hi], protocols["value"][p_lo:p_hi], totals[i], "name"
+            )
+        })
+
+    return stats
+
+def calculate_wallet_stats_batch(wallets, top_k=TOP_TOKENS):
+    """
+    Calculate statistics for many wallets at once from a single token table
+    and a single protocol table
+    """
+    tokens = build_token_table([wallet["tokens"] for wallet in wallets])
+    protocols = build_protocol_table([wallet["protocols"] for wallet in wallets])
+    return wallet_stats_from_tables(tokens, protocols, top_k)
+
+def calculate_wallet_stats(wallet_data, top_k=TOP_TOKENS):
+    """
+    Calculate statistics from wallet data
+    """
+    return calculate_wallet_stats_batch([wallet_data], top_k)[0]
+
+def build_wallet_page(address, stats, flows=None, top_tokens=10):
+    """
+    Everything a wallet page shows, as plain values for the wallet
+    shortcode. flows, if given, holds the wallet's top counterparties and
+    token flows from the transaction store.
+    """
+    page = {
+        "address": address,
+        "total_value_usd": stats["total_value_usd"],
+        "token_value_usd": stats["token_value_usd"],
+        "defi_value_usd": stats["defi_value_usd"],
+        "tokens": stats["token_distribution"][:top_tokens],
+        "protocols": stats["protocol_distribution"]
+    }
     
-    # Add DeFi positions
-    for protocol in wallet_data['protocols']:
-        if len(protocol.get("portfolio_item_list", [])) > 0:
-            value = protocol["portfolio_item_list"][0]["stats"].get("net_usd_value", 0)
-            if value > 0:
-                markdown += f"| {protocol.get('name', 'Unknown')} | ${value:,.2f} |\n"
+    if flows:
+        page["counterparties"] = flows["counterparties"]
+        page["token_flows"] = [
+            {**row, "token": row["token_symbol"] or row["token_address"]} for row in flows["tokens"]
+        ]
     
-    return markdown
+    return page
 
-def save_data(address, wallet_data, stats, markdown):
+def save_data(address, wallet_data, stats):
     """
     Save data to files
     """
     # Save raw data as JSON
-    with open(f"data/wallets/{address}_data.json", "w") as f:
-        json.dump(wallet_data, f, indent=2)
+    write_json(f"data/wallets/{address}_data.json", wallet_data)
     
     # Save stats as JSON
-    with open(f"data/wallets/{address}_stats.json", "w") as f:
-        json.dump(stats, f, indent=2)
+    write_json(f"data/wallets/{address}_stats.json", stats)
     
-    # Save markdown report
-    with open(f"content/wallets/{address}.md", "w") as f:
-        f.write(markdown)
+    # The page only holds the shortcode; the tables come from data/wallets/report.json
+    write_page(
+        f"content/wallets/{address}.md",
+        {"title": f"Whale Wallet Analysis: {address}"},
+        f'{{{{< wallet address="{address}" >}}}}'
+    )
 
 def main():
     # List of whale addresses to track
@@ -137,71 +270,109 @@ def main():
         "0xbe0eb53f46cd790cd13851d5eff43d12404d33e8"   # Binance 7
     ]
     
+    # Transaction history is optional: it needs a Covalent API key
+    store = None
+    if os.environ.get("COVALENT_API_KEY"):
+        store = TransactionStore("data/wallets/transactions.sqlite")
+        print("Ingesting new transactions...")
+        with span("fetch", source="covalent") as attrs:
+            added = ingest_transactions(store, whale_addresses)
+            attrs["items"] = added
+        print(f"Added {added} transactions")
+    
+    wallets = []
     for address in whale_addresses:
         print(f"Fetching data for {address}...")
         
         # Fetch data
-        wallet_data = fetch_debank_wallet_data(address)
+        with span("fetch", source="debank"):
+            wallets.append(fetch_debank_wallet_data(address))
         
-        # Calculate stats
-        stats = calculate_wallet_stats(wallet_data)
+        # Avoid rate limiting
+        time.sleep(2)
+    
+    # Calculate stats for all wallets in one batch
+    with span("wallet_stats", stage="compute"):
+        tokens = build_token_table([wallet["tokens"] for wallet in wallets])
+        protocols = build_protocol_table([wallet["protocols"] for wallet in wallets])
+        all_stats = wallet_stats_from_tables(tokens, protocols)
         
-        # Generate markdown
-        markdown = generate_markdown_report(address, wallet_data, stats)
+        # Cross-wallet view for the summary, built from the same token table
+        aggregate = WalletAggregate()
+        aggregate.add_tables(whale_addresses, tokens, all_stats)
+    
+    pages = []
+    for address, wallet_data, stats in zip(whale_addresses, wallets, all_stats):
+        flows = None
+        if store:
+            flows = {
+                "counterparties": store.counterparties(address),
+                "tokens": store.token_flows(address)
+            }
+        pages.append(build_wallet_page(address, stats, flows))
         
         # Save data
         try:
-            save_data(address, wallet_data, stats, markdown)
+            with span("write", address=address):
+                save_data(address, wallet_data, stats)
             print(f"Data for {address} saved successfully")
         except Exception as e:
             print(f"Error saving data for {address}: {e}")
-        
-        # Avoid rate limiting
-        time.sleep(2)
     
-    # Generate summary report of all whales
-    generate_whale_summary(whale_addresses)
-
-def generate_whale_summary(addresses):
-    """
-    Generate a summary report of all tracked whale wallets
-    """
-    summary_data = []
+    if store:
+        store.close()
     
-    for address in addresses:
-        try:
-            with open(f"data/wallets/{address}_stats.json", "r") as f:
-                stats = json.load(f)
-                
-            summary_data.append({
-                "address": address,
-                "total_value_usd": stats["total_value_usd"],
-                "token_value_usd": stats["token_value_usd"],
-                "defi_value_usd": stats["defi_value_usd"]
-            })
-        except Exception as e:
-            print(f"Error loading data for {address}: {e}")
+    # One compact data file feeds the summary page and every wallet page
+    with span("summary", stage="write"):
+        write_json("data/wallets/report.json", {
+            "wallets": pages,
+            "summary": build_whale_summary(aggregate),
+            "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }, indent=None)
+        write_page(
+            "content/wallets/index.md",
+            {"title": "Whale Wallet Tracking Summary", "slug": "wallets"},
+            "{{< whale-summary >}}",
+            overwrite=False
+        )
     
-    # Create DataFrame
-    df = pd.DataFrame(summary_data)
-    
-    # Generate markdown table
-    markdown = """# Whale Wallet Tracking Summary
-
-*Generated on: {}*
+    print("Whale summary data saved successfully")
 
-| Address | Total Value (USD) | Token Value (USD) | DeFi Value (USD) |
-|---------|------------------|-------------------|------------------|
-""".format(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-    
-    for _, row in df.iterrows():
-        markdown += f"| [{row['address']}](./wallets/{row['address']}.md) | ${row['total_value_usd']:,.2f} | ${row['token_value_usd']:,.2f} | ${row['defi_value_usd']:,.2f} |\n"
+def build_whale_summary(aggregate, top_tokens=15, top_wallets=10):
+    """
+    Cross-wallet summary for the whale-summary shortcode: per-wallet totals
+    and concentration, the largest token exposures and the token overlap of
+    the largest wallets
+    """
+    total, token, defi = aggregate.wallet_totals()
+    hhi, largest = aggregate.wallet_concentration()
+    wallets = [
+        {
+            "address": address,
+            "total_value_usd": float(total[i]),
+            "token_value_usd": float(token[i]),
+            "defi_value_usd": float(defi[i]),
+            "largest_token_share": float(largest[i]),
+            "hhi": float(hhi[i])
+        }
+        for i, address in enumerate(aggregate.addresses)
+    ]
     
-    # Save summary markdown
-    with open("content/wallets/index.md", "w") as f:
-        f.write(markdown)
+    # Pairwise overlap is shown for the largest wallets only
+    largest_wallets = [aggregate.addresses[i] for i in np.argsort(-total, kind="stable")[:top_wallets]]
+    overlap = None
+    if len(largest_wallets) >= 2:
+        matrix = aggregate.overlap_matrix(largest_wallets)
+        overlap = {
+            "addresses": largest_wallets,
+            "matrix": [[round(float(value), 4) for value in row] for row in matrix]
+        }
     
-    print("Whale summary report generated successfully")
+    return {
+        "wallets": wallets,
+        "token_exposure": aggregate.token_exposure(top_tokens),
+        "overlap": overlap
+    }
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    launch("fetch_wallet_data", main)
@@ -1,4 +1,3 @@
-import requests
 import pandas as pd
 import json
 import time
@@ -6,15 +5,21 @@ from datetime import datetime, timedelta
 import os
 import re
 import random
+import asyncio
+import heapq
+import hashlib
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from collections import Counter
 from bs4 import BeautifulSoup
 
-# Try to import OpenAI, but provide fallback if not available
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    print("OpenAI module not available. Using sample data for ChatGPT functions.")
+import http_client
+from instrumentation import span
+from keyword_store import KeywordStore
+from llm_client import LLMClient
+from profiling import launch
+from report_writer import write_json, write_report
 
 def fetch_crypto_news(api_key=None, count=10):
     """
@@ -32,7 +37,7 @@ def fetch_crypto_news(api_key=None, count=10):
         }
 
         try:
-            response = requests.get(url, params=params)
+            response = http_client.get(url, params=params)
 
             if response.status_code == 200:
                 data = response.json()
@@ -47,6 +52,150 @@ def fetch_crypto_news(api_key=None, count=10):
         # Use sample data if no API key
         return get_sample_news()
 
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+NEWS_QUERY = "cryptocurrency OR blockchain OR bitcoin OR ethereum"
+
+# How many seen URLs / title hashes to remember across runs
+NEWS_SEEN_LIMIT = 5000
+
+# The ingestion state is only read by this job, so it lives outside Hugo's
+# data directory; BITALK_NEWS_CACHE moves it
+CACHE_DIR_ENV = "BITALK_NEWS_CACHE"
+DEFAULT_CACHE_DIR = os.path.join(".cache", "news")
+
+TITLE_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+def normalize_article_url(url):
+    """
+    Normalize an article URL for deduplication (drop query, fragment and trailing slash)
+    """
+    parts = urlsplit(url or "")
+    return f"{parts.netloc.lower()}{parts.path.rstrip('/')}"
+
+def article_title_hash(title):
+    """
+    Hash a title so that near-duplicates (case, punctuation, word order,
+    stopwords) from different sources collide
+    """
+    # Keep numbers here: "hits $60,000" and "hits $70,000" are different stories
+    tokens = sorted(set(TITLE_TOKEN_PATTERN.findall((title or "").lower())) - STOPWORDS)
+    return hashlib.sha1(" ".join(tokens).encode("utf-8")).hexdigest()[:16]
+
+def load_news_state(state_path):
+    """
+    Load the ingestion high-water mark and dedup memory
+    """
+    if state_path and os.path.exists(state_path):
+        try:
+            with open(state_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading news state: {e}")
+    return {"high_water_mark": None, "seen_urls": [], "seen_title_hashes": []}
+
+def fetch_news_page(api_key, page, page_size, since=None):
+    """
+    Fetch one page of NewsAPI results, returning (articles, total_results)
+    """
+    params = {
+        "q": NEWS_QUERY,
+        "sortBy": "publishedAt",
+        "language": "en",
+        "pageSize": page_size,
+        "page": page,
+        "apiKey": api_key
+    }
+    if since:
+        params["from"] = since
+
+    response = http_client.get(NEWS_API_URL, params=params, timeout=30)
+    if response.status_code != 200:
+        raise RuntimeError(f"HTTP {response.status_code} for page {page}")
+
+    data = response.json()
+    return data.get("articles", []), data.get("totalResults", 0)
+
+def fetch_crypto_news_incremental(api_key, state_path, page_size=100, max_pages=5, workers=4):
+    """
+    Fetch only articles newer than the stored high-water mark, paging
+    concurrently and dropping repeats by URL and near-duplicate title.
+
+    The mark only advances after a complete fetch: every page succeeded and
+    max_pages covered all results. Otherwise older articles that were not
+    fetched would fall below the mark for good, so the old mark is kept and
+    the next run's overlap is dropped by the URL and title dedup.
+    """
+    state = load_news_state(state_path)
+    since = state.get("high_water_mark")
+
+    # The first page tells us how many pages there are
+    articles, total_results = fetch_news_page(api_key, 1, page_size, since)
+    total_pages = max(1, -(-total_results // page_size))
+    pages = min(max_pages, total_pages)
+    complete = pages == total_pages
+    if not complete:
+        print(f"Only fetching {pages} of {total_pages} news pages; keeping the high-water mark")
+
+    if pages > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(fetch_news_page, api_key, page, page_size, since) for page in range(2, pages + 1)]
+            for future in futures:
+                try:
+                    articles.extend(future.result()[0])
+                except Exception as e:
+                    print(f"Error fetching news page: {e}")
+                    complete = False
+
+    seen_urls = set(state.get("seen_urls", []))
+    seen_titles = set(state.get("seen_title_hashes", []))
+    new_urls = []
+    new_titles = []
+    fresh = []
+
+    for article in articles:
+        url_key = normalize_article_url(article.get("url"))
+        title_key = article_title_hash(article.get("title"))
+        if (url_key and url_key in seen_urls) or title_key in seen_titles:
+            continue
+
+        if url_key:
+            seen_urls.add(url_key)
+            new_urls.append(url_key)
+        seen_titles.add(title_key)
+        new_titles.append(title_key)
+        fresh.append(article)
+
+    # NewsAPI timestamps are ISO 8601 in UTC, so they sort as strings
+    published = [a["publishedAt"] for a in fresh if a.get("publishedAt")]
+    if published and complete:
+        state["high_water_mark"] = max(published + ([since] if since else []))
+
+    state["seen_urls"] = (state.get("seen_urls", []) + new_urls)[-NEWS_SEEN_LIMIT:]
+    state["seen_title_hashes"] = (state.get("seen_title_hashes", []) + new_titles)[-NEWS_SEEN_LIMIT:]
+    write_json(state_path, state)
+
+    print(f"Fetched {len(articles)} articles, {len(fresh)} new since {since or 'the beginning'}")
+    return sorted(fresh, key=lambda a: a.get("publishedAt", ""), reverse=True)
+
+def merge_news(existing, new_articles):
+    """
+    Merge newly fetched articles into an existing list, newest first, without repeats
+    """
+    merged = []
+    seen_urls = set()
+    seen_titles = set()
+    for article in list(new_articles) + list(existing):
+        url_key = normalize_article_url(article.get("url"))
+        title_key = article_title_hash(article.get("title"))
+        if (url_key and url_key in seen_urls) or title_key in seen_titles:
+            continue
+        if url_key:
+            seen_urls.add(url_key)
+        seen_titles.add(title_key)
+        merged.append(article)
+
+    return sorted(merged, key=lambda a: a.get("publishedAt", ""), reverse=True)
+
 def fetch_trending_topics(count=10):
     """
     Fetch trending crypto topics from Twitter or other sources
@@ -115,74 +264,91 @@ def get_sample_trending_topics():
         {"topic": "Cross-chain Bridges", "volume": 8000, "sentiment": "neutral"}
     ]
 
-def extract_keywords(news_articles, trending_topics):
+# Tokens are lowercase alphanumeric runs of at least 3 characters containing a letter
+# (so "$60,000" does not turn into a "000" keyword)
+TOKEN_PATTERN = re.compile(r'\b(?=[a-z0-9]*[a-z])[a-z0-9]{3,}\b')
+
+STOPWORDS = frozenset("""
+the and for has with its from that this have are was were been being will would could should
+can may might must shall not but all any each few more most other some such than too very own
+same into onto over under about above below after before again further then once here there
+when where why how what which who whom whose their them they these those our ours you your
+yours his her hers him she one two three also just only even still yet now new says said
+say according report reports reported amid while per via out off down upon did does doing
+had having get gets got make makes made week weeks day days today year years month months
+time first last next back like well much many way ago
+crypto cryptocurrency cryptocurrencies blockchain blockchains token tokens coin coins market
+markets price prices news trading trader traders investor investors digital asset assets
+""".split())
+
+def iter_keyword_texts(news_articles, trending_topics):
     """
-    Extract keywords from news articles and trending topics
+    Yield the lowercase text of every article and trending topic
     """
-    # Combine titles and descriptions from news
-    text_content = " ".join([
-        f"{article['title']} {article.get('description', '')}" 
-        for article in news_articles
-    ])
+    for article in news_articles:
+        yield f"{article['title']} {article.get('description') or ''}".lower()
+    for topic in trending_topics:
+        yield topic["topic"].lower()
 
-    # Add trending topics
-    text_content += " " + " ".join([topic["topic"] for topic in trending_topics])
-
-    # Simple keyword extraction (in a real implementation, use NLP techniques)
-    # Remove common words and punctuation
-    text_content = text_content.lower()
-    words = re.findall(r'\b[a-z0-9]{3,}\b', text_content)
-
-    # Count word frequency
-    word_counts = {}
-    for word in words:
-        if word in word_counts:
-            word_counts[word] += 1
-        else:
-            word_counts[word] = 1
-
-    # Filter out common words
-    common_words = ["the", "and", "for", "has", "with", "its", "from", "that", "this", "have"]
-    filtered_counts = {word: count for word, count in word_counts.items() if word not in common_words}
+def count_keywords(news_articles, trending_topics, include_bigrams=False):
+    """
+    Count keyword frequencies in news articles and trending topics
+    """
+    counts = Counter()
+    
+    # Tokenize each text separately so bigrams never span two articles
+    for text in iter_keyword_texts(news_articles, trending_topics):
+        tokens = TOKEN_PATTERN.findall(text)
+        counts.update(token for token in tokens if token not in STOPWORDS)
+        
+        if include_bigrams:
+            counts.update(
+                f"{first} {second}" for first, second in zip(tokens, tokens[1:])
+                if first not in STOPWORDS and second not in STOPWORDS
+            )
+    
+    return counts
+
+def extract_keywords(news_articles, trending_topics, top_n=20, include_bigrams=False):
+    """
+    Extract keywords (and optionally two-word phrases) from news articles and trending topics
+    """
+    counts = count_keywords(news_articles, trending_topics, include_bigrams)
 
-    # Sort by frequency
-    sorted_words = sorted(filtered_counts.items(), key=lambda x: x[1], reverse=True)
+    # Partial sort for the top keywords
+    top_words = heapq.nlargest(top_n, counts.items(), key=lambda x: x[1])
 
-    # Return top keywords
-    return [{"keyword": word, "count": count} for word, count in sorted_words[:20]]
+    return [{"keyword": word, "count": count} for word, count in top_words]
 
-def generate_news_summary(news_articles, api_key=None):
+def build_summary_prompt(news_articles):
     """
-    Generate a summary of news articles using ChatGPT
+    Build the ChatGPT prompt for the daily news summary
     """
-    if not api_key or not OPENAI_AVAILABLE:
-        # Return a sample summary if no API key or OpenAI not available
-        return get_sample_summary(news_articles)
-
-    try:
-        openai.api_key = api_key
-
-        # Prepare news data for the prompt
-        news_text = "\n\n".join([
-            f"Title: {article['title']}\nSource: {article['source']['name']}\nDescription: {article.get('description', 'No description available.')}"
-            for article in news_articles[:5]  # Limit to 5 articles to avoid token limits
-        ])
+    # Prepare news data for the prompt
+    news_text = "\n\n".join([
+        f"Title: {article['title']}\nSource: {article['source']['name']}\nDescription: {article.get('description', 'No description available.')}"
+        for article in news_articles[:5]  # Limit to 5 articles to avoid token limits
+    ])
 
-        prompt = f"""Please provide a concise summary of the following crypto news articles:
+    return f"""Please provide a concise summary of the following crypto news articles:
 
 {news_text}
 
 Create a 3-paragraph summary that highlights the most important developments and their potential impact on the market.
 """
 
-        response = openai.Completion.create(
-            engine="text-davinci-003",
-            prompt=prompt,
-            max_tokens=500,
-            temperature=0.7
-        )
+async def generate_news_summary_async(client, news_articles, on_token=None):
+    """
+    Generate a summary of news articles using ChatGPT, streaming text
+    deltas to on_token if given
+    """
+    if client is None:
+        # Return a sample summary if no API key
+        return get_sample_summary(news_articles)
 
-        return response.choices[0].text.strip()
+    try:
+        return await client.complete(build_summary_prompt(news_articles), max_tokens=500, temperature=0.7,
+                                     on_token=on_token)
     except Exception as e:
         print(f"Error generating summary with ChatGPT: {e}")
         return get_sample_summary(news_articles)
@@ -199,21 +365,14 @@ Meanwhile, Ethereum's recent network upgrade has successfully reduced gas fees b
 On the regulatory front, there are signs of potential progress as an SEC Commissioner has publicly advocated for clearer cryptocurrency regulations. This development coincides with traditional financial institutions expanding their crypto offerings, exemplified by a major global bank launching custody services for institutional clients, further bridging the gap between traditional finance and digital assets.
 """
 
-def generate_content_script(topic, keywords, api_key=None):
+def build_script_prompt(topic, keywords):
     """
-    Generate a content script for a given topic using ChatGPT
+    Build the ChatGPT prompt for a content script on a topic
     """
-    if not api_key or not OPENAI_AVAILABLE:
-        # Return a sample script if no API key or OpenAI not available
-        return get_sample_script(topic)
+    # Prepare keywords for the prompt
+    keyword_text = ", ".join([k["keyword"] for k in keywords[:10]])
 
-    try:
-        openai.api_key = api_key
-
-        # Prepare keywords for the prompt
-        keyword_text = ", ".join([k["keyword"] for k in keywords[:10]])
-
-        prompt = f"""Create a short script for a crypto content creator covering the topic: "{topic}".
+    return f"""Create a short script for a crypto content creator covering the topic: "{topic}".
 
 The script should:
 1. Have a catchy introduction that grabs attention
@@ -225,18 +384,49 @@ Format the script with clear sections for INTRO, MAIN POINTS, and CONCLUSION.
 Keep it under 500 words and make it engaging for a crypto audience.
 """
 
-        response = openai.Completion.create(
-            engine="text-davinci-003",
-            prompt=prompt,
-            max_tokens=600,
-            temperature=0.8
-        )
+async def generate_content_script_async(client, topic, keywords, on_token=None):
+    """
+    Generate a content script for a given topic using ChatGPT, streaming
+    text deltas to on_token if given
+    """
+    if client is None:
+        # Return a sample script if no API key
+        return get_sample_script(topic)
 
-        return response.choices[0].text.strip()
+    try:
+        return await client.complete(build_script_prompt(topic, keywords), max_tokens=600, temperature=0.8,
+                                     on_token=on_token)
     except Exception as e:
         print(f"Error generating script with ChatGPT: {e}")
         return get_sample_script(topic)
 
+async def generate_llm_content(news_articles, topics, keywords, api_key=None, report=None):
+    """
+    Generate the news summary and one script per topic concurrently.
+    Returns (summary, {topic: script}).
+
+    If a StreamingReport is given, every section streams into it and the
+    page is republished as text arrives and as each section completes.
+    """
+    client = LLMClient(api_key) if api_key else None
+
+    async def run(section, generate):
+        on_token = report.token_callback(section) if report else None
+        text = await generate(on_token)
+        if report:
+            report.complete(section, text)
+        return text
+
+    summary, *scripts = await asyncio.gather(
+        run(SUMMARY_SECTION, lambda on_token: generate_news_summary_async(client, news_articles, on_token)),
+        *[
+            run(topic["topic"], lambda on_token, t=topic["topic"]: generate_content_script_async(client, t, keywords, on_token))
+            for topic in topics
+        ]
+    )
+
+    return summary, {topic["topic"]: script for topic, script in zip(topics, scripts)}
+
 def get_sample_script(topic):
     """
     Generate a sample content script without using ChatGPT
@@ -260,13 +450,20 @@ So there you have it - the complete picture on {topic} and why it matters for yo
 Remember, I'm not a financial advisor, but I am your guide through the exciting world of crypto. Stay informed, stay strategic, and I'll see you in the next video!
 """
 
-def generate_markdown_report(news, topics, keywords, summary, scripts):
+# Section key for the news summary in a StreamingReport; scripts are keyed by topic
+SUMMARY_SECTION = "__summary__"
+
+SUMMARY_PLACEHOLDER = "*The news summary is being generated and will appear here shortly.*"
+SCRIPT_PLACEHOLDER = "Script is being generated..."
+
+def iter_markdown_report(news, topics, keywords, summary, scripts):
     """
-    Generate a markdown report with daily headlines and content ideas
+    Yield the daily headlines report section by section. A summary or script
+    that is still None is rendered as a placeholder.
     """
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    markdown = f"""# Daily Crypto Headlines & Content Ideas
+    yield f"""# Daily Crypto Headlines & Content Ideas
 
 *Generated on: {now}*
 
@@ -278,13 +475,13 @@ def generate_markdown_report(news, topics, keywords, summary, scripts):
 
     # Add trending topics
     for topic in topics[:5]:
-        markdown += f"| {topic['topic']} | {topic['volume']:,} | {topic['sentiment'].title()} |\n"
+        yield f"| {topic['topic']} | {topic['volume']:,} | {topic['sentiment'].title()} |\n"
 
     # Add news summary
-    markdown += f"""
+    yield f"""
 ## News Summary
 
-{summary}
+{SUMMARY_PLACEHOLDER if summary is None else summary}
 
 ## Latest News Headlines
 
@@ -292,22 +489,23 @@ def generate_markdown_report(news, topics, keywords, summary, scripts):
 |----------|--------|------|
 """
 
-    # Add news headlines
+    # Add news headlines. Times are absolute: a relative "2h ago" would change
+    # the page on every run even when the headlines did not
     for article in news[:8]:
         published_time = article.get("publishedAt", "")
         if published_time:
             try:
                 dt = datetime.strptime(published_time, "%Y-%m-%dT%H:%M:%SZ")
-                time_ago = get_time_ago(dt)
+                published = dt.strftime("%Y-%m-%d %H:%M UTC")
             except:
-                time_ago = published_time
+                published = published_time
         else:
-            time_ago = "Recent"
+            published = "Recent"
 
-        markdown += f"| [{article['title']}]({article.get('url', '#')}) | {article.get('source', {}).get('name', 'Unknown')} | {time_ago} |\n"
+        yield f"| [{article['title']}]({article.get('url', '#')}) | {article.get('source', {}).get('name', 'Unknown')} | {published} |\n"
 
     # Add trending keywords
-    markdown += """
+    yield """
 ## Trending Keywords
 
 """
@@ -315,10 +513,10 @@ def generate_markdown_report(news, topics, keywords, summary, scripts):
     # Create keyword cloud (simple markdown version)
     for keyword in keywords[:15]:
         size = min(3, max(1, keyword["count"] // 2))
-        markdown += f"{'#' * size} {keyword['keyword']} "
+        yield f"{'#' * size} {keyword['keyword']} "
 
     # Add content scripts
-    markdown += """
+    yield """
 
 ## Content Script Ideas
 
@@ -328,25 +526,67 @@ The following script templates can be used as starting points for creating conte
 
     # Add scripts
     for topic, script in scripts.items():
-        markdown += f"### {topic}\n\n```\n{script}\n```\n\n"
+        yield f"### {topic}\n\n```\n{SCRIPT_PLACEHOLDER if script is None else script}\n```\n\n"
 
-    return markdown
-
-def get_time_ago(dt):
+class StreamingReport:
     """
-    Convert datetime to "time ago" format
+    Publish the daily page before the LLM sections are ready and fill them in
+    as their completions stream in.
+
+    Sections that do not depend on the LLM are rendered straight away, with a
+    placeholder for the summary and each script. Streamed text is shown as it
+    arrives, republishing at most once every min_interval seconds, and the
+    page is always republished when a section completes.
     """
-    now = datetime.now()
-    diff = now - dt
 
-    if diff.days > 0:
-        return f"{diff.days}d ago"
-    elif diff.seconds >= 3600:
-        return f"{diff.seconds // 3600}h ago"
-    elif diff.seconds >= 60:
-        return f"{diff.seconds // 60}m ago"
-    else:
-        return "Just now"
+    def __init__(self, paths, news, topics, keywords, script_topics, min_interval=2.0):
+        self.paths = paths
+        self.news = news
+        self.topics = topics
+        self.keywords = keywords
+        self.min_interval = min_interval
+        self.partial = {SUMMARY_SECTION: []}
+        self.partial.update({topic: [] for topic in script_topics})
+        self.final = {}
+        self._last_publish = 0.0
+
+    def _section_text(self, section):
+        if section in self.final:
+            return self.final[section]
+        text = "".join(self.partial[section]).strip()
+        return f"{text} ..." if text else None
+
+    def render(self):
+        """
+        Yield the page with whatever LLM text is available so far
+        """
+        scripts = {topic: self._section_text(topic) for topic in self.partial if topic != SUMMARY_SECTION}
+        return iter_markdown_report(self.news, self.topics, self.keywords,
+                                    self._section_text(SUMMARY_SECTION), scripts)
+
+    def publish(self):
+        """
+        Write the current state of the page; unchanged renders are skipped
+        """
+        self._last_publish = time.monotonic()
+        return write_report(self.paths, self.render())
+
+    def token_callback(self, section):
+        """
+        Return an on_token callback that appends streamed text to a section
+        """
+        def on_token(delta):
+            self.partial[section].append(delta)
+            if time.monotonic() - self._last_publish >= self.min_interval:
+                self.publish()
+        return on_token
+
+    def complete(self, section, text):
+        """
+        Set the final text of a section and republish
+        """
+        self.final[section] = text
+        self.publish()
 
 def main():
     # Configuration
@@ -361,54 +601,83 @@ def main():
     news_api_key = os.environ.get("NEWS_API_KEY")
     openai_api_key = os.environ.get("OPENAI_API_KEY")
 
+    today = datetime.now().strftime("%Y-%m-%d")
+    daily_data_path = os.path.join(data_dir, f"{today}_data.json")
+
     # Fetch data
     print("Fetching latest crypto news...")
-    news = fetch_crypto_news(news_api_key)
+    with span("fetch", source="news") as attrs:
+        if news_api_key:
+            # Fetch only what is new since the last run and add it to today's articles
+            todays_news = []
+            if os.path.exists(daily_data_path):
+                with open(daily_data_path, "r") as f:
+                    todays_news = json.load(f).get("news", [])
+
+            # A state file left in data/ by earlier versions is moved out of Hugo's data directory
+            state_path = os.path.join(os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR), "news_state.json")
+            old_state_path = os.path.join(data_dir, "news_state.json")
+            if not os.path.exists(state_path) and os.path.exists(old_state_path):
+                os.makedirs(os.path.dirname(state_path), exist_ok=True)
+                shutil.move(old_state_path, state_path)
+
+            try:
+                new_articles = fetch_crypto_news_incremental(news_api_key, state_path)
+            except Exception as e:
+                print(f"Error fetching news: {e}")
+                new_articles = []
+
+            # Sample news is only rendered, never saved into the day file
+            saved_news = merge_news(todays_news, new_articles)
+            news = saved_news or get_sample_news()
+        else:
+            news = saved_news = fetch_crypto_news(news_api_key)
+        attrs["items"] = len(news)
 
     print("Fetching trending topics...")
-    topics = fetch_trending_topics()
+    with span("fetch", source="topics"):
+        topics = fetch_trending_topics()
 
     # Extract keywords
     print("Extracting keywords...")
-    keywords = extract_keywords(news, topics)
-
-    # Generate news summary
-    print("Generating news summary...")
-    summary = generate_news_summary(news, openai_api_key)
-
-    # Generate content scripts for top topics
-    print("Generating content scripts...")
-    scripts = {}
-    for topic in topics[:3]:
-        print(f"Generating script for {topic['topic']}...")
-        scripts[topic['topic']] = generate_content_script(topic['topic'], keywords, openai_api_key)
-        time.sleep(1)  # Avoid rate limiting
-
-    # Generate markdown report
-    print("Generating markdown report...")
-    markdown = generate_markdown_report(news, topics, keywords, summary, scripts)
-
-    # Save markdown report
-    today = datetime.now().strftime("%Y-%m-%d")
-    with open(os.path.join(output_dir, f"{today}.md"), "w") as f:
-        f.write(markdown)
-
-    # Also save as index.md for the latest report
-    with open(os.path.join(output_dir, "index.md"), "w") as f:
-        f.write(markdown)
+    with span("keywords", stage="compute"):
+        keywords = extract_keywords(news, topics)
+
+        # Update rolling keyword statistics with today's articles
+        keyword_store = KeywordStore(os.path.join(data_dir, "keyword_stats.json"))
+        keyword_store.ingest(today, count_keywords(news, topics))
+        keyword_store.save()
+        trending_keywords = keyword_store.trending()
+
+    # Publish the page right away with placeholders, saved as today's page and as
+    # index.md for the latest report, then fill in the LLM sections as they stream in
+    print("Publishing markdown report...")
+    script_topics = [topic["topic"] for topic in topics[:3]]
+    report = StreamingReport(
+        [os.path.join(output_dir, f"{today}.md"), os.path.join(output_dir, "index.md")],
+        news, topics, keywords, script_topics
+    )
+    with span("report", stage="render"):
+        report.publish()
+
+    # Generate news summary and content scripts for top topics in one concurrent batch
+    print("Generating news summary and content scripts...")
+    with span("llm", stage="fetch"):
+        summary, scripts = asyncio.run(generate_llm_content(news, topics[:3], keywords, openai_api_key, report))
 
     # Save raw data as JSON
-    with open(os.path.join(data_dir, f"{today}_data.json"), "w") as f:
-        json.dump({
-            "news": news,
+    with span("write"):
+        write_json(daily_data_path, {
+            "news": saved_news,
             "topics": topics,
             "keywords": keywords,
+            "trending_keywords": trending_keywords,
             "summary": summary,
             "scripts": scripts,
             "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }, f, indent=2)
+        })
 
     print(f"Daily headlines report generated for {today}")
 
 if __name__ == "__main__":
-    main()
+    launch("gen_daily_headlines", main)
@@ -2,12 +2,36 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 import os
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 import json
+import hashlib
 
-def load_strategy_data(file_path):
+# Feather caching of parsed backtests is optional
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+from instrumentation import count, span
+from profiling import launch
+from report_writer import ReportWriter, write_json
+
+# Feather caches live outside Hugo's data directory, so they are neither
+# loaded into site.Data nor able to trigger rebuilds
+CACHE_DIR_ENV = "BITALK_STRATEGY_CACHE"
+DEFAULT_CACHE_DIR = os.path.join(".cache", "strategies")
+
+# Columns the reports use; returns may come under any of its three names
+REPORT_COLUMNS = ["date", "returns", "Returns", "daily_return", "cumulative_returns"]
+
+def read_strategy_source(file_path):
     """
-    Load strategy backtest data from CSV or Excel file
+    Parse strategy backtest data from a CSV or Excel file
     """
     if file_path.endswith('.csv'):
         df = pd.read_csv(file_path)
@@ -25,35 +49,206 @@ def load_strategy_data(file_path):
     
     return df
 
-def calculate_performance_metrics(df):
+def _file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _load_cache_manifest(manifest_path):
+    try:
+        with open(manifest_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_cache(df, file_path, cache_dir, source_hash, stat):
     """
-    Calculate key performance metrics from backtest data
+    Store the parsed frame as a Feather file and record which source it came from
     """
-    # Ensure we have a returns column
-    if 'returns' not in df.columns and 'Returns' in df.columns:
-        df.rename(columns={'Returns': 'returns'}, inplace=True)
+    base_name = os.path.basename(file_path)
+    cache_path = os.path.join(cache_dir, f"{base_name}.{source_hash[:16]}.feather")
+    tmp_path = cache_path + ".tmp"
+    
+    feather.write_feather(pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False), tmp_path)
+    os.replace(tmp_path, cache_path)
+    
+    manifest = {
+        "source": os.path.abspath(file_path),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": source_hash,
+        "cache_file": os.path.basename(cache_path)
+    }
+    write_json(os.path.join(cache_dir, f"{base_name}.cache.json"), manifest)
     
-    if 'returns' not in df.columns and 'daily_return' in df.columns:
-        df.rename(columns={'daily_return': 'returns'}, inplace=True)
+    # Drop caches of older versions of this source
+    for stale_path in glob.glob(os.path.join(cache_dir, f"{glob.escape(base_name)}.*.feather")):
+        if stale_path != cache_path:
+            os.remove(stale_path)
     
-    # Calculate metrics
-    total_return = (df['returns'] + 1).prod() - 1
-    annual_return = (1 + total_return) ** (252 / len(df)) - 1
-    daily_returns = df['returns']
-    volatility = daily_returns.std() * np.sqrt(252)
-    sharpe_ratio = annual_return / volatility if volatility != 0 else 0
-    max_drawdown = (df['returns'].cumsum() - df['returns'].cumsum().cummax()).min()
-    win_rate = len(daily_returns[daily_returns > 0]) / len(daily_returns)
+    return cache_path
+
+def _cached_feather_path(file_path, cache_dir):
+    """
+    Return the Feather cache for a source file, building it if the source changed
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    stat = os.stat(file_path)
+    manifest_path = os.path.join(cache_dir, f"{os.path.basename(file_path)}.cache.json")
+    manifest = _load_cache_manifest(manifest_path)
+    cache_path = os.path.join(cache_dir, manifest["cache_file"]) if manifest else None
+    
+    if cache_path and os.path.exists(cache_path):
+        # Unchanged mtime and size: trust the cache without reading the source
+        if manifest["mtime_ns"] == stat.st_mtime_ns and manifest["size"] == stat.st_size:
+            count("cache_hits_total", cache="strategy")
+            return cache_path
+        
+        # Touched but identical content: refresh the manifest only
+        source_hash = _file_sha256(file_path)
+        if source_hash == manifest["sha256"]:
+            manifest["mtime_ns"] = stat.st_mtime_ns
+            manifest["size"] = stat.st_size
+            write_json(manifest_path, manifest)
+            count("cache_hits_total", cache="strategy")
+            return cache_path
+    else:
+        source_hash = _file_sha256(file_path)
     
-    return {
+    count("cache_misses_total", cache="strategy")
+    return _write_cache(read_strategy_source(file_path), file_path, cache_dir, source_hash, stat)
+
+def strategy_cache_dir(file_path):
+    """
+    Cache directory for a source file: one folder per source directory under
+    BITALK_STRATEGY_CACHE (default .cache/strategies), so sources with the
+    same name in different folders do not share a cache
+    """
+    source_dir = os.path.dirname(os.path.abspath(file_path))
+    digest = hashlib.sha1(source_dir.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR), digest)
+
+def load_strategy_data(file_path, columns=None, cache_dir=None, use_cache=True):
+    """
+    Load strategy backtest data from CSV or Excel file
+    
+    On first read the parsed frame (with dates already converted) is stored as
+    a Feather file under cache_dir (default: see strategy_cache_dir), keyed by
+    the source's mtime and SHA-256. Later loads memory-map that file and read
+    only the requested columns; requested columns the file does not have are
+    skipped. Without pyarrow the source is parsed every time.
+    """
+    if not use_cache or not PYARROW_AVAILABLE:
+        return _select_columns(read_strategy_source(file_path), columns)
+    
+    if cache_dir is None:
+        cache_dir = strategy_cache_dir(file_path)
+    
+    try:
+        cache_path = _cached_feather_path(file_path, cache_dir)
+    except (pa.ArrowException, OSError) as e:
+        print(f"Strategy cache unavailable for {file_path}, reading source directly: {e}")
+        return _select_columns(read_strategy_source(file_path), columns)
+    
+    if columns is not None:
+        with pa.memory_map(cache_path) as source:
+            available = set(pa.ipc.open_file(source).schema.names)
+        columns = [c for c in columns if c in available]
+    return feather.read_table(cache_path, columns=columns, memory_map=True).to_pandas()
+
+def _select_columns(df, columns):
+    return df[[c for c in columns if c in df.columns]] if columns is not None else df
+
+def _as_returns_matrix(returns):
+    """
+    Return (values, columns) for a wide returns matrix given as a DataFrame,
+    Series or array
+    """
+    if isinstance(returns, pd.Series):
+        returns = returns.to_frame()
+    if isinstance(returns, pd.DataFrame):
+        return returns.to_numpy(dtype=float), list(returns.columns)
+    
+    values = np.asarray(returns, dtype=float)
+    if values.ndim == 1:
+        values = values[:, np.newaxis]
+    return values, list(range(values.shape[1]))
+
+def calculate_batch_metrics(returns, periods_per_year=252):
+    """
+    Calculate key performance metrics for every column of a wide returns
+    matrix (dates x strategies) with one set of NumPy reductions.
+    Columns may be NaN-padded when strategies cover different date ranges.
+    Returns a DataFrame indexed by strategy.
+    """
+    values, columns = _as_returns_matrix(returns)
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    periods = valid.sum(axis=0)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        total_return = np.prod(1 + filled, axis=0) - 1
+        annual_return = (1 + total_return) ** (periods_per_year / periods) - 1
+        volatility = np.nanstd(values, axis=0, ddof=1) * np.sqrt(periods_per_year)
+        sharpe_ratio = np.where(volatility != 0, annual_return / volatility, 0.0)
+        
+        # Drawdown of the additive equity curve, computed from a single cumsum
+        equity = np.cumsum(filled, axis=0)
+        max_drawdown = (equity - np.maximum.accumulate(equity, axis=0)).min(axis=0)
+        
+        win_rate = (filled > 0).sum(axis=0) / periods
+    
+    return pd.DataFrame({
         'total_return': total_return,
         'annual_return': annual_return,
         'volatility': volatility,
         'sharpe_ratio': sharpe_ratio,
         'max_drawdown': max_drawdown,
         'win_rate': win_rate
+    }, index=columns)
+
+def calculate_rolling_metrics(returns, window, periods_per_year=252):
+    """
+    Calculate rolling-window metrics for every column of a wide returns matrix.
+    Returns a dict of metric name -> DataFrame (dates x strategies).
+    Drawdown is path dependent and is left to calculate_batch_metrics.
+    """
+    if not isinstance(returns, pd.DataFrame):
+        values, columns = _as_returns_matrix(returns)
+        returns = pd.DataFrame(values, columns=columns)
+    
+    rolling_log = np.log1p(returns).rolling(window)
+    total_return = np.expm1(rolling_log.sum())
+    annual_return = (1 + total_return) ** (periods_per_year / window) - 1
+    volatility = returns.rolling(window).std() * np.sqrt(periods_per_year)
+    sharpe_ratio = (annual_return / volatility).where(volatility != 0, 0.0)
+    win_rate = (returns > 0).astype(float).where(returns.notna()).rolling(window).mean()
+    
+    return {
+        'total_return': total_return,
+        'annual_return': annual_return,
+        'volatility': volatility,
+        'sharpe_ratio': sharpe_ratio,
+        'win_rate': win_rate
     }
 
+def calculate_performance_metrics(df):
+    """
+    Calculate key performance metrics from backtest data
+    """
+    # Ensure we have a returns column
+    if 'returns' not in df.columns and 'Returns' in df.columns:
+        df.rename(columns={'Returns': 'returns'}, inplace=True)
+    
+    if 'returns' not in df.columns and 'daily_return' in df.columns:
+        df.rename(columns={'daily_return': 'returns'}, inplace=True)
+    
+    # Calculate metrics
+    metrics = calculate_batch_metrics(df['returns'].to_numpy(dtype=float))
+    return {name: float(value) for name, value in metrics.iloc[0].items()}
+
 def generate_performance_chart(df, strategy_name, output_dir):
     """
     Generate performance chart and save as image
@@ -91,43 +286,36 @@ def generate_monthly_returns_heatmap(df, strategy_name, output_dir):
     if 'date' in df.columns:
         df = df.set_index('date')
     
-    # Calculate monthly returns
-    monthly_returns = df['returns'].resample('M').apply(lambda x: (1 + x).prod() - 1)
-    monthly_returns = monthly_returns.to_frame()
+    # Calculate monthly returns: compounding is a sum in log space
+    monthly_returns = np.expm1(np.log1p(df['returns']).resample('M').sum())
     
-    # Create a pivot table with years as rows and months as columns
-    monthly_returns['year'] = monthly_returns.index.year
-    monthly_returns['month'] = monthly_returns.index.month
-    heatmap_data = monthly_returns.pivot_table(
-        index='year', 
-        columns='month', 
-        values='returns'
-    )
+    # Scatter the months into a years x 12 grid
+    years, year_rows = np.unique(monthly_returns.index.year, return_inverse=True)
+    heatmap_data = np.full((len(years), 12), np.nan)
+    heatmap_data[year_rows, monthly_returns.index.month - 1] = monthly_returns.to_numpy()
     
-    # Create heatmap
+    # Create heatmap with one unit per cell so labels sit at cell centres
     plt.figure(figsize=(12, 8))
     cmap = plt.cm.RdYlGn  # Red for negative, green for positive
-    plt.pcolormesh(heatmap_data.columns, heatmap_data.index, heatmap_data.values, cmap=cmap, vmin=-0.1, vmax=0.1)
+    plt.pcolormesh(np.arange(13), np.arange(len(years) + 1), np.ma.masked_invalid(heatmap_data),
+                   cmap=cmap, vmin=-0.1, vmax=0.1)
     plt.colorbar(label='Returns')
     
     # Set labels
     month_labels = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-    plt.xticks(np.arange(1, 13) + 0.5, month_labels)
-    plt.yticks(heatmap_data.index, heatmap_data.index)
+    plt.xticks(np.arange(12) + 0.5, month_labels)
+    plt.yticks(np.arange(len(years)) + 0.5, years)
     
     plt.title(f'{strategy_name} Monthly Returns')
     
-    # Add text annotations
-    for i in range(len(heatmap_data.index)):
-        for j in range(len(heatmap_data.columns)):
-            try:
-                value = heatmap_data.iloc[i, j]
-                if not np.isnan(value):
-                    text_color = 'white' if abs(value) > 0.05 else 'black'
-                    plt.text(j + 0.5, i + 0.5, f'{value:.1%}', 
-                             ha='center', va='center', color=text_color)
-            except:
-                pass
+    # Add text annotations from precomputed positions, labels and colours
+    rows, cols = np.nonzero(~np.isnan(heatmap_data))
+    values = heatmap_data[rows, cols]
+    labels = [f'{value:.1%}' for value in values]
+    text_colors = np.where(np.abs(values) > 0.05, 'white', 'black')
+    ax = plt.gca()
+    for x, y, label, text_color in zip(cols + 0.5, rows + 0.5, labels, text_colors):
+        ax.text(x, y, label, ha='center', va='center', color=text_color)
     
     # Save figure
     heatmap_path = os.path.join(output_dir, f"{strategy_name.replace(' ', '_').lower()}_monthly_heatmap.png")
@@ -140,10 +328,11 @@ def generate_markdown(strategy_name, df, metrics, chart_path, heatmap_path, outp
     """
     Generate markdown report for strategy
     """
-    # Create markdown content
+    md_file_path = os.path.join(output_dir, f"{strategy_name.replace(' ', '_').lower()}.md")
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
-    markdown = f"""# {strategy_name} Strategy Performance
+    with ReportWriter(md_file_path) as writer:
+        writer.write(f"""# {strategy_name} Strategy Performance
 
 *Generated on: {now}*
 
@@ -170,20 +359,15 @@ def generate_markdown(strategy_name, df, metrics, chart_path, heatmap_path, outp
 
 | Date | Return | Cumulative Return |
 |------|--------|------------------|
-"""
-    
-    # Add recent daily returns (last 10 days)
-    recent_data = df.sort_values('date', ascending=False).head(10)
-    for _, row in recent_data.iterrows():
-        date_str = row['date'].strftime('%Y-%m-%d')
-        daily_return = row['returns']
-        cumulative_return = row['cumulative_returns'] if 'cumulative_returns' in df.columns else 0
-        markdown += f"| {date_str} | {daily_return:.2%} | {cumulative_return:.2%} |\n"
-    
-    # Save markdown file
-    md_file_path = os.path.join(output_dir, f"{strategy_name.replace(' ', '_').lower()}.md")
-    with open(md_file_path, 'w') as f:
-        f.write(markdown)
+""")
+        
+        # Add recent daily returns (last 10 days)
+        recent_data = df.sort_values('date', ascending=False).head(10)
+        for _, row in recent_data.iterrows():
+            date_str = row['date'].strftime('%Y-%m-%d')
+            daily_return = row['returns']
+            cumulative_return = row['cumulative_returns'] if 'cumulative_returns' in df.columns else 0
+            writer.write(f"| {date_str} | {daily_return:.2%} | {cumulative_return:.2%} |\n")
     
     return md_file_path
 
@@ -192,8 +376,10 @@ def generate_strategy_index(strategies, output_dir):
     Generate index page for all strategies
     """
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    index_path = os.path.join(output_dir, "index.md")
     
-    markdown = f"""# Trading Strategy Performance Dashboard
+    with ReportWriter(index_path) as writer:
+        writer.write(f"""# Trading Strategy Performance Dashboard
 
 *Last updated: {now}*
 
@@ -201,35 +387,117 @@ def generate_strategy_index(strategies, output_dir):
 
 | Strategy | Total Return | Annual Return | Sharpe Ratio | Win Rate |
 |----------|--------------|--------------|--------------|----------|
-"""
-    
-    # Add each strategy to the table
-    for strategy in strategies:
-        markdown += f"| [{strategy['name']}](./{os.path.basename(strategy['md_path'])}) | {strategy['metrics']['total_return']:.2%} | {strategy['metrics']['annual_return']:.2%} | {strategy['metrics']['sharpe_ratio']:.2f} | {strategy['metrics']['win_rate']:.2%} |\n"
-    
-    # Save index file
-    index_path = os.path.join(output_dir, "index.md")
-    with open(index_path, 'w') as f:
-        f.write(markdown)
+""")
+        
+        # Add each strategy to the table
+        for strategy in strategies:
+            writer.write(f"| [{strategy['name']}](./{os.path.basename(strategy['md_path'])}) | {strategy['metrics']['total_return']:.2%} | {strategy['metrics']['annual_return']:.2%} | {strategy['metrics']['sharpe_ratio']:.2f} | {strategy['metrics']['win_rate']:.2%} |\n")
     
     return index_path
 
-def main():
-    # Configuration
-    data_dir = "data/strategies"  # Directory with strategy data files
-    output_dir = "content/strategies"  # Directory for output markdown files
-    img_dir = "static/img/strategies"  # Directory for charts
+def discover_strategy_files(data_dir):
+    """
+    Find every CSV/Excel backtest file under data_dir
+    """
+    files = []
+    for pattern in ("*.csv", "*.xlsx", "*.xls"):
+        files.extend(glob.glob(os.path.join(data_dir, "**", pattern), recursive=True))
     
-    # Ensure directories exist
-    os.makedirs(data_dir, exist_ok=True)
-    os.makedirs(output_dir, exist_ok=True)
-    os.makedirs(img_dir, exist_ok=True)
+    return sorted(files)
+
+def strategy_name_from_path(file_path, data_dir=None):
+    """
+    Derive a display name from a backtest file's path under data_dir (or its
+    file name), e.g. btc_momentum.csv -> Btc Momentum and
+    spot/btc_momentum.csv -> Spot Btc Momentum
+    """
+    relative_path = os.path.relpath(file_path, data_dir) if data_dir else os.path.basename(file_path)
+    base_name = os.path.splitext(relative_path)[0].replace(os.sep, " ")
+    return base_name.replace("_", " ").replace("-", " ").title()
+
+def strategy_names(file_paths, data_dir=None):
+    """
+    Map each file to its strategy name. Pages and charts are named after the
+    strategy, so two files whose names would write the same outputs raise a
+    ValueError instead of overwriting each other in the pool.
+    """
+    names = {}
+    outputs = {}
+    for file_path in file_paths:
+        name = strategy_name_from_path(file_path, data_dir)
+        output = name.replace(' ', '_').lower()
+        if output in outputs:
+            raise ValueError(f"{outputs[output]} and {file_path} would both be published as '{name}'")
+        outputs[output] = file_path
+        names[file_path] = name
+    return names
+
+def process_strategy(strategy_name, df, output_dir, img_dir):
+    """
+    Calculate metrics, render charts and write the markdown page for one strategy
+    """
+    # Calculate metrics
+    with span("metrics", stage="compute", strategy=strategy_name):
+        metrics = calculate_performance_metrics(df)
+    
+    # Generate charts
+    with span("charts", stage="render", strategy=strategy_name):
+        chart_path = generate_performance_chart(df, strategy_name, img_dir)
+        heatmap_path = generate_monthly_returns_heatmap(df, strategy_name, img_dir)
     
-    # List of strategies to process
+    # Generate markdown
+    with span("report", stage="render", strategy=strategy_name):
+        md_path = generate_markdown(strategy_name, df, metrics, chart_path, heatmap_path, output_dir)
+    
+    return {
+        'name': strategy_name,
+        'metrics': metrics,
+        'md_path': md_path
+    }
+
+def process_strategy_file(file_path, strategy_name, output_dir, img_dir):
+    """
+    Load a backtest file and process it; runs inside a worker process
+    """
+    df = load_strategy_data(file_path, columns=REPORT_COLUMNS)
+    return process_strategy(strategy_name, df, output_dir, img_dir)
+
+def _init_worker():
+    # Workers only ever render to files
+    plt.switch_backend("Agg")
+
+def process_strategy_files(file_paths, output_dir, img_dir, workers=None, data_dir=None):
+    """
+    Process strategy files in a process pool and gather the results. Files
+    are named by their path under data_dir (see strategy_names).
+    """
     strategies = []
+    names = strategy_names(file_paths, data_dir)
     
-    # Example strategy data (in real use, you would load from files)
-    # For demonstration, we'll create a sample dataframe
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        futures = {
+            executor.submit(process_strategy_file, file_path, names[file_path], output_dir, img_dir): file_path
+            for file_path in file_paths
+        }
+        
+        for future in as_completed(futures):
+            file_path = futures[future]
+            try:
+                strategy = future.result()
+            except Exception as e:
+                print(f"Error processing {file_path}: {e}")
+                continue
+            
+            strategies.append(strategy)
+            print(f"Generated report for {strategy['name']}")
+    
+    # Keep the index order stable regardless of completion order
+    return sorted(strategies, key=lambda s: s['name'])
+
+def get_sample_strategies():
+    """
+    Return sample strategy dataframes for demonstration
+    """
     dates = pd.date_range(start='2022-01-01', end='2023-01-01')
     np.random.seed(42)  # For reproducibility
     
@@ -249,40 +517,50 @@ def main():
         'cumulative_returns': (1 + pd.Series(mean_rev_returns)).cumprod() - 1
     })
     
-    # Process each strategy
-    for strategy_name, df in [("Momentum Strategy", momentum_df), 
-                             ("Mean Reversion Strategy", mean_rev_df)]:
-        print(f"Processing {strategy_name}...")
-        
-        # Calculate metrics
-        metrics = calculate_performance_metrics(df)
-        
-        # Generate charts
-        chart_path = generate_performance_chart(df, strategy_name, img_dir)
-        heatmap_path = generate_monthly_returns_heatmap(df, strategy_name, img_dir)
-        
-        # Generate markdown
-        md_path = generate_markdown(strategy_name, df, metrics, chart_path, heatmap_path, output_dir)
-        
-        # Add to strategies list
-        strategies.append({
-            'name': strategy_name,
-            'metrics': metrics,
-            'md_path': md_path
-        })
-        
-        print(f"Generated report for {strategy_name}")
+    return [("Momentum Strategy", momentum_df), ("Mean Reversion Strategy", mean_rev_df)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate strategy performance pages")
+    parser.add_argument("--from-files", action="store_true",
+                        help="process every CSV/Excel backtest under the data directory instead of the sample strategies")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes for --from-files (default: CPU count)")
+    args = parser.parse_args(argv)
+    
+    # Configuration
+    data_dir = "data/strategies"  # Directory with strategy data files
+    output_dir = "content/strategies"  # Directory for output markdown files
+    img_dir = "static/img/strategies"  # Directory for charts
+    
+    # Ensure directories exist
+    os.makedirs(data_dir, exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
+    os.makedirs(img_dir, exist_ok=True)
+    
+    if args.from_files:
+        file_paths = discover_strategy_files(data_dir)
+        print(f"Processing {len(file_paths)} strategy files from {data_dir}...")
+        # Workers run in their own processes, so only the total is recorded here
+        with span("strategy_files", stage="compute", files=len(file_paths)):
+            strategies = process_strategy_files(file_paths, output_dir, img_dir, args.workers, data_dir)
+    else:
+        strategies = []
+        for strategy_name, df in get_sample_strategies():
+            print(f"Processing {strategy_name}...")
+            strategies.append(process_strategy(strategy_name, df, output_dir, img_dir))
+            print(f"Generated report for {strategy_name}")
     
     # Generate index page
-    index_path = generate_strategy_index(strategies, output_dir)
+    with span("index", stage="render"):
+        index_path = generate_strategy_index(strategies, output_dir)
     print(f"Generated strategy index at {index_path}")
     
     # Save strategy data as JSON for future reference
-    with open(os.path.join(data_dir, "strategy_metrics.json"), 'w') as f:
-        json.dump([{
+    with span("write"):
+        write_json(os.path.join(data_dir, "strategy_metrics.json"), [{
             'name': s['name'],
             'metrics': s['metrics']
-        } for s in strategies], f, indent=2, default=str)
+        } for s in strategies], default=str)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    launch("generate_strategy_md", main)
@@ -0,0 +1,479 @@
+import base64
+import contextvars
+import hashlib
+import io
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from instrumentation import count
+from report_writer import write_json
+
+# (connect, read) in seconds; the read timeout applies to each wait for data
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+DEFAULT_POOL_SIZE = 16
+
+# Retries with full-jitter exponential backoff on these statuses and on
+# connection errors and timeouts. A Retry-After longer than BACKOFF_MAX, or
+# a wait that would run past RETRY_BUDGET seconds since the first attempt,
+# ends the retries early, which bounds the time one call can take.
+MAX_RETRIES = 3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Methods retried by default; others (POST) only when the caller passes retries
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 20
+RETRY_BUDGET = 60
+
+# After BREAKER_THRESHOLD calls in a row to a host fail (retries included),
+# calls to it fail fast for BREAKER_RESET seconds; then one call is let
+# through to probe whether the host is back.
+BREAKER_THRESHOLD = 5
+BREAKER_RESET = 60
+
+# Successful GET responses are kept as the last good copy of each request
+# and served, marked stale, when the host fails or its circuit is open.
+# Per-wallet endpoints pass last_good=False to stay out of the cache.
+LAST_GOOD_ENV = "BITALK_HTTP_CACHE"
+DEFAULT_LAST_GOOD_DIR = os.path.join(".cache", "http")
+STALE_HEADER = "X-Bitalk-Stale-Age"
+
+# BITALK_HTTP_MODE selects how requests are served:
+#   live   - send them to the real services (default)
+#   record - send them and save every response as a fixture
+#   replay - answer from fixtures only, never touching the network
+# BITALK_HTTP_BASE_URL sends every request to a stand-in server instead of
+# the real host, e.g. http://127.0.0.1:8800 for mock_api_server.py.
+MODE_ENV = "BITALK_HTTP_MODE"
+FIXTURES_ENV = "BITALK_HTTP_FIXTURES"
+BASE_URL_ENV = "BITALK_HTTP_BASE_URL"
+DEFAULT_FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "http")
+
+# Query parameters that carry credentials; they never reach fixture keys or files
+SECRET_PARAMS = {"apikey", "api_key", "key", "token", "access_token"}
+
+# Response headers worth keeping in a fixture
+FIXTURE_HEADERS = ("Content-Type", "Retry-After", "Link")
+
+_session = None
+_session_lock = threading.Lock()
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+# Cleared by fresh_only(); threads started inside it need a copy of the context
+_serve_stale = contextvars.ContextVar("serve_stale", default=True)
+
+class FixtureNotFound(requests.exceptions.ConnectionError):
+    """
+    Raised in replay mode for a request that has no recorded fixture. It is a
+    ConnectionError so fetchers take the same fallback path as when offline.
+    """
+
+class CircuitOpen(requests.exceptions.ConnectionError):
+    """
+    Raised without sending anything while a host's circuit is open
+    """
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one host.
+
+    closed: calls go through; open: calls fail fast until reset_timeout has
+    passed; half-open: a single probe call goes through, and its outcome
+    closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, reset_timeout=BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+def get_breaker(host):
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker()
+        return _breakers[host]
+
+def get_session(pool_size=DEFAULT_POOL_SIZE):
+    """
+    Shared requests session with a connection pool large enough for the
+    thread pools the fetchers use, so parallel requests to the same host
+    reuse keep-alive connections instead of opening one per request
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+def http_mode():
+    return os.environ.get(MODE_ENV, "live").lower()
+
+def fixture_dir():
+    return os.environ.get(FIXTURES_ENV, DEFAULT_FIXTURE_DIR)
+
+def canonical_request(method, url, params=None, body=None):
+    """
+    Stable description of a request: method, host, path and sorted query
+    without credentials, plus a hash of the body. JSON bodies are hashed
+    with sorted keys, so the key does not depend on how the sender ordered
+    them. Used as the fixture key by both this module and the stand-in
+    server.
+    """
+    parts = urlsplit(requests.Request(method, url, params=params).prepare().url)
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in SECRET_PARAMS
+    )
+    canonical = f"{method.upper()} {parts.netloc.lower()}{parts.path}"
+    if query:
+        canonical += "?" + urlencode(query)
+    if body:
+        canonical += " " + hashlib.sha1(canonical_body(body)).hexdigest()
+    return parts.netloc.lower(), canonical
+
+def canonical_body(body):
+    """
+    A JSON body re-serialized with sorted keys; other bodies as they are
+    """
+    try:
+        return json.dumps(json.loads(body), sort_keys=True).encode("utf-8")
+    except (UnicodeDecodeError, ValueError):
+        return body
+
+def last_good_dir():
+    return os.environ.get(LAST_GOOD_ENV, DEFAULT_LAST_GOOD_DIR)
+
+def fixture_path(host, canonical, directory=None):
+    digest = hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:20]
+    return os.path.join(directory or fixture_dir(), host.replace(":", "_"), f"{digest}.json")
+
+def _request_body(kwargs):
+    if kwargs.get("json") is not None:
+        return json.dumps(kwargs["json"]).encode("utf-8")
+    data = kwargs.get("data")
+    if isinstance(data, str):
+        return data.encode("utf-8")
+    return data if isinstance(data, bytes) else None
+
+def load_fixture(path):
+    """
+    Read a fixture file, returning None if there is none
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_fixture(path, canonical, response, body):
+    """
+    Store a response as a fixture; bodies that are not UTF-8 are base64
+    encoded. Returns False if the file already held the same response.
+    """
+    try:
+        text, encoding = body.decode("utf-8"), "text"
+    except UnicodeDecodeError:
+        text, encoding = base64.b64encode(body).decode("ascii"), "base64"
+
+    return write_json(path, {
+        "request": canonical,
+        "status": response.status_code,
+        "headers": {h: response.headers[h] for h in FIXTURE_HEADERS if h in response.headers},
+        "encoding": encoding,
+        "body": text
+    })
+
+def fixture_body(fixture):
+    if fixture.get("encoding") == "base64":
+        return base64.b64decode(fixture["body"])
+    return fixture["body"].encode("utf-8")
+
+def response_from_fixture(fixture, url):
+    """
+    Build a requests.Response from a fixture. The body is available both as
+    content (json, text, iter_lines) and as a file-like raw stream (ijson).
+    """
+    body = fixture_body(fixture)
+    response = requests.Response()
+    response.status_code = fixture["status"]
+    response.headers = CaseInsensitiveDict(fixture.get("headers", {}))
+    response.encoding = get_encoding_from_headers(response.headers) or "utf-8"
+    response.url = url
+    response._content = body
+    response._content_consumed = True
+    response.raw = io.BytesIO(body)
+    return response
+
+def _redirect(url):
+    """
+    Point a URL at the stand-in server if BITALK_HTTP_BASE_URL is set
+    """
+    base_url = os.environ.get(BASE_URL_ENV)
+    if not base_url:
+        return url
+    parts = urlsplit(url)
+    rewritten = f"{base_url.rstrip('/')}/{parts.netloc}{parts.path}"
+    return f"{rewritten}?{parts.query}" if parts.query else rewritten
+
+def response_size(response):
+    """
+    Body size of a response: the length of the content if it has been read,
+    otherwise Content-Length (streamed bodies without it count as 0)
+    """
+    if response._content_consumed and isinstance(response._content, bytes):
+        return len(response._content)
+    try:
+        return int(response.headers.get("Content-Length", 0))
+    except ValueError:
+        return 0
+
+def _count_response(host, mode, response, elapsed):
+    count("http_requests_total", host=host, mode=mode, status=response.status_code)
+    count("http_request_seconds_total", elapsed, host=host)
+    count("http_response_bytes_total", response_size(response), host=host)
+    if response.status_code == 429:
+        count("http_rate_limited_total", host=host)
+
+def retry_after(response):
+    """
+    Seconds to wait according to a Retry-After header (delay or HTTP date), or None
+    """
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt, server_delay=None):
+    """
+    Wait before retry number attempt + 1: the server's Retry-After if it
+    gave one, otherwise a random delay up to BACKOFF_BASE * 2^attempt
+    ("full jitter", so parallel callers do not retry in lockstep)
+    """
+    if server_delay is not None:
+        return server_delay
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+def store_last_good(method, url, kwargs, response):
+    """
+    Keep a successful response as the last good copy of its request
+    """
+    host, canonical = canonical_request(method, url, kwargs.get("params"), _request_body(kwargs))
+    path = fixture_path(host, canonical, last_good_dir())
+    try:
+        if not save_fixture(path, canonical, response, response.content):
+            # Same payload as before: only its age changes
+            os.utime(path)
+    except OSError as e:
+        print(f"Could not cache response for {canonical}: {e}")
+
+def load_last_good(method, url, kwargs):
+    """
+    The last good response of a request, with its age in seconds in the
+    STALE_HEADER header, or None
+    """
+    host, canonical = canonical_request(method, url, kwargs.get("params"), _request_body(kwargs))
+    path = fixture_path(host, canonical, last_good_dir())
+    try:
+        fixture = load_fixture(path)
+        age = time.time() - os.path.getmtime(path) if fixture else None
+    except (OSError, ValueError):
+        return None
+    if fixture is None:
+        return None
+
+    response = response_from_fixture(fixture, url)
+    response.headers[STALE_HEADER] = f"{age:.0f}"
+    print(f"Serving last good response for {canonical} ({age / 3600:.1f} hours old)")
+    count("http_stale_served_total", host=host)
+    return response
+
+@contextmanager
+def fresh_only():
+    """
+    Within this block failed requests are not answered from the last-good
+    cache; successful ones still refresh it
+    """
+    token = _serve_stale.set(False)
+    try:
+        yield
+    finally:
+        _serve_stale.reset(token)
+
+def stale_age(response):
+    """
+    Age in seconds of a response served from the last good cache, or None
+    for a fresh response
+    """
+    value = response.headers.get(STALE_HEADER)
+    return float(value) if value is not None else None
+
+def request(method, url, timeout=DEFAULT_TIMEOUT, retries=None, last_good=None, **kwargs):
+    """
+    Send a request through the shared session, or serve it from fixtures
+    depending on BITALK_HTTP_MODE.
+
+    Connection errors, timeouts and RETRY_STATUSES are retried with
+    backoff (by default only for IDEMPOTENT_METHODS; pass retries to retry
+    others), and every host has a circuit breaker. last_good (default: on
+    for GET requests that are not streamed) keeps successful responses and
+    serves the last one, with a STALE_HEADER, when the request fails for
+    good (except inside fresh_only()). Otherwise the final error response is returned or the final
+    exception raised, as without retries. Every attempt is counted per host
+    in the current instrumentation run. Replay mode leaves the circuit
+    breakers alone: a missing fixture says nothing about the host.
+    """
+    mode = http_mode()
+    host = urlsplit(url).netloc.lower()
+    if retries is None:
+        # Fixtures answer the same way every time
+        retries = MAX_RETRIES if mode != "replay" and method.upper() in IDEMPOTENT_METHODS else 0
+    if last_good is None:
+        last_good = method.upper() == "GET" and not kwargs.get("stream") and mode != "replay"
+    serve_stale = last_good and _serve_stale.get()
+
+    breaker = get_breaker(host) if mode != "replay" else None
+    if breaker is not None and not breaker.allow():
+        count("http_circuit_open_total", host=host)
+        stale = load_last_good(method, url, kwargs) if serve_stale else None
+        if stale is not None:
+            return stale
+        raise CircuitOpen(f"Circuit open for {host} after repeated failures")
+
+    started = time.monotonic()
+    response = error = None
+    # Every exit records an outcome on the breaker, so a half-open probe is
+    # never left in flight; errors that are raised at once count as failures
+    recorded = breaker is None
+    try:
+        for attempt in range(retries + 1):
+            start = time.perf_counter()
+            try:
+                response, error = _send(mode, method, url, timeout, kwargs), None
+            except FixtureNotFound:
+                raise
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                count("http_errors_total", host=host, mode=mode, error=type(e).__name__)
+                response, error = None, e
+            except requests.exceptions.RequestException as e:
+                count("http_errors_total", host=host, mode=mode, error=type(e).__name__)
+                raise
+            else:
+                _count_response(host, mode, response, time.perf_counter() - start)
+                if response.status_code not in RETRY_STATUSES:
+                    if breaker is not None:
+                        breaker.record_success()
+                    recorded = True
+                    if last_good and response.status_code == 200:
+                        store_last_good(method, url, kwargs, response)
+                    return response
+
+            if attempt == retries:
+                break
+            delay = backoff_delay(attempt, retry_after(response))
+            if delay > BACKOFF_MAX or time.monotonic() - started + delay > RETRY_BUDGET:
+                break
+
+            reason = type(error).__name__ if error else str(response.status_code)
+            count("http_retries_total", host=host, reason=reason)
+            if response is not None:
+                response.close()
+            time.sleep(delay)
+
+        if breaker is not None:
+            breaker.record_failure()
+        recorded = True
+        stale = load_last_good(method, url, kwargs) if serve_stale else None
+        if stale is not None:
+            return stale
+        if error is not None:
+            raise error
+        return response
+    finally:
+        if not recorded:
+            breaker.record_failure()
+
+def _send(mode, method, url, timeout, kwargs):
+    if mode == "live":
+        return get_session().request(method, _redirect(url), timeout=timeout, **kwargs)
+
+    host, canonical = canonical_request(method, url, kwargs.get("params"), _request_body(kwargs))
+    path = fixture_path(host, canonical)
+
+    if mode == "replay":
+        fixture = load_fixture(path)
+        if fixture is None:
+            raise FixtureNotFound(f"No fixture for {canonical}")
+        return response_from_fixture(fixture, url)
+
+    if mode != "record":
+        raise ValueError(f"Unknown {MODE_ENV}: {mode}")
+
+    # Read the whole body so it can be saved, then hand back a replayable copy
+    response = get_session().request(method, _redirect(url), timeout=timeout, **kwargs)
+    with response:
+        body = response.content
+    save_fixture(path, canonical, response, body)
+    return response_from_fixture(load_fixture(path), response.url)
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
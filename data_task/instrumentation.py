@@ -0,0 +1,201 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+# BITALK_METRICS=0 turns all output off; spans and counters become no-ops
+# that still time the work, so the jobs need no special casing.
+# BITALK_LOG_DIR sets where the JSON-lines run logs go (default logs/runs).
+# BITALK_METRICS_TEXTFILE_DIR, if set, also gets a Prometheus textfile per
+# job for node_exporter's textfile collector.
+ENABLED_ENV = "BITALK_METRICS"
+LOG_DIR_ENV = "BITALK_LOG_DIR"
+TEXTFILE_DIR_ENV = "BITALK_METRICS_TEXTFILE_DIR"
+DEFAULT_LOG_DIR = "logs/runs"
+
+# Stage names used for spans, so runs can be compared stage by stage
+STAGES = ("fetch", "parse", "compute", "render", "write")
+
+def enabled():
+    return os.environ.get(ENABLED_ENV, "1").lower() not in ("0", "false", "off", "no")
+
+def log_dir():
+    return os.environ.get(LOG_DIR_ENV, DEFAULT_LOG_DIR)
+
+def _now():
+    return datetime.now().isoformat(timespec="milliseconds")
+
+class Run:
+    """
+    Metrics of one job run: the spans that finished and the counters, both
+    appended to a JSON-lines log as the run goes.
+
+    Each line is one event. Span events carry the stage, duration and any
+    attributes; the closing "run" event carries the totals per stage and
+    every counter, so a single line answers which stage and which host
+    dominated the run. Counters are per process: work done in a
+    ProcessPoolExecutor worker is not counted.
+    """
+
+    def __init__(self, job, path=None):
+        self.job = job
+        self.run_id = uuid.uuid4().hex[:12]
+        self.path = path or os.path.join(log_dir(), f"{job}.jsonl")
+        self.started = time.perf_counter()
+        self.started_at = _now()
+        self.counters = defaultdict(float)
+        self.stage_totals = defaultdict(float)
+        self._lock = threading.Lock()
+        self._file = None
+        if enabled():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+
+    def emit(self, event, **fields):
+        if self._file is None:
+            return
+        line = json.dumps({"ts": _now(), "job": self.job, "run": self.run_id, "event": event, **fields}, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def add(self, name, value=1, **labels):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self.counters[key] += value
+
+    def record_span(self, name, stage, duration, parent, status, attrs, nested=False):
+        # Stage totals only count the outermost staged span, so nesting a
+        # render span inside a fetch span does not count that time twice
+        if stage and not nested:
+            with self._lock:
+                self.stage_totals[stage] += duration
+        self.emit(
+            "span", name=name, stage=stage, parent=parent, status=status,
+            duration_ms=round(duration * 1000, 3), attrs=attrs
+        )
+
+    def counter_rows(self):
+        with self._lock:
+            items = sorted(self.counters.items())
+        return [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in items]
+
+    def close(self, status="ok"):
+        duration = time.perf_counter() - self.started
+        self.emit(
+            "run", status=status, started_at=self.started_at,
+            duration_ms=round(duration * 1000, 3),
+            stages={stage: round(total * 1000, 3) for stage, total in self.stage_totals.items()},
+            counters=self.counter_rows()
+        )
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if enabled() and os.environ.get(TEXTFILE_DIR_ENV):
+            write_textfile(self, duration, status, os.environ[TEXTFILE_DIR_ENV])
+
+_current = None
+_local = threading.local()
+
+def current_run():
+    return _current
+
+@contextmanager
+def run(job, path=None):
+    """
+    Record a job run; wrap a script's main() body in it
+    """
+    global _current
+    previous = _current
+    _current = Run(job, path)
+    status = "ok"
+    try:
+        yield _current
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        _current.close(status)
+        _current = previous
+
+@contextmanager
+def span(name, stage=None, **attrs):
+    """
+    Time a block of work. stage is one of STAGES (fetch, parse, compute,
+    render, write) and defaults to the name if that is a stage. Extra
+    keyword arguments are logged as attributes; the block can add more
+    through the dict it gets. Spans nest per thread.
+    """
+    if stage is None and name in STAGES:
+        stage = name
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    parent = stack[-1][0] if stack else None
+    nested = any(entry[1] for entry in stack)
+    stack.append((name, stage))
+    status = "ok"
+    start = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        stack.pop()
+        if _current is not None:
+            _current.record_span(name, stage, duration, parent, status, attrs, nested)
+
+def count(name, value=1, **labels):
+    """
+    Add to a counter of the current run, e.g. count("http_requests_total", host=...)
+    """
+    if _current is not None:
+        _current.add(name, value, **labels)
+
+def _prometheus_labels(labels):
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+def write_textfile(run_, duration, status, directory):
+    """
+    Write the run's metrics in the Prometheus text format, replacing the
+    previous file of the same job atomically
+    """
+    job = {"job": run_.job}
+    lines = [
+        "# TYPE bitalk_job_duration_seconds gauge",
+        f"bitalk_job_duration_seconds{_prometheus_labels(job)} {duration:.6f}",
+        "# TYPE bitalk_job_success gauge",
+        f"bitalk_job_success{_prometheus_labels(job)} {1 if status == 'ok' else 0}",
+        "# TYPE bitalk_job_last_run_timestamp_seconds gauge",
+        f"bitalk_job_last_run_timestamp_seconds{_prometheus_labels(job)} {time.time():.0f}",
+        "# TYPE bitalk_stage_duration_seconds gauge",
+    ]
+    for stage, total in sorted(run_.stage_totals.items()):
+        lines.append(f"bitalk_stage_duration_seconds{_prometheus_labels({**job, 'stage': stage})} {total:.6f}")
+
+    typed = set()
+    for row in run_.counter_rows():
+        metric = f"bitalk_{row['name']}"
+        if metric not in typed:
+            lines.append(f"# TYPE {metric} counter")
+            typed.add(metric)
+        lines.append(f"{metric}{_prometheus_labels({**job, **row['labels']})} {row['value']:.15g}")
+
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{run_.job}.", suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, os.path.join(directory, f"bitalk_{run_.job}.prom"))
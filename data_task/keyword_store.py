@@ -0,0 +1,150 @@
+import json
+import os
+from datetime import date, timedelta
+
+from report_writer import write_json
+
+class KeywordStore:
+    """
+    Rolling keyword frequencies over fixed day windows (1/7/30 by default).
+
+    Only the per-day counts inside the largest window are kept, alongside a
+    running total per window. Ingesting a day adds its counts and subtracts the
+    days that slide out of each window, so the cost per day depends on that
+    day's vocabulary, not on the size of the archive.
+    """
+
+    def __init__(self, path, windows=(1, 7, 30)):
+        self.path = path
+        self.windows = tuple(sorted(windows))
+        self.days = {}
+        self.totals = {w: {} for w in self.windows}
+        self.latest_day = None
+        self.load()
+
+    def load(self):
+        """
+        Load the store from disk if it exists and matches the configured windows
+        """
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading keyword store {self.path}: {e}")
+            return
+
+        if tuple(state.get("windows", [])) != self.windows:
+            print(f"Keyword store {self.path} uses different windows, starting fresh")
+            return
+
+        self.days = {date.fromisoformat(d): counts for d, counts in state.get("days", {}).items()}
+        self.totals = {int(w): counts for w, counts in state.get("totals", {}).items()}
+        latest_day = state.get("latest_day")
+        self.latest_day = date.fromisoformat(latest_day) if latest_day else None
+
+    def save(self):
+        """
+        Persist the store as JSON
+        """
+        write_json(self.path, {
+            "windows": list(self.windows),
+            "latest_day": self.latest_day.isoformat() if self.latest_day else None,
+            "days": {d.isoformat(): counts for d, counts in sorted(self.days.items())},
+            "totals": {str(w): counts for w, counts in self.totals.items()}
+        })
+
+    def ingest(self, day, counts):
+        """
+        Record one day's term counts, replacing any earlier counts for that day
+        """
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+
+        if self.latest_day is None:
+            self.latest_day = day
+        elif day > self.latest_day:
+            self._advance(day)
+
+        # Apply only the difference, so re-running a day does not double count
+        previous = self.days.get(day, {})
+        delta = dict(counts)
+        for term, count in previous.items():
+            delta[term] = delta.get(term, 0) - count
+
+        for window in self.windows:
+            if self._in_window(day, window):
+                self._add(self.totals[window], delta)
+
+        if day > self.latest_day - timedelta(days=self.windows[-1]):
+            self.days[day] = {term: count for term, count in counts.items() if count > 0}
+
+    def _in_window(self, day, window):
+        return self.latest_day - timedelta(days=window) < day <= self.latest_day
+
+    def _advance(self, new_day):
+        """
+        Slide every window forward to end at new_day
+        """
+        for window in self.windows:
+            old_start = self.latest_day - timedelta(days=window)
+            new_start = new_day - timedelta(days=window)
+            for day, counts in self.days.items():
+                if old_start < day <= new_start:
+                    self._add(self.totals[window], {t: -c for t, c in counts.items()})
+
+        self.latest_day = new_day
+        oldest = new_day - timedelta(days=self.windows[-1])
+        self.days = {d: c for d, c in self.days.items() if d > oldest}
+
+    @staticmethod
+    def _add(totals, delta):
+        for term, count in delta.items():
+            value = totals.get(term, 0) + count
+            if value > 0:
+                totals[term] = value
+            else:
+                totals.pop(term, None)
+
+    def days_in_window(self, window):
+        """
+        Number of days with data in a window
+        """
+        if self.latest_day is None:
+            return 0
+        return sum(1 for d in self.days if self._in_window(d, window))
+
+    def top_terms(self, window, top_n=20):
+        """
+        Most frequent terms in a window
+        """
+        ranked = sorted(self.totals.get(window, {}).items(), key=lambda x: x[1], reverse=True)
+        return [{"keyword": term, "count": count} for term, count in ranked[:top_n]]
+
+    def trending(self, window=1, baseline=30, top_n=20, min_count=2, smoothing=1.0):
+        """
+        Score terms by their daily rate in the recent window against their
+        daily rate over the rest of the baseline window
+        """
+        recent = self.totals.get(window, {})
+        base = self.totals.get(baseline, {})
+        recent_days = max(self.days_in_window(window), 1)
+        baseline_days = max(self.days_in_window(baseline) - self.days_in_window(window), 1)
+
+        scored = []
+        for term, count in recent.items():
+            if count < min_count:
+                continue
+            recent_rate = count / recent_days
+            baseline_rate = (base.get(term, 0) - count) / baseline_days
+            scored.append({
+                "keyword": term,
+                "count": count,
+                "baseline_daily_avg": round(baseline_rate, 3),
+                "score": round((recent_rate + smoothing) / (baseline_rate + smoothing), 3)
+            })
+
+        scored.sort(key=lambda x: (x["score"], x["count"]), reverse=True)
+        return scored[:top_n]
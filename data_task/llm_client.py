@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+import http_client
+from instrumentation import count
+from report_writer import write_json
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+DEFAULT_MODEL = "gpt-4o-mini"
+
+# Cached completions live outside Hugo's data directory and expire after
+# BITALK_LLM_CACHE_TTL seconds (default a week); BITALK_LLM_CACHE moves them
+CACHE_DIR_ENV = "BITALK_LLM_CACHE"
+CACHE_TTL_ENV = "BITALK_LLM_CACHE_TTL"
+DEFAULT_CACHE_DIR = os.path.join(".cache", "llm")
+DEFAULT_CACHE_TTL = 7 * 24 * 3600
+
+class LLMClient:
+    """
+    Async client for an OpenAI-compatible chat completions endpoint.
+
+    Requests run concurrently up to max_concurrency and are spaced so that no
+    more than requests_per_minute start in any minute. Responses are cached on
+    disk by a hash of the prompt and parameters, so rerunning a job on the same
+    inputs makes no API calls. Entries older than cache_ttl seconds are
+    ignored and pruned; cache_dir="" turns the cache off. Point base_url (or OPENAI_BASE_URL) at a local
+    mock server to run without the real API.
+    """
+
+    def __init__(self, api_key, base_url=None, model=None, cache_dir=None, cache_ttl=None,
+                 max_concurrency=4, requests_per_minute=60, timeout=60):
+        self.api_key = api_key
+        self.base_url = (base_url or os.environ.get("OPENAI_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self.model = model or os.environ.get("OPENAI_MODEL") or DEFAULT_MODEL
+        self.cache_dir = os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR) if cache_dir is None else cache_dir
+        self.cache_ttl = float(os.environ.get(CACHE_TTL_ENV, DEFAULT_CACHE_TTL)) if cache_ttl is None else cache_ttl
+        self.max_concurrency = max_concurrency
+        self.min_interval = 60.0 / requests_per_minute if requests_per_minute else 0
+        self.timeout = timeout
+        self._semaphore = None
+        self._rate_lock = None
+        self._next_start = 0.0
+        self.prune_cache()
+
+    def cache_key(self, prompt, max_tokens, temperature):
+        """
+        Hash of everything that determines a completion
+        """
+        payload = json.dumps([self.base_url, self.model, prompt, max_tokens, temperature])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _cache_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json") if self.cache_dir else None
+
+    def _expired(self, path):
+        return time.time() - os.path.getmtime(path) > self.cache_ttl
+
+    def prune_cache(self):
+        """
+        Delete expired cache entries
+        """
+        if not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return
+        for entry in os.scandir(self.cache_dir):
+            try:
+                if entry.name.endswith(".json") and self._expired(entry.path):
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    def get_cached(self, prompt, max_tokens=500, temperature=0.7):
+        """
+        Return a cached completion that has not expired, or None
+        """
+        path = self._cache_path(self.cache_key(prompt, max_tokens, temperature))
+        if path and os.path.exists(path):
+            try:
+                if self._expired(path):
+                    return None
+                with open(path, "r") as f:
+                    return json.load(f)["text"]
+            except (OSError, ValueError, KeyError):
+                return None
+        return None
+
+    def _store(self, prompt, max_tokens, temperature, text):
+        path = self._cache_path(self.cache_key(prompt, max_tokens, temperature))
+        if path:
+            if not write_json(path, {"model": self.model, "prompt": prompt, "text": text}):
+                # Same completion as before: only its age changes
+                os.utime(path)
+
+    def _post(self, prompt, max_tokens, temperature, on_token=None):
+        """
+        Blocking chat completion request; run in a worker thread. With
+        on_token the response is streamed and each content delta is passed
+        to on_token as it arrives.
+        """
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        if on_token is not None:
+            payload["stream"] = True
+
+        with http_client.post(
+            f"{self.base_url}/chat/completions",
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            json=payload,
+            timeout=self.timeout,
+            stream=on_token is not None
+        ) as response:
+            if response.status_code != 200:
+                raise RuntimeError(f"LLM request failed: HTTP {response.status_code} {response.text[:200]}")
+
+            if on_token is None:
+                return response.json()["choices"][0]["message"]["content"].strip()
+
+            return self._read_stream(response, on_token).strip()
+
+    @staticmethod
+    def _read_stream(response, on_token):
+        """
+        Collect the content deltas of a server-sent events response
+        """
+        parts = []
+        for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            choices = json.loads(data).get("choices") or [{}]
+            delta = (choices[0].get("delta") or {}).get("content")
+            if delta:
+                parts.append(delta)
+                on_token(delta)
+        return "".join(parts)
+
+    async def _wait_for_rate_budget(self):
+        async with self._rate_lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.min_interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def complete(self, prompt, max_tokens=500, temperature=0.7, on_token=None):
+        """
+        Return the completion for a prompt, from cache if possible.
+
+        If on_token is given and the prompt is not cached, the completion is
+        streamed and on_token(delta) is called on the event loop for every
+        chunk of text as it arrives.
+        """
+        cached = self.get_cached(prompt, max_tokens, temperature)
+        if cached is not None:
+            count("cache_hits_total", cache="llm")
+            return cached
+        count("cache_misses_total", cache="llm")
+
+        # Created lazily so they bind to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._rate_lock = asyncio.Lock()
+
+        emit = None
+        if on_token is not None:
+            # Deltas arrive on the worker thread; hand them back to the loop
+            loop = asyncio.get_running_loop()
+            emit = lambda delta: loop.call_soon_threadsafe(on_token, delta)
+
+        async with self._semaphore:
+            await self._wait_for_rate_budget()
+            text = await asyncio.to_thread(self._post, prompt, max_tokens, temperature, emit)
+
+        self._store(prompt, max_tokens, temperature, text)
+        return text
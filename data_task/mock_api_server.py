@@ -0,0 +1,455 @@
+"""
+Local stand-in for every API the data jobs call.
+
+Requests arrive as /{host}/{path}?{query} (http_client rewrites them when
+BITALK_HTTP_BASE_URL points here). Each one is answered from a recorded
+fixture if there is one (see http_client's record mode), otherwise from a
+synthetic response of realistic size for that host. Latency, server errors
+and 429 rate limiting can be injected, and everything is seeded, so runs
+are repeatable without network access.
+
+    python data_task/mock_api_server.py --port 8800 --latency-ms 150 --error-rate 0.02 --rate-limit 10
+    BITALK_HTTP_BASE_URL=http://127.0.0.1:8800 python data_task/update_tool_rankings.py
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import http_client
+
+WORDS = (
+    "bitcoin ethereum solana layer2 rollup defi staking airdrop wallet bridge "
+    "liquidity protocol token governance validator upgrade exchange market "
+    "stablecoin yield nft oracle security audit mainnet testnet launch"
+).split()
+
+CHAINS = ["Ethereum", "BSC", "Polygon", "Arbitrum", "Optimism", "Base", "Solana", "Avalanche"]
+CATEGORIES = ["Dexes", "Lending", "Liquid Staking", "Bridge", "CDP", "Yield", "Derivatives", "RWA"]
+
+def words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+def iso(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def param(query, name, default):
+    return query.get(name, [default])[0]
+
+# Synthetic responses: (host pattern, path pattern, handler(rng, match, query, body))
+# Each handler returns (status, content_type, body bytes).
+
+def json_response(data, status=200):
+    return status, "application/json", json.dumps(data).encode("utf-8")
+
+def html_response(html, status=200):
+    return status, "text/html; charset=utf-8", html.encode("utf-8")
+
+def news_everything(rng, match, query, body):
+    page = int(param(query, "page", 1))
+    page_size = min(int(param(query, "pageSize", 20)), 100)
+    total = 1000
+    start = (page - 1) * page_size
+    now = datetime(2024, 1, 1, 12)
+    articles = [
+        {
+            "source": {"id": None, "name": rng.choice(["CoinDesk", "The Block", "Decrypt", "Cointelegraph"])},
+            "author": words(rng, 2).title(),
+            "title": words(rng, 10).capitalize(),
+            "description": words(rng, 30).capitalize() + ".",
+            "url": f"https://news.example.com/{start + i}",
+            "urlToImage": f"https://news.example.com/{start + i}.jpg",
+            "publishedAt": iso(now - timedelta(minutes=7 * (start + i))),
+            "content": words(rng, 80)
+        }
+        for i in range(max(0, min(page_size, total - start)))
+    ]
+    return json_response({"status": "ok", "totalResults": total, "articles": articles})
+
+def github_releases(rng, match, query, body):
+    now = datetime(2024, 1, 1)
+    releases = [
+        {
+            "tag_name": f"v{3 - i // 20}.{(30 - i) % 20}.0",
+            "name": f"Release {3 - i // 20}.{(30 - i) % 20}.0",
+            "published_at": iso(now - timedelta(days=9 * i)),
+            "html_url": f"https://github.com/{match['owner']}/{match['repo']}/releases/{i}",
+            "prerelease": i % 7 == 0,
+            "body": "\n".join(f"- {words(rng, 12)}" for _ in range(rng.randint(5, 40)))
+        }
+        for i in range(30)
+    ]
+    return json_response(releases)
+
+def github_repo(rng, match, query, body):
+    return json_response({
+        "full_name": f"{match['owner']}/{match['repo']}",
+        "description": words(rng, 12),
+        "stargazers_count": rng.randint(100, 50000),
+        "forks_count": rng.randint(10, 10000),
+        "open_issues_count": rng.randint(0, 2000),
+        "updated_at": iso(datetime(2024, 1, 1)),
+        "html_url": f"https://github.com/{match['owner']}/{match['repo']}"
+    })
+
+def npm_package(rng, match, query, body):
+    versions = [f"{major}.{minor}.{patch}" for major in range(1, 7) for minor in range(10) for patch in range(5)]
+    start = datetime(2019, 1, 1)
+    times = {v: iso(start + timedelta(days=6 * i)) for i, v in enumerate(versions)}
+    times["modified"] = times[versions[-1]]
+    return json_response({
+        "name": match["package"],
+        "description": words(rng, 10),
+        "dist-tags": {"latest": versions[-1]},
+        "versions": {v: {"name": match["package"], "version": v, "description": words(rng, 10)} for v in versions},
+        "time": times
+    })
+
+def pypi_package(rng, match, query, body):
+    versions = [f"{major}.{minor}.{patch}" for major in range(1, 5) for minor in range(10) for patch in range(5)]
+    start = datetime(2019, 1, 1)
+    return json_response({
+        "info": {
+            "name": match["package"],
+            "version": versions[-1],
+            "summary": words(rng, 10),
+            "home_page": f"https://pypi.org/project/{match['package']}/"
+        },
+        "releases": {
+            v: [{"upload_time": iso(start + timedelta(days=9 * i)).rstrip("Z"), "size": rng.randint(10000, 900000)}]
+            for i, v in enumerate(versions)
+        }
+    })
+
+def llama_protocols(rng, match, query, body):
+    protocols = []
+    for i in range(4000):
+        chains = rng.sample(CHAINS, rng.randint(1, 5))
+        protocols.append({
+            "id": str(i),
+            "name": f"Protocol {i}",
+            "symbol": f"P{i}",
+            "category": rng.choice(CATEGORIES),
+            "chain": chains[0] if len(chains) == 1 else "Multi-Chain",
+            "chains": chains,
+            "tvl": rng.paretovariate(1.2) * 1e6 if i % 11 else None,
+            "change_1h": rng.uniform(-2, 2),
+            "change_1d": rng.uniform(-10, 10),
+            "change_7d": rng.uniform(-25, 25) if i % 5 else None,
+            "chainTvls": {chain: rng.random() * 1e7 for chain in chains},
+            "description": words(rng, 40),
+            "logo": f"https://icons.llama.fi/p{i}.png",
+            "url": f"https://protocol{i}.example.com"
+        })
+    return json_response(protocols)
+
+def dappradar_dapps(rng, match, query, body):
+    page = int(param(query, "page", 1))
+    per_page = int(param(query, "resultsPerPage", 50))
+    total = 2000
+    start = (page - 1) * per_page
+    dapps = []
+    for i in range(start, min(start + per_page, total)):
+        users = int(2000000 / (i + 1) ** 0.8)
+        dapps.append({
+            "name": f"DApp {i}",
+            "category": rng.choice(["DEX", "Games", "Lending", "Marketplace", "Social"]),
+            "chain": rng.choice(CHAINS),
+            "users_24h": users,
+            "transactions_24h": users * rng.randint(2, 6),
+            "volume_24h_usd": users * rng.uniform(50, 5000)
+        })
+    return json_response({"dapps": dapps, "page": page, "pageCount": total // per_page})
+
+def nft_marketplaces_page(rng, match, query, body):
+    rows = "".join(
+        f"<tr class='marketplace'><td>Market {i}</td><td>${rng.random() * 1e7:,.0f}</td></tr>" for i in range(100)
+    )
+    return html_response(f"<html><body><table>{rows}</table></body></html>")
+
+def galxe_search(rng, match, query, body):
+    keyword = param(query, "keyword", "project")
+    return json_response({"data": {"spaces": [{"id": zlib.crc32(keyword.encode("utf-8")) % 100000, "name": keyword}]}})
+
+def galxe_campaigns(rng, match, query, body):
+    now = datetime(2024, 1, 1)
+    campaigns = [
+        {
+            "id": f"GC{match['space']}{i}",
+            "name": words(rng, 4).title(),
+            "type": rng.choice(["Drop", "Oat", "Token", "Points"]),
+            "startTime": int((now - timedelta(days=i)).timestamp()),
+            "endTime": int((now + timedelta(days=30 - i)).timestamp()),
+            "participantsCount": rng.randint(100, 500000)
+        }
+        for i in range(50)
+    ]
+    return json_response({"data": {"campaigns": campaigns}})
+
+def zealy_questboard(rng, match, query, body):
+    cards = "".join(
+        f"<div class='quest-card'><span class='quest-title'>{words(rng, 5).title()}</span>"
+        f"<span class='quest-points'>{rng.randint(10, 500)} XP</span></div>"
+        for _ in range(40)
+    )
+    return html_response(f"<html><body>{cards}</body></html>")
+
+def nitter_profile(rng, match, query, body):
+    tweets = "".join(
+        f"<div class='timeline-item'><div class='tweet-content'>{words(rng, 25)}</div></div>" for _ in range(20)
+    )
+    return html_response(
+        f"<html><body><span class='profile-stat-num'>{rng.randint(1000, 2000000):,}</span>{tweets}</body></html>"
+    )
+
+def debank_tokens(rng, match, query, body):
+    tokens = [
+        {
+            "id": f"0x{rng.getrandbits(160):040x}" if i else "eth",
+            "chain": rng.choice(["eth", "bsc", "matic", "arb", "op", "base"]),
+            "name": f"Token {i}",
+            "symbol": f"TK{i}" if i else "ETH",
+            "decimals": 18,
+            "price": rng.paretovariate(1.5) if i % 3 else 0,
+            "amount": rng.paretovariate(1.1) * 100
+        }
+        for i in range(2000)
+    ]
+    return json_response(tokens)
+
+def debank_protocols(rng, match, query, body):
+    protocols = [
+        {
+            "id": f"protocol_{i}",
+            "chain": rng.choice(["eth", "bsc", "arb"]),
+            "name": f"Protocol {i}",
+            "portfolio_item_list": [
+                {"name": rng.choice(["Lending", "Staked", "Liquidity Pool"]), "stats": {"net_usd_value": rng.random() * 1e6}}
+                for _ in range(rng.randint(1, 4))
+            ]
+        }
+        for i in range(30)
+    ]
+    return json_response(protocols)
+
+def covalent_transactions(rng, match, query, body):
+    chain = int(match["chain"])
+    address = match["address"].lower()
+    page = int(param(query, "page-number", 0))
+    page_size = int(param(query, "page-size", 100))
+    head = 18000000 + chain * 1000
+    total = 1500
+    start = page * page_size
+    items = []
+    for i in range(start, min(start + page_size, total)):
+        block = head - i * 7
+        counterparty = f"0x{(i % 37) * 1234567:040x}"
+        outgoing = i % 2 == 0
+        items.append({
+            "block_height": block,
+            "block_signed_at": iso(datetime(2024, 1, 1) - timedelta(minutes=i)),
+            "tx_hash": f"0x{chain:04x}{block:060x}",
+            "from_address": address if outgoing else counterparty,
+            "to_address": counterparty if outgoing else address,
+            "value": str(rng.getrandbits(60)),
+            "value_quote": rng.random() * 5000,
+            "gas_quote": rng.random() * 20,
+            "successful": True,
+            "log_events": [{
+                "log_offset": 0,
+                "sender_address": f"0x{(i % 11) * 7654321:040x}",
+                "sender_contract_ticker_symbol": f"TK{i % 11}",
+                "sender_contract_decimals": 18,
+                "decoded": {"name": "Transfer", "params": [
+                    {"name": "from", "value": address if outgoing else counterparty},
+                    {"name": "to", "value": counterparty if outgoing else address},
+                    {"name": "value", "value": str(rng.getrandbits(70))}
+                ]}
+            }]
+        })
+    return json_response({"data": {"items": items, "pagination": {"has_more": start + page_size < total}}})
+
+def chat_completions(rng, match, query, body):
+    request = json.loads(body or b"{}")
+    text = "\n\n".join(words(rng, 60).capitalize() + "." for _ in range(3))
+    if not request.get("stream"):
+        return json_response({"choices": [{"message": {"role": "assistant", "content": text}}]})
+
+    chunks = [text[i:i + 20] for i in range(0, len(text), 20)]
+    events = "".join(
+        "data: " + json.dumps({"choices": [{"delta": {"content": chunk}}]}) + "\n\n" for chunk in chunks
+    )
+    return 200, "text/event-stream", (events + "data: [DONE]\n\n").encode("utf-8")
+
+def documentation_page(rng, match, query, body):
+    sections = "".join(f"<h2>{words(rng, 3).title()}</h2><p>{words(rng, 120)}</p>" for _ in range(20))
+    return html_response(f"<html><body><time>2024-01-01</time><main>{sections}</main></body></html>")
+
+SYNTHETIC_ROUTES = [
+    (r"newsapi\.org", r"/v2/everything", news_everything),
+    (r"api\.github\.com", r"/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/releases", github_releases),
+    (r"api\.github\.com", r"/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)", github_repo),
+    (r"registry\.npmjs\.org", r"/(?P<package>.+)", npm_package),
+    (r"pypi\.org", r"/pypi/(?P<package>[^/]+)/json", pypi_package),
+    (r"api\.llama\.fi", r"/protocols", llama_protocols),
+    (r"dappradar\.com", r"/api/dapps", dappradar_dapps),
+    (r"dappradar\.com", r"/nft/marketplaces", nft_marketplaces_page),
+    (r"galxe\.com", r"/api/v1/search", galxe_search),
+    (r"galxe\.com", r"/api/v1/spaces/(?P<space>[^/]+)/campaigns", galxe_campaigns),
+    (r"zealy\.io", r"/c/(?P<slug>[^/]+)/questboard", zealy_questboard),
+    (r"nitter\.net", r"/(?P<handle>[^/]+)", nitter_profile),
+    (r"openapi\.debank\.com", r"/v1/user/token_list", debank_tokens),
+    (r"openapi\.debank\.com", r"/v1/user/complex_protocol_list", debank_protocols),
+    (r"api\.covalenthq\.com", r"/v1/(?P<chain>\d+)/address/(?P<address>[^/]+)/transactions_v2/?", covalent_transactions),
+    (r".*", r"/(v1/)?chat/completions", chat_completions),
+    (r".*", r"/.*", documentation_page),
+]
+
+def synthetic_response(host, path, query, body, seed, canonical):
+    """
+    Generate a deterministic response for a request no fixture covers
+    """
+    for host_pattern, path_pattern, handler in SYNTHETIC_ROUTES:
+        if not re.fullmatch(host_pattern, host):
+            continue
+        match = re.fullmatch(path_pattern, path)
+        if match:
+            rng = random.Random(f"{seed}:{canonical}")
+            return handler(rng, match.groupdict(), query, body)
+    return json_response({"error": "not found"}, status=404)
+
+class RateLimiter:
+    """
+    Token bucket per host: `rate` requests per second with bursts of `burst`
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def allow(self, host):
+        if not self.rate:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            tokens, last = self.buckets.get(host, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens < 1:
+                self.buckets[host] = (tokens, now)
+                return False
+            self.buckets[host] = (tokens - 1, now)
+            return True
+
+class MockAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    # Set by make_server
+    config = None
+    limiter = None
+    rng = None
+    rng_lock = None
+
+    def log_message(self, format, *args):
+        if self.config.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, content_type, body, extra_headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else None
+
+        # /{host}/{path}?{query}
+        parts = urlsplit(self.path)
+        host, _, path = parts.path.lstrip("/").partition("/")
+        path = "/" + path
+        url = f"https://{host}{path}" + (f"?{parts.query}" if parts.query else "")
+        _, canonical = http_client.canonical_request(method, url, body=body)
+
+        with self.rng_lock:
+            delay = max(0.0, self.rng.gauss(self.config.latency_ms, self.config.jitter_ms)) / 1000
+            fail = self.rng.random() < self.config.error_rate
+        time.sleep(delay)
+
+        if not self.limiter.allow(host):
+            self._send(429, "application/json", b'{"error": "rate limited"}', {"Retry-After": "1"})
+            return
+        if fail:
+            self._send(503, "application/json", b'{"error": "injected failure"}')
+            return
+
+        fixture = http_client.load_fixture(http_client.fixture_path(host, canonical))
+        if fixture is not None:
+            headers = fixture.get("headers", {})
+            self._send(fixture["status"], headers.get("Content-Type", "application/json"), http_client.fixture_body(fixture))
+            return
+
+        status, content_type, payload = synthetic_response(
+            host, path, parse_qs(parts.query), body, self.config.seed, canonical
+        )
+        self._send(status, content_type, payload)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+def make_server(config):
+    """
+    Build the stand-in server for a parsed argument namespace
+    """
+    handler = type("ConfiguredMockAPIHandler", (MockAPIHandler,), {
+        "config": config,
+        "limiter": RateLimiter(config.rate_limit),
+        "rng": random.Random(config.seed),
+        "rng_lock": threading.Lock()
+    })
+    return ThreadingHTTPServer((config.host, config.port), handler)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in server for the APIs used by the data jobs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--fixtures", help="Fixture directory (default: BITALK_HTTP_FIXTURES or data_task/fixtures/http)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mean added latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Standard deviation of the added latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Requests per second per host before 429s (0 = unlimited)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    config = parse_args(argv)
+    if config.fixtures:
+        os.environ[http_client.FIXTURES_ENV] = config.fixtures
+
+    server = make_server(config)
+    print(f"Mock API server listening on http://{config.host}:{config.port} (fixtures: {http_client.fixture_dir()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
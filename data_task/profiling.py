@@ -0,0 +1,231 @@
+import argparse
+import cProfile
+import importlib
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import instrumentation
+
+# BITALK_PROFILE turns profiling on for any job started through launch():
+#   cprofile - deterministic profile (.prof for pstats/snakeviz) plus collapsed stacks
+#   sample   - low-overhead stack sampling, collapsed stacks only
+# BITALK_PROFILE_INTERVAL_MS sets the sampling interval (default 5 ms).
+# A --profile[=mode] argument on the command line does the same for one run.
+PROFILE_ENV = "BITALK_PROFILE"
+INTERVAL_ENV = "BITALK_PROFILE_INTERVAL_MS"
+PROFILERS = ("cprofile", "sample")
+DEFAULT_INTERVAL_MS = 5
+
+# cProfile call graph paths below this much time are left out of the collapsed stacks
+MIN_COLLAPSED_SECONDS = 1e-5
+MAX_STACK_DEPTH = 128
+
+def frame_label(filename, lineno, name):
+    """
+    Frame name for collapsed stacks, e.g. fetch_dappradar_rankings (update_tool_rankings.py:84)
+    """
+    if filename == "~":
+        # Built-ins show up in cProfile as ('~', 0, '<built-in method ...>')
+        return name.replace(";", ",")
+    return f"{name} ({os.path.basename(filename)}:{lineno})".replace(";", ",")
+
+class StackSampler:
+    """
+    Sample the Python stacks of every thread at a fixed interval from a
+    background thread.
+
+    Stacks are counted as collapsed strings (root;...;leaf), which is the
+    input format of flamegraph.pl and speedscope. The overhead is one walk
+    of each thread's frames per interval, independent of how many calls
+    the job makes.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL_MS / 1000):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append(frame_label(code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}").replace(";", ","))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        return self.stacks
+
+def collapse_pstats(stats):
+    """
+    Approximate collapsed stacks from a cProfile call graph, in microseconds.
+
+    cProfile only keeps caller -> callee edges, so each function's own time
+    is split over the paths leading to it in proportion to the time spent
+    under each caller edge. Recursive edges are cut.
+    """
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    stacks = Counter()
+    roots = [func for func, entry in stats.items() if not entry[4]]
+
+    def walk(func, path, share, seen):
+        tt = stats[func][2]
+        if tt * share >= MIN_COLLAPSED_SECONDS:
+            stacks[";".join(path)] += int(tt * share * 1e6)
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_time in callees.get(func, []):
+            callee_total = stats[callee][3]
+            if callee_total <= 0 or callee in seen:
+                continue
+            child_share = share * min(edge_time / callee_total, 1.0)
+            if callee_total * child_share < MIN_COLLAPSED_SECONDS:
+                continue
+            seen.add(callee)
+            walk(callee, path + [frame_label(*callee)], child_share, seen)
+            seen.discard(callee)
+
+    for root in roots:
+        walk(root, [frame_label(*root)], 1.0, {root})
+    return stacks
+
+def write_collapsed(path, stacks):
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, value in sorted(stacks.items()):
+            if value > 0:
+                f.write(f"{stack} {value}\n")
+
+def profile_mode(argv=None):
+    """
+    Profiler selected by a --profile[=mode] argument (removed from argv)
+    or by BITALK_PROFILE; None if profiling is off
+    """
+    argv = sys.argv if argv is None else argv
+    for i, arg in enumerate(argv[1:], start=1):
+        if arg == "--profile" or arg.startswith("--profile="):
+            del argv[i]
+            return arg.partition("=")[2] or "cprofile"
+
+    mode = os.environ.get(PROFILE_ENV, "").lower()
+    if mode in ("", "0", "off", "false", "no"):
+        return None
+    return "cprofile" if mode in ("1", "on", "true", "yes") else mode
+
+@contextmanager
+def profile(job, mode, output_dir=None, interval=None):
+    """
+    Profile the enclosed block with cProfile or the stack sampler and write
+    the results next to the run logs as <job>-<run id>.prof / .collapsed
+    """
+    if mode not in PROFILERS:
+        raise ValueError(f"Unknown profiler {mode!r}, expected one of {', '.join(PROFILERS)}")
+
+    output_dir = output_dir or instrumentation.log_dir()
+    run = instrumentation.current_run()
+    stem = f"{job}-{run.run_id if run else time.strftime('%Y%m%d-%H%M%S')}"
+    if interval is None:
+        interval = float(os.environ.get(INTERVAL_ENV, DEFAULT_INTERVAL_MS)) / 1000
+
+    profiler = cProfile.Profile() if mode == "cprofile" else StackSampler(interval)
+    if mode == "cprofile":
+        profiler.enable()
+    else:
+        profiler.start()
+
+    try:
+        yield profiler
+    finally:
+        os.makedirs(output_dir, exist_ok=True)
+        collapsed_path = os.path.join(output_dir, f"{stem}.collapsed")
+        paths = {"collapsed": collapsed_path}
+
+        if mode == "cprofile":
+            profiler.disable()
+            prof_path = os.path.join(output_dir, f"{stem}.prof")
+            profiler.dump_stats(prof_path)
+            paths["prof"] = prof_path
+            write_collapsed(collapsed_path, collapse_pstats(pstats.Stats(profiler).stats))
+        else:
+            profiler.stop()
+            write_collapsed(collapsed_path, profiler.collapsed())
+
+        if run:
+            run.emit("profile", profiler=mode, **paths)
+        print(f"Profile written to {', '.join(paths.values())}", file=sys.stderr)
+
+def launch(job, main, *args):
+    """
+    Run a job's main() as one instrumentation run, profiled if
+    BITALK_PROFILE or --profile asks for it
+    """
+    mode = profile_mode()
+    with instrumentation.run(job):
+        if mode is None:
+            return main(*args)
+        with profile(job, mode):
+            return main(*args)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run any data_task function under a profiler, e.g. "
+                    "update_tool_rankings or build_tutorial_index:process_tutorials content/tutorials out"
+    )
+    parser.add_argument("target", help="module[:function]; the function defaults to main")
+    parser.add_argument("args", nargs=argparse.REMAINDER,
+                        help="arguments: sys.argv for main(), positional strings for other functions")
+    parser.add_argument("--profiler", choices=PROFILERS, default="cprofile")
+    parser.add_argument("--interval-ms", type=float, default=None, help="sampling interval for --profiler sample")
+    parser.add_argument("--output", default=None, help="directory for the profile files (default: the run log directory)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    module_name, _, function_name = args.target.partition(":")
+    function_name = function_name or "main"
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    function = getattr(importlib.import_module(module_name), function_name)
+
+    # main() reads its own arguments from sys.argv; other functions get them directly
+    call_args = []
+    if function_name == "main":
+        sys.argv = [module_name] + args.args
+    else:
+        call_args = args.args
+
+    interval = args.interval_ms / 1000 if args.interval_ms else None
+    job = module_name if function_name == "main" else f"{module_name}.{function_name}"
+    with instrumentation.run(job):
+        with profile(job, args.profiler, args.output, interval):
+            function(*call_args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import json
+import os
+from datetime import datetime
+
+from ranking_store import item_key
+from report_writer import write_json
+
+class RankIndex:
+    """
+    Per-item rank and metric value from the previous day, per category.
+
+    Each category keeps two snapshots: the latest run of today and the last
+    run of an earlier day (the baseline). Re-running the job on the same day
+    replaces today's snapshot but keeps the baseline, so deltas always
+    compare against the previous day rather than the previous run. Updating
+    and computing deltas is a single pass over the current items.
+
+    Items are keyed by ranking_store.item_key (name and chain), so a DApp
+    listed on several chains keeps a separate rank per chain.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.categories = {}
+        self.load()
+
+    def load(self):
+        """
+        Load the index from disk if it exists
+        """
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, "r") as f:
+                self.categories = json.load(f).get("categories", {})
+        except (OSError, ValueError) as e:
+            print(f"Error loading rank index {self.path}: {e}")
+
+    def save(self):
+        """
+        Persist the index as JSON
+        """
+        write_json(self.path, {"categories": self.categories})
+
+    def update(self, category, items, metric, day=None, record=True):
+        """
+        Rank items by metric, record them as today's snapshot and return one
+        row per item (with its item_key as key) with its rank change against
+        the baseline day.
+        rank_change is positive for items that moved up and None for new entrants.
+        With record=False (sample data) the rows are computed but the
+        snapshots are left as they were.
+        """
+        day = day or datetime.now().strftime("%Y-%m-%d")
+        state = self.categories.get(category, {"metric": metric, "baseline": None, "current": None})
+        if record:
+            self.categories[category] = state
+        else:
+            state = dict(state)
+
+        # Today's first run: the previous snapshot becomes the baseline
+        current = state.get("current")
+        if current and current["date"] != day:
+            state["baseline"] = current
+        if state.get("metric") != metric:
+            state["metric"] = metric
+            state["baseline"] = None
+
+        baseline = state.get("baseline") or {"date": None, "ranks": {}}
+        previous = baseline["ranks"]
+
+        ranked = sorted(items, key=lambda x: x.get(metric, 0), reverse=True)
+        ranks = {}
+        rows = []
+        for rank, item in enumerate(ranked, start=1):
+            key = item_key(item)
+            value = item.get(metric, 0)
+            ranks[key] = [rank, value, item["name"], item.get("chain")]
+
+            before = previous.get(key)
+            rows.append({
+                "key": key,
+                "name": item["name"],
+                "chain": item.get("chain"),
+                "rank": rank,
+                "value": value,
+                "previous_rank": before[0] if before else None,
+                "rank_change": before[0] - rank if before else None,
+                "value_change": (value - before[1]) / before[1] if before and before[1] else None
+            })
+
+        state["current"] = {"date": day, "ranks": ranks}
+        return rows, baseline["date"]
+
+    def dropped(self, category):
+        """
+        Items ranked on the baseline day that are missing from today's snapshot
+        """
+        state = self.categories.get(category, {})
+        baseline = (state.get("baseline") or {}).get("ranks", {})
+        current = (state.get("current") or {}).get("ranks", {})
+        # Snapshots written before items were keyed by chain only hold [rank, value]
+        return [
+            {
+                "key": key,
+                "name": entry[2] if len(entry) > 2 else key,
+                "chain": entry[3] if len(entry) > 3 else None,
+                "previous_rank": entry[0],
+                "value": entry[1]
+            }
+            for key, entry in sorted(baseline.items(), key=lambda x: x[1][0])
+            if key not in current
+        ]
+
+def summarize_movers(rows, compared_to, dropped=None, top_n=5, table_size=20):
+    """
+    Biggest climbers and fallers, new entrants and the delta rows of the
+    top table_size items, in a shape Hugo templates can iterate directly.
+    Without a baseline day (compared_to is None) nothing counts as moved or new.
+    """
+    moved = [row for row in rows if row["rank_change"]]
+    return {
+        "compared_to": compared_to,
+        "top": rows[:table_size],
+        "gainers": sorted((r for r in moved if r["rank_change"] > 0), key=lambda r: -r["rank_change"])[:top_n],
+        "losers": sorted((r for r in moved if r["rank_change"] < 0), key=lambda r: r["rank_change"])[:top_n],
+        "new_entrants": [row for row in rows if row["previous_rank"] is None][:top_n] if compared_to else [],
+        "dropped": (dropped or [])[:top_n]
+    }
@@ -0,0 +1,241 @@
+import bisect
+import json
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from report_writer import write_json
+
+# No template reads the raw series and it changes every hour, so it lives
+# outside Hugo's data directory; BITALK_RANKING_CACHE moves it
+CACHE_DIR_ENV = "BITALK_RANKING_CACHE"
+DEFAULT_CACHE_DIR = os.path.join(".cache", "rankings")
+
+def default_store_path():
+    """
+    Path of the ranking time series file
+    """
+    return os.path.join(os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR), "ranking_series.json")
+
+# Bucket resolution and default retention for each tier, finest first
+TIERS = ("hourly", "daily", "weekly")
+DEFAULT_RETENTION = {
+    "hourly": timedelta(days=3),
+    "daily": timedelta(days=180),
+    "weekly": timedelta(weeks=156)
+}
+
+def bucket_start(timestamp, tier):
+    """
+    Start of the tier bucket containing a timestamp
+    """
+    if tier == "hourly":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    day = timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    if tier == "daily":
+        return day
+    if tier == "weekly":
+        return day - timedelta(days=day.weekday())
+    raise ValueError(f"Unknown tier: {tier}")
+
+def bucket_key(timestamp, tier):
+    """
+    Sortable string key of the tier bucket containing a timestamp
+    """
+    start = bucket_start(timestamp, tier)
+    return start.strftime("%Y-%m-%dT%H:00") if tier == "hourly" else start.strftime("%Y-%m-%d")
+
+def numeric_metrics(item):
+    """
+    The numeric fields of a ranking item
+    """
+    return {
+        key: value for key, value in item.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
+
+def item_key(item):
+    """
+    Key of a ranking item: its name, qualified by its chain when it has one,
+    since the same DApp can be listed once per chain
+    """
+    chain = item.get("chain")
+    return f"{item['name']} ({chain})" if chain else item["name"]
+
+class RankingStore:
+    """
+    Time series of ranking metrics per category and item, in three tiers.
+
+    Every snapshot is upserted into the hourly tier keyed by (hour, item),
+    so running the job several times in an hour or a day replaces points
+    instead of duplicating them. The daily bucket is then recomputed as the
+    mean of that day's hourly points and the weekly bucket as the mean of
+    that week's daily points. Each tier is pruned to its retention, so the
+    file size stays bounded while recent data keeps intraday resolution.
+
+    Bucket keys are ISO strings, which sort chronologically, so range
+    queries are a bisect over the sorted keys of one tier.
+    """
+
+    def __init__(self, path, retention=None):
+        self.path = path
+        self.retention = dict(DEFAULT_RETENTION)
+        self.retention.update(retention or {})
+
+        # Daily buckets are rebuilt from hourly points and weekly from daily ones,
+        # so each tier must hold at least one full bucket of the next
+        if self.retention["hourly"] < timedelta(days=1) or self.retention["daily"] < timedelta(weeks=1):
+            raise ValueError("Hourly retention must cover a day and daily retention a week")
+
+        self.series = {}
+        self.load()
+
+    def load(self):
+        """
+        Load the store from disk if it exists
+        """
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, "r") as f:
+                self.series = json.load(f).get("series", {})
+        except (OSError, ValueError) as e:
+            print(f"Error loading ranking store {self.path}: {e}")
+
+    def save(self):
+        """
+        Persist the store as compact JSON
+        """
+        write_json(self.path, {
+            "tiers": {tier: self.retention[tier].total_seconds() for tier in TIERS},
+            "series": self.series
+        }, indent=None)
+
+    def categories(self):
+        return list(self.series)
+
+    def _tier(self, category, tier):
+        return self.series.setdefault(category, {}).setdefault(tier, {})
+
+    def upsert(self, category, items, timestamp=None):
+        """
+        Record a snapshot of ranking items (dicts with a name and optionally
+        a chain) for a category, keyed by item_key
+        """
+        timestamp = timestamp or datetime.now()
+
+        hourly = self._tier(category, "hourly")
+        hour = hourly.setdefault(bucket_key(timestamp, "hourly"), {})
+        for item in items:
+            hour[item_key(item)] = numeric_metrics(item)
+
+        self._rollup(category, "hourly", "daily", timestamp)
+        self._rollup(category, "daily", "weekly", timestamp)
+        self.prune(category, timestamp)
+
+    def _rollup(self, category, source_tier, target_tier, timestamp):
+        """
+        Recompute one target bucket as the mean of its source buckets
+        """
+        source = self._tier(category, source_tier)
+        start = bucket_start(timestamp, target_tier)
+        key = bucket_key(timestamp, target_tier)
+        end = start + (timedelta(weeks=1) if target_tier == "weekly" else timedelta(days=1))
+
+        sums = {}
+        counts = {}
+        for bucket in self._keys_between(source, bucket_key(start, source_tier), bucket_key(end, source_tier)):
+            for name, metrics in source[bucket].items():
+                item_sums = sums.setdefault(name, {})
+                item_counts = counts.setdefault(name, {})
+                for metric, value in metrics.items():
+                    item_sums[metric] = item_sums.get(metric, 0) + value
+                    item_counts[metric] = item_counts.get(metric, 0) + 1
+
+        self._tier(category, target_tier)[key] = {
+            name: {metric: total / counts[name][metric] for metric, total in item_sums.items()}
+            for name, item_sums in sums.items()
+        }
+
+    def prune(self, category, now=None):
+        """
+        Drop buckets older than each tier's retention
+        """
+        now = now or datetime.now()
+        for tier in TIERS:
+            buckets = self._tier(category, tier)
+            cutoff = bucket_key(now - self.retention[tier], tier)
+            for key in [k for k in buckets if k < cutoff]:
+                del buckets[key]
+
+    @staticmethod
+    def _keys_between(buckets, start_key, end_key):
+        """
+        Sorted bucket keys with start_key <= key < end_key (either bound may be None)
+        """
+        keys = sorted(buckets)
+        lo = bisect.bisect_left(keys, start_key) if start_key else 0
+        hi = bisect.bisect_left(keys, end_key) if end_key else len(keys)
+        return keys[lo:hi]
+
+    def pick_tier(self, start=None, now=None):
+        """
+        Finest tier whose retention still covers a start time
+        """
+        if start is None:
+            return "daily"
+        now = now or datetime.now()
+        for tier in TIERS:
+            if start >= now - self.retention[tier]:
+                return tier
+        return TIERS[-1]
+
+    def query(self, category, metric, start=None, end=None, tier=None, items=None):
+        """
+        Values of one metric in [start, end) as a DataFrame indexed by bucket
+        start time with one column per item key. The tier defaults to the finest
+        one that still covers start.
+        """
+        tier = tier or self.pick_tier(start)
+        buckets = self.series.get(category, {}).get(tier, {})
+        keys = self._keys_between(
+            buckets,
+            bucket_key(start, tier) if start else None,
+            bucket_key(end, tier) if end else None
+        )
+
+        rows = {}
+        for key in keys:
+            rows[key] = {
+                name: metrics[metric] for name, metrics in buckets[key].items()
+                if metric in metrics and (items is None or name in items)
+            }
+
+        df = pd.DataFrame.from_dict(rows, orient="index")
+        df.index = pd.to_datetime(df.index)
+        return df.sort_index()
+
+    def latest(self, category, tier="hourly"):
+        """
+        The most recent bucket of a tier as (timestamp, {item: metrics})
+        """
+        buckets = self.series.get(category, {}).get(tier, {})
+        if not buckets:
+            return None, {}
+        key = max(buckets)
+        return datetime.fromisoformat(key), buckets[key]
+
+    def import_legacy(self, historical_data):
+        """
+        Load the old historical_rankings.json layout (one full snapshot per day
+        per category) into the daily and weekly tiers
+        """
+        for category, entries in historical_data.items():
+            for entry in entries:
+                day = datetime.strptime(entry["date"], "%Y-%m-%d")
+                daily = self._tier(category, "daily")
+                daily[bucket_key(day, "daily")] = {item_key(item): numeric_metrics(item) for item in entry["data"]}
+                self._rollup(category, "daily", "weekly", day)
+            self.prune(category)
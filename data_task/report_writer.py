@@ -0,0 +1,262 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+
+from instrumentation import count
+
+# mkstemp creates files as 0600; published pages must be world-readable.
+# A fixed mode avoids reading the umask, which can only be done by changing it.
+_FILE_MODE = 0o644
+
+# Lines that change on every run without the page content changing
+VOLATILE_LINE_PATTERNS = (
+    re.compile(r"^\*(Generated on|Last updated): .*\*\s*$"),
+    re.compile(r"^date: '?\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}'?\s*$"),
+)
+
+# JSON keys holding run timestamps rather than data. Only top-level keys are
+# volatile by default; deeper ones are given as dotted paths where "*"
+# matches any list item or object key, e.g. "*.updated_at" for a list of records.
+VOLATILE_JSON_KEYS = ("generated_at", "updated_at")
+
+def content_digest(path, volatile_patterns=VOLATILE_LINE_PATTERNS, encoding="utf-8"):
+    """
+    Hash a text file line by line, skipping volatile lines such as timestamps
+    """
+    digest = hashlib.sha256()
+    with open(path, "r", encoding=encoding) as f:
+        for line in f:
+            if any(pattern.match(line) for pattern in volatile_patterns):
+                continue
+            digest.update(line.encode(encoding))
+    return digest.hexdigest()
+
+class ReportWriter:
+    """
+    Stream report sections to one or more output files in a single pass.
+
+    Every target is written to a hidden temporary file in the same directory
+    and renamed into place on close, so Hugo's watcher never picks up a
+    half-written page. If rendering fails the temporary files are removed and
+    the existing outputs are left untouched.
+
+    With skip_unchanged (the default) a target whose content only differs from
+    the new render in volatile lines is not replaced at all, so a refresh that
+    changes nothing does not trigger a Hugo rebuild. The paths that were
+    actually replaced are available as `written` after close.
+    """
+
+    def __init__(self, paths, encoding="utf-8", buffer_size=64 * 1024,
+                 skip_unchanged=True, volatile_patterns=VOLATILE_LINE_PATTERNS):
+        if isinstance(paths, (str, os.PathLike)):
+            paths = [paths]
+        self.paths = [os.fspath(p) for p in paths]
+        self.encoding = encoding
+        self.buffer_size = buffer_size
+        self.skip_unchanged = skip_unchanged
+        self.volatile_patterns = volatile_patterns
+        self.written = []
+        self._outputs = []
+        self._closed = False
+
+        try:
+            for path in self.paths:
+                directory = os.path.dirname(path) or "."
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(
+                    dir=directory,
+                    prefix=f".{os.path.basename(path)}.",
+                    suffix=".tmp"
+                )
+                handle = os.fdopen(fd, "w", encoding=encoding, buffering=buffer_size)
+                self._outputs.append((path, tmp_path, handle))
+        except Exception:
+            self.abort()
+            raise
+
+    def write(self, text):
+        """
+        Append a chunk of text to every output
+        """
+        for _, _, handle in self._outputs:
+            handle.write(text)
+
+    def writelines(self, chunks):
+        """
+        Append every chunk from an iterable to every output
+        """
+        for chunk in chunks:
+            self.write(chunk)
+
+    def close(self):
+        """
+        Flush all outputs and atomically move the changed ones into place
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        try:
+            for _, _, handle in self._outputs:
+                handle.close()
+
+            # All outputs hold the same render, so hash it once
+            new_digest = None
+            if self.skip_unchanged and self._outputs:
+                new_digest = content_digest(self._outputs[0][1], self.volatile_patterns, self.encoding)
+
+            for path, tmp_path, _ in self._outputs:
+                if new_digest is not None and self._matches(path, new_digest):
+                    os.remove(tmp_path)
+                    count("files_unchanged_total")
+                    continue
+                os.chmod(tmp_path, _FILE_MODE)
+                os.replace(tmp_path, path)
+                self.written.append(path)
+                count("files_written_total")
+        except Exception:
+            self._discard()
+            raise
+
+    def abort(self):
+        """
+        Drop all temporary files without touching the existing outputs
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._discard()
+
+    def _matches(self, path, digest):
+        if not os.path.exists(path):
+            return False
+        try:
+            return content_digest(path, self.volatile_patterns, self.encoding) == digest
+        except (OSError, UnicodeDecodeError):
+            return False
+
+    def _discard(self):
+        for _, tmp_path, handle in self._outputs:
+            try:
+                handle.close()
+            except Exception:
+                pass
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+def write_report(paths, chunks, encoding="utf-8", skip_unchanged=True):
+    """
+    Stream an iterable of markdown chunks (or a single string) to one or
+    more files atomically. Returns the paths that were actually rewritten.
+    """
+    if isinstance(chunks, str):
+        chunks = [chunks]
+
+    with ReportWriter(paths, encoding=encoding, skip_unchanged=skip_unchanged) as writer:
+        writer.writelines(chunks)
+
+    return writer.written
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """
+    Hash a file's bytes
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def copy_file(src, dest):
+    """
+    Copy a file atomically unless dest already holds the same bytes, so an
+    unchanged source does not touch dest's mtime. Returns True if copied.
+    """
+    if (os.path.exists(dest) and os.path.getsize(dest) == os.path.getsize(src)
+            and file_digest(dest) == file_digest(src)):
+        count("files_unchanged_total")
+        return False
+
+    directory = os.path.dirname(dest) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(dest)}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        shutil.copy2(src, tmp_path)
+        os.chmod(tmp_path, _FILE_MODE)
+        os.replace(tmp_path, dest)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    count("files_written_total")
+    return True
+
+def strip_volatile_keys(value, volatile_keys=VOLATILE_JSON_KEYS):
+    """
+    Return a copy of a JSON value without the timestamp keys at the given
+    paths. Keys of the same name elsewhere (e.g. an upstream record's own
+    updated_at) are kept.
+    """
+    return _strip_paths(value, [tuple(key.split(".")) for key in volatile_keys])
+
+def _strip_paths(value, paths):
+    if not paths:
+        return value
+    if isinstance(value, dict):
+        drop = {path[0] for path in paths if len(path) == 1}
+        return {
+            k: _strip_paths(v, [path[1:] for path in paths if len(path) > 1 and path[0] in (k, "*")])
+            for k, v in value.items() if k not in drop
+        }
+    if isinstance(value, list):
+        deeper = [path[1:] for path in paths if len(path) > 1 and path[0] == "*"]
+        return [_strip_paths(v, deeper) for v in value]
+    return value
+
+def write_json(path, data, indent=2, default=None, volatile_keys=VOLATILE_JSON_KEYS):
+    """
+    Write data as JSON unless the file on disk already holds the same payload
+    (ignoring volatile timestamp keys). Returns True if the file was written.
+    """
+    text = json.dumps(data, indent=indent, default=default)
+
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                existing = json.load(f)
+            if strip_volatile_keys(existing, volatile_keys) == strip_volatile_keys(json.loads(text), volatile_keys):
+                count("files_unchanged_total")
+                return False
+        except (OSError, ValueError):
+            pass
+
+    write_report(path, text, skip_unchanged=False)
+    return True
+
+def write_page(path, front_matter, body, overwrite=True, encoding="utf-8"):
+    """
+    Write a thin Hugo content page: front matter plus a body that is usually
+    just a shortcode rendering a data file. With overwrite=False an existing
+    page is left alone, so hand-edited section pages keep their text and menu
+    entries. Returns the paths that were actually rewritten.
+    """
+    if not overwrite and os.path.exists(path):
+        return []
+
+    # JSON strings are valid YAML scalars, which saves quoting rules here
+    lines = ["---"] + [f"{key}: {json.dumps(value, ensure_ascii=False)}" for key, value in front_matter.items()]
+    return write_report(path, "\n".join(lines) + "\n---\n\n" + body.rstrip("\n") + "\n", encoding=encoding)
@@ -0,0 +1,138 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import http_client
+from report_writer import write_json
+
+# Raw upstream payloads change on every refresh, so they live outside Hugo's
+# data directory; BITALK_SOURCE_CACHE moves them
+CACHE_DIR_ENV = "BITALK_SOURCE_CACHE"
+DEFAULT_CACHE_DIR = os.path.join(".cache", "sources")
+
+def source_cache_path(job):
+    """
+    Path of a job's source cache file
+    """
+    return os.path.join(os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR), f"{job}.json")
+
+class SourceCache:
+    """
+    Last good payload of each upstream source of a job, with the time it
+    was fetched.
+
+    A payload is only stored after a fetch that succeeded without any
+    fallback (sample data, stale HTTP responses), so the cache can be
+    published as is while a refresh is in flight.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    self.entries = json.load(f).get("sources", {})
+            except (OSError, ValueError) as e:
+                print(f"Error loading source cache {self.path}: {e}")
+                self.entries = {}
+        return self
+
+    def save(self):
+        write_json(self.path, {"sources": self.entries}, indent=None)
+
+    def get(self, name):
+        entry = self.entries.get(name)
+        return entry["payload"] if entry else None
+
+    def fetched_at(self, name):
+        entry = self.entries.get(name)
+        return datetime.fromisoformat(entry["fetched_at"]) if entry else None
+
+    def put(self, name, payload, fetched_at=None):
+        """
+        Store a fresh payload; returns True if it differs from the cached one
+        """
+        previous = self.entries.get(name)
+        changed = previous is None or previous["payload"] != json.loads(json.dumps(payload))
+        self.entries[name] = {
+            "payload": payload,
+            "fetched_at": (fetched_at or datetime.now()).isoformat(timespec="seconds")
+        }
+        return changed
+
+def fetch_fresh(fetch):
+    """
+    Call a fetcher without letting the HTTP client answer from its
+    last-good cache, so a failure raises instead of returning old data
+    """
+    with http_client.fresh_only():
+        return fetch()
+
+def stale_while_revalidate(cache, fetchers, fallbacks, publish, on_refresh=None, workers=4):
+    """
+    Publish from the last good payloads right away, refresh every source in
+    the background, and publish again only if something changed.
+
+    fetchers maps each source name to a function that fetches it and raises
+    on failure. fallbacks maps names to functions giving data to use when a
+    source has neither a fresh nor a cached payload. publish(payloads,
+    fetched_at, fresh) renders the job's outputs; fetched_at maps names to
+    the fetch time of each payload (None for fallback data) and fresh is
+    True once the refresh has finished. on_refresh(payloads, fetched_at), if given, is
+    called after every refresh, changed or not, before the final publish;
+    use it for history that should get a point per run.
+
+    Returns the payloads that were published last.
+    """
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {name: executor.submit(fetch_fresh, fetch) for name, fetch in fetchers.items()}
+
+        # Serve the cache while the refresh runs, if every source has one
+        cached = {name: cache.get(name) for name in fetchers}
+        published = False
+        if all(payload is not None for payload in cached.values()):
+            publish(cached, {name: cache.fetched_at(name) for name in fetchers}, False)
+            published = True
+            print(f"Published from cache in {time.perf_counter() - started:.1f}s, waiting for the refresh...")
+
+        payloads = {}
+        fetched_at = {}
+        changed = False
+        refreshed = 0
+        for name, future in futures.items():
+            try:
+                payload = future.result()
+            except Exception as e:
+                print(f"Refresh of {name} failed: {e}")
+                payload = None
+
+            if payload is not None:
+                refreshed += 1
+                changed = cache.put(name, payload) or changed
+                payloads[name] = payload
+                fetched_at[name] = cache.fetched_at(name)
+            elif cached[name] is not None:
+                payloads[name] = cached[name]
+                fetched_at[name] = cache.fetched_at(name)
+            else:
+                payloads[name] = fallbacks[name]()
+                fetched_at[name] = None
+
+    cache.save()
+
+    if on_refresh:
+        on_refresh(payloads, fetched_at)
+    if changed or not published:
+        publish(payloads, fetched_at, True)
+    elif refreshed:
+        print("Refreshed data is unchanged; keeping the published outputs")
+    else:
+        print("No source could be refreshed; keeping the published outputs")
+    return payloads
@@ -0,0 +1,251 @@
+import os
+import sqlite3
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    chain_id INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    address TEXT NOT NULL,
+    block_height INTEGER NOT NULL,
+    block_signed_at TEXT,
+    from_address TEXT,
+    to_address TEXT,
+    value TEXT,
+    value_quote REAL,
+    gas_quote REAL,
+    successful INTEGER,
+    PRIMARY KEY (chain_id, tx_hash, address)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS transfers (
+    chain_id INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    address TEXT NOT NULL,
+    block_height INTEGER NOT NULL,
+    token_address TEXT,
+    token_symbol TEXT,
+    from_address TEXT,
+    to_address TEXT,
+    raw_amount TEXT,
+    amount REAL,
+    PRIMARY KEY (chain_id, tx_hash, log_index, address)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS checkpoints (
+    address TEXT NOT NULL,
+    chain_id INTEGER NOT NULL,
+    last_block INTEGER NOT NULL,
+    updated_at TEXT,
+    PRIMARY KEY (address, chain_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS transactions_from ON transactions (from_address);
+CREATE INDEX IF NOT EXISTS transactions_to ON transactions (to_address);
+CREATE INDEX IF NOT EXISTS transfers_token ON transfers (token_address, block_height);
+CREATE INDEX IF NOT EXISTS transfers_from ON transfers (from_address);
+CREATE INDEX IF NOT EXISTS transfers_to ON transfers (to_address);
+"""
+
+def decode_transfers(item):
+    """
+    ERC-20 style Transfer events of a Covalent transaction item as
+    (log_index, token_address, token_symbol, from, to, raw_amount, amount)
+    """
+    transfers = []
+    for event in item.get("log_events") or []:
+        decoded = event.get("decoded") or {}
+        if decoded.get("name") != "Transfer":
+            continue
+
+        params = {p.get("name"): p.get("value") for p in decoded.get("params") or []}
+        raw_amount = params.get("value")
+        if raw_amount is None:
+            continue
+
+        decimals = event.get("sender_contract_decimals") or 0
+        try:
+            amount = int(raw_amount) / (10 ** decimals)
+        except (TypeError, ValueError):
+            amount = None
+
+        transfers.append((
+            event.get("log_offset", 0),
+            (event.get("sender_address") or "").lower(),
+            event.get("sender_contract_ticker_symbol"),
+            (params.get("from") or "").lower(),
+            (params.get("to") or "").lower(),
+            str(raw_amount),
+            amount
+        ))
+    return transfers
+
+class TransactionStore:
+    """
+    SQLite store of wallet transactions and token transfers across chains.
+
+    Rows are keyed by (chain, transaction hash, tracked address), so
+    re-ingesting an overlapping block range is an upsert. The last ingested
+    block per (address, chain) is kept as a checkpoint so each run only asks
+    for newer history, down to the fetcher's page limit. Transfers are indexed by token and by counterparty.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def checkpoint(self, address, chain_id):
+        """
+        Last ingested block for an address on a chain, or None
+        """
+        row = self.conn.execute(
+            "SELECT last_block FROM checkpoints WHERE address = ? AND chain_id = ?",
+            (address.lower(), chain_id)
+        ).fetchone()
+        return row[0] if row else None
+
+    def add_transactions(self, address, chain_id, items, complete=True):
+        """
+        Upsert Covalent transaction items for a tracked address and move its
+        checkpoint to the newest block, in one SQLite transaction.
+
+        complete says whether the items cover every block since the
+        checkpoint. History is kept to a bounded horizon: when a fetch
+        stopped at its page limit, the checkpoint still moves to the newest
+        block, and the blocks between the oldest fetched item and the old
+        checkpoint are skipped (and logged) rather than fetched again on
+        every run.
+        """
+        address = address.lower()
+        tx_rows = []
+        transfer_rows = []
+        checkpoint = last_block = self.checkpoint(address, chain_id)
+        oldest_block = None
+
+        for item in items:
+            block = item.get("block_height") or 0
+            tx_hash = item.get("tx_hash")
+            tx_rows.append((
+                chain_id, tx_hash, address, block, item.get("block_signed_at"),
+                (item.get("from_address") or "").lower(), (item.get("to_address") or "").lower(),
+                str(item.get("value") or 0), item.get("value_quote"), item.get("gas_quote"),
+                1 if item.get("successful", True) else 0
+            ))
+            for transfer in decode_transfers(item):
+                transfer_rows.append((chain_id, tx_hash, transfer[0], address, block) + transfer[1:])
+            last_block = block if last_block is None else max(last_block, block)
+            oldest_block = block if oldest_block is None else min(oldest_block, block)
+
+        if not complete and items:
+            if checkpoint is None:
+                skipped = f"blocks before {oldest_block}"
+            else:
+                skipped = f"blocks {checkpoint + 1}-{oldest_block - 1}"
+            print(
+                f"Transaction history for {address} on chain {chain_id} was cut off at the page limit; "
+                f"skipping {skipped}"
+            )
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", tx_rows
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO transfers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", transfer_rows
+            )
+            if last_block is not None:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?)",
+                    (address, chain_id, last_block, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+                )
+
+        return len(tx_rows)
+
+    def _rows(self, query, params):
+        cursor = self.conn.execute(query, params)
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def transfers_by_token(self, token_address, address=None, limit=100):
+        """
+        Most recent transfers of a token, optionally for one tracked address
+        """
+        query = "SELECT * FROM transfers WHERE token_address = ?"
+        params = [token_address.lower()]
+        if address:
+            query += " AND address = ?"
+            params.append(address.lower())
+        query += " ORDER BY block_height DESC LIMIT ?"
+        params.append(limit)
+        return self._rows(query, params)
+
+    def transfers_with(self, address, counterparty, limit=100):
+        """
+        Most recent transfers between a tracked address and a counterparty
+        """
+        address = address.lower()
+        counterparty = counterparty.lower()
+        return self._rows(
+            """
+            SELECT * FROM transfers
+            WHERE address = ? AND ((from_address = ? AND to_address = ?) OR (from_address = ? AND to_address = ?))
+            ORDER BY block_height DESC LIMIT ?
+            """,
+            (address, address, counterparty, counterparty, address, limit)
+        )
+
+    def counterparties(self, address, limit=10):
+        """
+        Counterparties of a tracked address by number of transactions, with
+        native value sent and received in USD
+        """
+        address = address.lower()
+        return self._rows(
+            """
+            SELECT CASE WHEN from_address = ? THEN to_address ELSE from_address END AS counterparty,
+                   COUNT(*) AS transactions,
+                   SUM(CASE WHEN to_address = ? THEN COALESCE(value_quote, 0) ELSE 0 END) AS received_usd,
+                   SUM(CASE WHEN from_address = ? THEN COALESCE(value_quote, 0) ELSE 0 END) AS sent_usd
+            FROM transactions
+            WHERE address = ?
+            GROUP BY counterparty
+            ORDER BY transactions DESC
+            LIMIT ?
+            """,
+            (address, address, address, address, limit)
+        )
+
+    def token_flows(self, address, limit=10):
+        """
+        Token amounts received and sent by a tracked address, per token
+        """
+        address = address.lower()
+        return self._rows(
+            """
+            SELECT token_symbol, token_address, chain_id,
+                   SUM(CASE WHEN to_address = ? THEN COALESCE(amount, 0) ELSE 0 END) AS amount_in,
+                   SUM(CASE WHEN from_address = ? THEN COALESCE(amount, 0) ELSE 0 END) AS amount_out,
+                   COUNT(*) AS transfers
+            FROM transfers
+            WHERE address = ?
+            GROUP BY chain_id, token_address
+            ORDER BY transfers DESC
+            LIMIT ?
+            """,
+            (address, address, address, limit)
+        )
@@ -1,65 +1,227 @@
-import requests
-import pandas as pd
 import json
 import time
 from datetime import datetime, timedelta
 import os
+import shutil
 import matplotlib.pyplot as plt
 import seaborn as sns
 from bs4 import BeautifulSoup
 import re
+import heapq
+import math
+import contextvars
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 
-def fetch_dappradar_rankings():
+# Streaming parse of the large DefiLlama response is optional
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+import http_client
+from instrumentation import span
+from profiling import launch
+from rank_index import RankIndex, summarize_movers
+from ranking_store import RankingStore, default_store_path, item_key
+from report_writer import write_json, write_page
+from source_cache import SourceCache, source_cache_path, stale_while_revalidate
+
+DAPPRADAR_URL = "https://dappradar.com/api/dapps"
+DAPPRADAR_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+def fetch_dappradar_page(page, per_page=50):
     """
-    Fetch DApp rankings from DappRadar
-    Note: In a real implementation, you would need to handle pagination and authentication
+    Fetch one page of DappRadar rankings, sorted by users
     """
-    try:
-        url = "https://dappradar.com/api/dapps"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        
-        params = {
-            "page": 1,
-            "resultsPerPage": 50,
-            "sort": "users",
-            "order": "desc"
-        }
-        
-        response = requests.get(url, headers=headers, params=params)
-        
-        if response.status_code == 200:
-            data = response.json()
-            return data.get("dapps", [])
-        else:
-            print(f"Failed to fetch DappRadar rankings: {response.status_code}")
-            # Return sample data for demonstration
-            return get_sample_dapp_data()
-    except Exception as e:
-        print(f"Error fetching DappRadar rankings: {e}")
+    params = {
+        "page": page,
+        "resultsPerPage": per_page,
+        "sort": "users",
+        "order": "desc"
+    }
+
+    response = http_client.get(DAPPRADAR_URL, headers=DAPPRADAR_HEADERS, params=params)
+    if response.status_code != 200:
+        raise RuntimeError(f"HTTP {response.status_code} for page {page}")
+
+    return response.json().get("dapps", [])
+
+def fetch_dappradar_rankings(limit=500, per_page=50, workers=8, metric="users_24h", min_value=None, fallback=True):
+    """
+    Fetch the top DApps from DappRadar, several pages at a time
+
+    Pages are requested in waves of `workers` through the shared connection
+    pool. Fetching stops after the wave that reaches `limit` items, runs out
+    of results, or (with min_value) drops below min_value on `metric`; the
+    API sorts by users, so later pages can only be lower. The merged pages are
+    de-duplicated and re-sorted by `metric`. If nothing could be fetched,
+    sample data is returned. With fallback=False an error is raised instead,
+    and also when any page failed, so a truncated ranking is never cached as
+    good data.
+    """
+    total_pages = math.ceil(limit / per_page)
+    dapps = []
+    failed_pages = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for first_page in range(1, total_pages + 1, workers):
+            pages = list(range(first_page, min(first_page + workers, total_pages + 1)))
+            # Each page runs in the caller's context so http_client.fresh_only() carries over
+            futures = {
+                page: executor.submit(contextvars.copy_context().run, fetch_dappradar_page, page, per_page)
+                for page in pages
+            }
+
+            exhausted = False
+            for page in pages:
+                try:
+                    results = futures[page].result()
+                except Exception as e:
+                    print(f"Error fetching DappRadar rankings page {page}: {e}")
+                    failed_pages += 1
+                    continue
+
+                dapps.extend(results)
+                if len(results) < per_page:
+                    exhausted = True
+                elif min_value is not None and results[-1].get(metric, 0) < min_value:
+                    exhausted = True
+
+            if exhausted:
+                break
+
+    if failed_pages and not fallback:
+        raise RuntimeError(f"{failed_pages} DappRadar rankings page(s) could not be fetched")
+
+    if not dapps:
+        if failed_pages:
+            print("Failed to fetch DappRadar rankings")
+        if not fallback:
+            raise RuntimeError("No DappRadar rankings could be fetched")
         # Return sample data for demonstration
         return get_sample_dapp_data()
 
-def fetch_defi_llama_rankings():
+    # Pages can overlap if rankings shift between requests; keep the first copy
+    merged = {}
+    for dapp in dapps:
+        merged.setdefault((dapp.get("name"), dapp.get("chain")), dapp)
+
+    ranked = sorted(merged.values(), key=lambda x: x.get(metric, 0), reverse=True)
+    if min_value is not None:
+        ranked = [dapp for dapp in ranked if dapp.get(metric, 0) >= min_value]
+
+    return ranked[:limit]
+
+DEFI_LLAMA_URL = "https://api.llama.fi/protocols"
+
+# Protocols kept in full (with chains) for the rankings table and time series
+DEFI_TOP_K = 50
+
+# Columns of the compact all-protocols snapshot
+DEFI_SNAPSHOT_FIELDS = ["name", "category", "chain", "tvl", "change_1d", "change_7d"]
+
+def project_protocol(protocol):
+    """
+    Keep only the fields the rankings use. DefiLlama reports changes in
+    percent; they are stored as fractions like the rest of the rankings data.
+    """
+    def fraction(value):
+        return float(value) / 100 if value is not None else 0.0
+
+    return {
+        "name": protocol.get("name", "Unknown"),
+        "category": protocol.get("category") or "Unknown",
+        "chain": protocol.get("chain") or "Unknown",
+        "chains": protocol.get("chains") or [],
+        "tvl": round(float(protocol.get("tvl") or 0)),
+        "change_1d": fraction(protocol.get("change_1d")),
+        "change_7d": fraction(protocol.get("change_7d"))
+    }
+
+def iter_defi_llama_protocols(response):
+    """
+    Yield protocols from a streamed /protocols response, one at a time if
+    ijson is installed so the full document is never held in memory
+    """
+    if IJSON_AVAILABLE:
+        response.raw.decode_content = True
+        yield from ijson.items(response.raw, "item", use_float=True)
+    else:
+        yield from response.json()
+
+def load_defi_snapshot(snapshot_path, top_k=DEFI_TOP_K):
+    """
+    Top protocols from the last compact snapshot, or None if there is none.
+    The snapshot has no per-protocol chain list, so chains holds the main chain.
+    """
+    if not snapshot_path or not os.path.exists(snapshot_path):
+        return None
+    try:
+        with open(snapshot_path, "r") as f:
+            snapshot = json.load(f)
+        rows = [dict(zip(snapshot["fields"], values)) for values in snapshot["protocols"]]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Could not read DefiLlama snapshot {snapshot_path}: {e}")
+        return None
+
+    print(f"Using the last DefiLlama snapshot from {snapshot.get('updated_at', 'an earlier run')}")
+    for row in rows:
+        row["chains"] = [row["chain"]]
+    return heapq.nlargest(top_k, rows, key=lambda row: row["tvl"]) or None
+
+def fetch_defi_llama_rankings(top_k=DEFI_TOP_K, snapshot_path=None, fallback=True):
     """
     Fetch DeFi protocol rankings from DefiLlama
+
+    Returns the top_k protocols by TVL. If snapshot_path is given, a compact
+    snapshot of every protocol (DEFI_SNAPSHOT_FIELDS only) is written there,
+    and it is what the rankings fall back to when DefiLlama is unavailable
+    (before sample data). With fallback=False failures raise instead. The
+    response is streamed, so the HTTP last-good cache does not keep it.
     """
     try:
-        url = "https://api.llama.fi/protocols"
-        response = requests.get(url)
-        
-        if response.status_code == 200:
-            data = response.json()
-            return data
-        else:
-            print(f"Failed to fetch DefiLlama rankings: {response.status_code}")
-            # Return sample data for demonstration
-            return get_sample_defi_data()
+        with http_client.get(DEFI_LLAMA_URL, stream=True, timeout=(http_client.CONNECT_TIMEOUT, 60)) as response:
+            if response.status_code != 200:
+                if not fallback:
+                    raise RuntimeError(f"DefiLlama returned HTTP {response.status_code}")
+                print(f"Failed to fetch DefiLlama rankings: {response.status_code}")
+                # Fall back to the last snapshot, or sample data for demonstration
+                return load_defi_snapshot(snapshot_path, top_k) or get_sample_defi_data()
+
+            # Min-heap of (tvl, seq, protocol); seq breaks ties without comparing dicts
+            top = []
+            snapshot = []
+            for seq, protocol in enumerate(iter_defi_llama_protocols(response)):
+                row = project_protocol(protocol)
+                snapshot.append([
+                    row["name"], row["category"], row["chain"], row["tvl"],
+                    round(row["change_1d"], 6), round(row["change_7d"], 6)
+                ])
+
+                entry = (row["tvl"], seq, row)
+                if len(top) < top_k:
+                    heapq.heappush(top, entry)
+                elif entry > top[0]:
+                    heapq.heapreplace(top, entry)
+
+        if snapshot_path:
+            write_json(snapshot_path, {
+                "fields": DEFI_SNAPSHOT_FIELDS,
+                "protocols": snapshot,
+                "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }, indent=None)
+
+        return [row for _, _, row in sorted(top, key=lambda x: (-x[0], x[1]))]
     except Exception as e:
+        if not fallback:
+            raise
         print(f"Error fetching DefiLlama rankings: {e}")
-        # Return sample data for demonstration
-        return get_sample_defi_data()
+        # Fall back to the last snapshot, or sample data for demonstration
+        return load_defi_snapshot(snapshot_path, top_k) or get_sample_defi_data()
 
 def fetch_nft_marketplace_rankings():
     """
@@ -74,7 +236,7 @@ def fetch_nft_marketplace_rankings():
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
         
-        response = requests.get(url, headers=headers)
+        response = http_client.get(url, headers=headers)
         
         if response.status_code == 200:
             # Parse HTML response
@@ -233,90 +395,27 @@ def load_historical_data(file_path):
             return json.load(f)
     return {"dapps": [], "defi": [], "nft_marketplaces": []}
 
-def save_historical_data(data, file_path):
-    """
-    Save historical ranking data to JSON file
-    """
-    with open(file_path, 'w') as f:
-        json.dump(data, f, indent=2)
-
-def update_historical_data(historical_data, current_data, category):
-    """
-    Update historical data with current data
-    """
-    today = datetime.now().strftime("%Y-%m-%d")
-    
-    # Add today's data
-    historical_data[category].append({
-        "date": today,
-        "data": current_data
-    })
-    
-    # Keep only the last 30 days of data
-    if len(historical_data[category]) > 30:
-        historical_data[category] = historical_data[category][-30:]
-    
-    return historical_data
-
-def generate_trend_chart(historical_data, category, metric, top_n=5, output_dir="static/img/rankings"):
+def generate_trend_chart(store, category, metric, top_n=5, output_dir="static/img/rankings", days=30):
     """
-    Generate trend chart for top N items in a category
+    Generate trend chart for top N items in a category over the last N days
     """
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
     
-    # Extract data for the chart
-    dates = []
-    items_data = {}
-    
-    for entry in historical_data[category]:
-        date = entry["date"]
-        dates.append(date)
-        
-        # Sort data by the metric and get top N
-        sorted_data = sorted(entry["data"], key=lambda x: x.get(metric, 0), reverse=True)[:top_n]
-        
-        for item in sorted_data:
-            name = item["name"]
-            if name not in items_data:
-                items_data[name] = []
-            
-            # Find the position of this item in the sorted list
-            position = next((i+1 for i, x in enumerate(sorted_data) if x["name"] == name), None)
-            
-            # Add data point
-            items_data[name].append({
-                "date": date,
-                "value": item.get(metric, 0),
-                "rank": position
-            })
-    
-    # Create DataFrame for plotting
-    df_list = []
-    for name, data_points in items_data.items():
-        for point in data_points:
-            df_list.append({
-                "date": point["date"],
-                "name": name,
-                "value": point["value"],
-                "rank": point["rank"]
-            })
-    
-    df = pd.DataFrame(df_list)
+    # One row per bucket, one column per item
+    df = store.query(category, metric, start=datetime.now() - timedelta(days=days))
     
-    # Convert date to datetime
-    df["date"] = pd.to_datetime(df["date"])
-    
-    # Sort by date
-    df = df.sort_values("date")
+    # Keep each point only while the item was in the top N for that bucket
+    ranks = df.rank(axis=1, ascending=False, method="first")
+    df = df.where(ranks <= top_n).dropna(axis=1, how="all")
     
     # Create the chart
     plt.figure(figsize=(12, 6))
     
     # Plot lines for each item
-    for name in items_data.keys():
-        item_df = df[df["name"] == name]
-        plt.plot(item_df["date"], item_df["value"], marker='o', linewidth=2, label=name)
+    for name in df.columns:
+        item_values = df[name].dropna()
+        plt.plot(item_values.index, item_values.values, marker='o', linewidth=2, label=name)
     
     # Set chart properties
     metric_name = metric.replace("_", " ").title()
@@ -339,90 +438,80 @@ def generate_trend_chart(historical_data, category, metric, top_n=5, output_dir=
     
     return chart_path
 
-def generate_ranking_table(data, category, metrics):
+# Sections of the rankings page: category, title, description and the table metrics
+RANKING_SECTIONS = [
+    ("dapps", "DApp Rankings", "The following table shows the top DApps by user activity:",
+     ["users_24h", "transactions_24h", "volume_24h_usd"]),
+    ("defi", "DeFi Protocol Rankings", "The following table shows the top DeFi protocols by Total Value Locked (TVL):",
+     ["tvl", "change_1d", "change_7d"]),
+    ("nft_marketplaces", "NFT Marketplace Rankings", "The following table shows the top NFT marketplaces by trading volume:",
+     ["volume_24h_usd", "users_24h", "transactions_24h"])
+]
+
+def metric_format(metric):
     """
-    Generate markdown table for rankings
+    How the templates format a metric: usd (in millions), percent or count
+    """
+    if "usd" in metric.lower():
+        return "usd"
+    if "change" in metric.lower():
+        return "percent"
+    return "count"
+
+def build_ranking_table(data, metrics, rank_changes=None, top_n=20):
+    """
+    Top rows of a ranking sorted by the first metric, as plain values for
+    the rankings shortcode. With rank_changes (item key, see
+    ranking_store.item_key, to rank change since the previous day, None for
+    new entries) each row gets a rank_change.
     """
-    # Create table header
-    header = "| Rank | Name | " + " | ".join([m.replace("_", " ").title() for m in metrics]) + " |\n"
-    separator = "|------|------|" + "|".join(["---" for _ in metrics]) + "|\n"
-    
-    rows = []
-    
-    # Sort data by the first metric
     sorted_data = sorted(data, key=lambda x: x.get(metrics[0], 0), reverse=True)
     
-    # Create table rows
-    for i, item in enumerate(sorted_data[:20]):  # Show top 20
-        row = f"| {i+1} | {item['name']} | "
-        
+    rows = []
+    for i, item in enumerate(sorted_data[:top_n]):
+        row = {"rank": i + 1, "name": item["name"], "chain": item.get("chain")}
+        if rank_changes is not None:
+            row["rank_change"] = rank_changes.get(item_key(item))
         for metric in metrics:
-            value = item.get(metric, 0)
-            
-            # Format value based on metric
-            if "usd" in metric.lower():
-                formatted_value = f"${value/1e6:.1f}M"
-            elif "change" in metric.lower():
-                formatted_value = f"{value*100:.1f}%"
-            else:
-                formatted_value = f"{value:,}"
-            
-            row += formatted_value + " | "
-        
+            row[metric] = item.get(metric, 0)
         rows.append(row)
     
-    # Combine header and rows
-    table = header + separator + "\n".join(rows)
-    
-    return table
+    return {
+        "metrics": [
+            {"key": m, "label": m.replace("_", " ").title(), "format": metric_format(m)} for m in metrics
+        ],
+        "compared": rank_changes is not None,
+        "rows": rows
+    }
 
-def generate_markdown_report(dapps, defi, nft_marketplaces, chart_paths):
+def build_rankings_page(dapps, defi, nft_marketplaces, chart_paths, rank_changes=None, data_ages=None):
     """
-    Generate markdown report with rankings and charts
+    Everything the rankings page shows, for data/rankings/tables.json.
+    rank_changes maps each category to the rank changes of its items, if a
+    previous day is known. data_ages maps source names to the time their
+    data was fetched (None for sample data).
     """
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    markdown = f"""# Web3 Tool Rankings
-
-*Generated on: {now}*
-
-This page tracks the performance of popular Web3 tools and platforms across different categories.
-
-## DApp Rankings
-
-The following table shows the top DApps by user activity:
-
-{generate_ranking_table(dapps, "dapps", ["users_24h", "transactions_24h", "volume_24h_usd"])}
-
-![DApp User Trends](img/rankings/{os.path.basename(chart_paths["dapps_users_24h_trend.png"])})
-
-## DeFi Protocol Rankings
-
-The following table shows the top DeFi protocols by Total Value Locked (TVL):
-
-{generate_ranking_table(defi, "defi", ["tvl", "change_1d", "change_7d"])}
-
-![DeFi TVL Trends](img/rankings/{os.path.basename(chart_paths["defi_tvl_trend.png"])})
-
-## NFT Marketplace Rankings
-
-The following table shows the top NFT marketplaces by trading volume:
-
-{generate_ranking_table(nft_marketplaces, "nft_marketplaces", ["volume_24h_usd", "users_24h", "transactions_24h"])}
-
-![NFT Volume Trends](img/rankings/{os.path.basename(chart_paths["nft_marketplaces_volume_24h_usd_trend.png"])})
-
-## Methodology
-
-Rankings are updated daily and based on the following data sources:
-- DApp data: DappRadar API
-- DeFi protocol data: DefiLlama API
-- NFT marketplace data: Various sources including DappRadar
-
-For each category, we track metrics such as user activity, transaction volume, and total value locked.
-"""
-    
-    return markdown
+    rank_changes = rank_changes or {}
+    items = {"dapps": dapps, "defi": defi, "nft_marketplaces": nft_marketplaces}
+    
+    sections = []
+    for category, title, description, metrics in RANKING_SECTIONS:
+        sections.append({
+            "category": category,
+            "title": title,
+            "description": description,
+            "chart": f"img/rankings/{os.path.basename(chart_paths[category])}" if chart_paths.get(category) else None,
+            **build_ranking_table(items[category], metrics, rank_changes.get(category))
+        })
+    
+    return {
+        "sources": [
+            {"name": source, "fetched_at": fetched_at.strftime("%Y-%m-%d %H:%M") if fetched_at else None}
+            for source, fetched_at in (data_ages or {}).items()
+        ],
+        "sections": sections,
+        "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
 
 def main():
     # Configuration
@@ -435,54 +524,134 @@ def main():
     os.makedirs(output_dir, exist_ok=True)
     os.makedirs(img_dir, exist_ok=True)
     
-    # Load historical data
-    historical_data_path = os.path.join(data_dir, "historical_rankings.json")
-    historical_data = load_historical_data(historical_data_path)
-    
-    # Fetch current data
-    print("Fetching DApp rankings...")
-    dapps = fetch_dappradar_rankings()
-    
-    print("Fetching DeFi protocol rankings...")
-    defi = fetch_defi_llama_rankings()
-    
+    # Load the ranking time series, seeding it from the old daily snapshots on first run.
+    # A series left in data/ by earlier versions is moved out of Hugo's data directory
+    store_path = default_store_path()
+    old_store_path = os.path.join(data_dir, "ranking_series.json")
+    legacy_path = os.path.join(data_dir, "historical_rankings.json")
+    if not os.path.exists(store_path) and os.path.exists(old_store_path):
+        os.makedirs(os.path.dirname(store_path), exist_ok=True)
+        shutil.move(old_store_path, store_path)
+    store_exists = os.path.exists(store_path)
+    with span("load_series", stage="parse"):
+        store = RankingStore(store_path)
+        if not store_exists and os.path.exists(legacy_path):
+            store.import_legacy(load_historical_data(legacy_path))
+    
+    snapshot_path = os.path.join(data_dir, "defi_protocols_snapshot.json")
+    
+    # The NFT marketplace source only has sample data, so it is not cached
     print("Fetching NFT marketplace rankings...")
-    nft_marketplaces = fetch_nft_marketplace_rankings()
-    
-    # Update historical data
-    historical_data = update_historical_data(historical_data, dapps, "dapps")
-    historical_data = update_historical_data(historical_data, defi, "defi")
-    historical_data = update_historical_data(historical_data, nft_marketplaces, "nft_marketplaces")
+    with span("fetch", source="nft_marketplaces") as attrs:
+        nft_marketplaces = fetch_nft_marketplace_rankings()
+        attrs["items"] = len(nft_marketplaces)
+    
+    def fetch_source(source, fetch, **kwargs):
+        print(f"Fetching {source} rankings...")
+        with span("fetch", source=source) as attrs:
+            items = fetch(fallback=False, **kwargs)
+            attrs["items"] = len(items)
+        return items
+    
+    def record(payloads, fetched_at):
+        # Every run adds a point to the time series; reruns within the same hour replace it.
+        # Fallback sample data (no fetch time) stays out of the series
+        now = datetime.now()
+        with span("save_series", stage="write"):
+            for category in ("dapps", "defi"):
+                if fetched_at[category] is not None:
+                    store.upsert(category, payloads[category], fetched_at[category])
+            store.upsert("nft_marketplaces", nft_marketplaces, now)
+            store.save()
+    
+    def publish(payloads, fetched_at, fresh):
+        print("Publishing rankings from the " + ("refreshed data..." if fresh else "last good data..."))
+        publish_rankings(
+            payloads["dapps"], payloads["defi"], nft_marketplaces, store, data_dir, output_dir, img_dir,
+            {"DappRadar": fetched_at["dapps"], "DefiLlama": fetched_at["defi"]}
+        )
+    
+    # Publish the last good DappRadar and DefiLlama data at once while both are
+    # refreshed, then republish only if the refresh brought new data
+    stale_while_revalidate(
+        SourceCache(source_cache_path("rankings")),
+        fetchers={
+            "dapps": partial(fetch_source, "DappRadar", fetch_dappradar_rankings),
+            "defi": partial(fetch_source, "DefiLlama", fetch_defi_llama_rankings, snapshot_path=snapshot_path)
+        },
+        fallbacks={
+            "dapps": get_sample_dapp_data,
+            "defi": lambda: load_defi_snapshot(snapshot_path) or get_sample_defi_data()
+        },
+        publish=publish,
+        on_refresh=record
+    )
     
-    # Save updated historical data
-    save_historical_data(historical_data, historical_data_path)
+    print("Rankings update complete!")
+
+def publish_rankings(dapps, defi, nft_marketplaces, store, data_dir, output_dir, img_dir, data_ages=None):
+    """
+    Compute rank changes and render the charts, page data and JSON outputs
+    """
+    # Rank changes against the previous day; the movers summary is published as
+    # data/rankings/movers.json for the Hugo templates
+    print("Computing rank changes...")
+    with span("rank_changes", stage="compute"):
+        rank_index = RankIndex(os.path.join(data_dir, "rank_index.json"))
+        movers = {}
+        rank_changes = {}
+        data_ages = data_ages or {}
+        for category, metric, items, source in [
+            ("dapps", "users_24h", dapps, "DappRadar"),
+            ("defi", "tvl", defi, "DefiLlama"),
+            ("nft_marketplaces", "volume_24h_usd", nft_marketplaces, None)
+        ]:
+            # Fallback sample data (no fetch time) is ranked but not recorded
+            record = source is None or data_ages.get(source) is not None
+            rows, compared_to = rank_index.update(category, items, metric, record=record)
+            movers[category] = {"metric": metric, **summarize_movers(rows, compared_to, rank_index.dropped(category))}
+            if compared_to:
+                rank_changes[category] = {row["key"]: row["rank_change"] for row in rows}
+        rank_index.save()
+        
+        write_json(os.path.join(data_dir, "movers.json"), {
+            **movers,
+            "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        })
     
     # Generate trend charts
     print("Generating trend charts...")
-    chart_paths = {
-        "dapps_users_24h_trend.png": generate_trend_chart(historical_data, "dapps", "users_24h", 5, img_dir),
-        "defi_tvl_trend.png": generate_trend_chart(historical_data, "defi", "tvl", 5, img_dir),
-        "nft_marketplaces_volume_24h_usd_trend.png": generate_trend_chart(historical_data, "nft_marketplaces", "volume_24h_usd", 5, img_dir)
-    }
-    
-    # Generate markdown report
-    print("Generating markdown report...")
-    markdown = generate_markdown_report(dapps, defi, nft_marketplaces, chart_paths)
-    
-    # Save markdown report
-    with open(os.path.join(output_dir, "index.md"), "w") as f:
-        f.write(markdown)
+    with span("trend_charts", stage="render"):
+        chart_paths = {
+            "dapps": generate_trend_chart(store, "dapps", "users_24h", 5, img_dir),
+            "defi": generate_trend_chart(store, "defi", "tvl", 5, img_dir),
+            "nft_marketplaces": generate_trend_chart(store, "nft_marketplaces", "volume_24h_usd", 5, img_dir)
+        }
     
-    # Save current data as JSON
-    with open(os.path.join(data_dir, "current_rankings.json"), "w") as f:
-        json.dump({
+    # The page itself is a thin wrapper around the rankings shortcode, which
+    # renders the tables from data/rankings/tables.json
+    print("Saving rankings page data...")
+    with span("write"):
+        write_json(
+            os.path.join(data_dir, "tables.json"),
+            build_rankings_page(dapps, defi, nft_marketplaces, chart_paths, rank_changes, data_ages),
+            indent=None
+        )
+        write_page(
+            os.path.join(output_dir, "index.md"),
+            {"title": "Web3 Tool Rankings", "slug": "rankings"},
+            "This page tracks the performance of popular Web3 tools and platforms across different categories.\n\n"
+            "{{< rankings >}}\n",
+            overwrite=False
+        )
+        
+        # Save current data as JSON
+        write_json(os.path.join(data_dir, "current_rankings.json"), {
             "dapps": dapps,
             "defi": defi,
             "nft_marketplaces": nft_marketplaces,
             "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }, f, indent=2)
-    
-    print("Rankings update complete!")
+        })
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    launch("update_tool_rankings", main)
\ No newline at end of file
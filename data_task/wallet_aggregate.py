@@ -0,0 +1,189 @@
+import numpy as np
+
+class WalletAggregate:
+    """
+    In-memory view of the token holdings of every tracked wallet, for
+    cross-wallet queries.
+
+    Holdings are kept as three parallel arrays (wallet index, token index,
+    USD value) with one entry per positive holding, appended as wallets are
+    processed. Every query is a bincount, sort or mask over those arrays, so
+    it scales with the number of holdings rather than with the number of
+    wallet pairs.
+    """
+
+    def __init__(self):
+        self.addresses = []
+        self.wallet_index = {}
+        self.stats = []
+        self.token_index = {}
+        self.token_symbol = []
+        self.token_chain = []
+        self._chunks = []
+        self._arrays = None
+
+    def add_tables(self, addresses, tokens, stats):
+        """
+        Add wallets from a token table built by build_token_table (rows
+        grouped by wallet in the order of addresses) and their stats
+        """
+        base = len(self.addresses)
+        for address in addresses:
+            if address in self.wallet_index:
+                raise ValueError(f"Wallet {address} is already in the aggregate")
+            self.wallet_index[address] = len(self.addresses)
+            self.addresses.append(address)
+        self.stats.extend(stats)
+
+        held = tokens["value"] > 0
+        keys = tokens["chain"][held] + ":" + tokens["id"][held]
+        unique_keys, first, inverse = np.unique(keys.astype(str), return_index=True, return_inverse=True)
+
+        # Map this batch's tokens onto the aggregate's token ids
+        symbols = tokens["symbol"][held]
+        chains = tokens["chain"][held]
+        ids = np.empty(len(unique_keys), dtype=np.int64)
+        for i, key in enumerate(unique_keys):
+            token_id = self.token_index.get(key)
+            if token_id is None:
+                token_id = len(self.token_symbol)
+                self.token_index[key] = token_id
+                self.token_symbol.append(symbols[first[i]])
+                self.token_chain.append(chains[first[i]])
+            ids[i] = token_id
+
+        # One entry per (wallet, token): merge duplicate rows of the same token
+        wallet = tokens["wallet"][held] + base
+        token = ids[inverse]
+        stride = len(self.token_symbol)
+        pairs, pair_inverse = np.unique(wallet * stride + token, return_inverse=True)
+        value = np.bincount(pair_inverse, weights=tokens["value"][held], minlength=len(pairs))
+
+        self._chunks.append((pairs // stride, pairs % stride, value))
+        self._arrays = None
+
+    def _holdings(self):
+        """
+        Concatenated (wallet, token, value) arrays, cached until the next add
+        """
+        if self._arrays is None:
+            if self._chunks:
+                wallet, token, value = (np.concatenate(parts) for parts in zip(*self._chunks))
+                self._chunks = [(wallet, token, value)]
+            else:
+                wallet = token = np.zeros(0, dtype=np.int64)
+                value = np.zeros(0, dtype=np.float64)
+            self._arrays = (wallet, token, value)
+        return self._arrays
+
+    def wallet_totals(self):
+        """
+        Total, token and DeFi value per wallet as arrays
+        """
+        total = np.array([s["total_value_usd"] for s in self.stats], dtype=np.float64)
+        token = np.array([s["token_value_usd"] for s in self.stats], dtype=np.float64)
+        defi = np.array([s["defi_value_usd"] for s in self.stats], dtype=np.float64)
+        return total, token, defi
+
+    def token_exposure(self, top_n=20):
+        """
+        Tokens with the largest combined value across all wallets, with
+        holder count, share of all tracked token value, largest holder and
+        the Herfindahl index of holder shares (1.0 = a single holder)
+        """
+        wallet, token, value = self._holdings()
+        n_tokens = len(self.token_symbol)
+        exposure = np.bincount(token, weights=value, minlength=n_tokens)
+        holders = np.bincount(token, minlength=n_tokens)
+        shares = value / exposure[token] if len(value) else value
+        hhi = np.bincount(token, weights=shares ** 2, minlength=n_tokens)
+
+        # Largest holder per token: last row of each token after sorting by (token, value)
+        order = np.lexsort((value, token))
+        last = order[np.r_[token[order][1:] != token[order][:-1], True]] if len(order) else order
+        top_holder = np.full(n_tokens, -1, dtype=np.int64)
+        top_holder[token[last]] = wallet[last]
+        top_value = np.zeros(n_tokens)
+        top_value[token[last]] = value[last]
+
+        top = np.argsort(-exposure, kind="stable")[:top_n]
+        grand_total = exposure.sum()
+        rows = []
+        for t in top:
+            if exposure[t] <= 0:
+                break
+            holder = top_holder[t]
+            rows.append({
+                "symbol": self.token_symbol[t],
+                "chain": self.token_chain[t],
+                "value_usd": float(exposure[t]),
+                "holders": int(holders[t]),
+                "share_of_tracked": float(exposure[t] / grand_total) if grand_total else 0.0,
+                "top_holder": self.addresses[holder],
+                "top_holder_share": float(top_value[t] / exposure[t]),
+                "hhi": float(hhi[t])
+            })
+        return rows
+
+    def wallet_concentration(self):
+        """
+        Per wallet: Herfindahl index of its token holdings and the share of
+        its largest token
+        """
+        wallet, token, value = self._holdings()
+        n_wallets = len(self.addresses)
+        token_value = np.bincount(wallet, weights=value, minlength=n_wallets)
+        shares = value / token_value[wallet] if len(value) else value
+        hhi = np.bincount(wallet, weights=shares ** 2, minlength=n_wallets)
+        largest = np.zeros(n_wallets)
+        np.maximum.at(largest, wallet, shares)
+        return hhi, largest
+
+    def _token_sets(self, indices):
+        """
+        Boolean wallet x token matrix for a few wallets
+        """
+        wallet, token, _ = self._holdings()
+        matrix = np.zeros((len(indices), len(self.token_symbol)), dtype=bool)
+        for row, index in enumerate(indices):
+            matrix[row, token[wallet == index]] = True
+        return matrix
+
+    def overlap(self, address_a, address_b):
+        """
+        Jaccard similarity of the token sets of two wallets
+        """
+        matrix = self._token_sets([self.wallet_index[address_a], self.wallet_index[address_b]])
+        union = np.logical_or(matrix[0], matrix[1]).sum()
+        return float(np.logical_and(matrix[0], matrix[1]).sum() / union) if union else 0.0
+
+    def most_similar(self, address, top_n=5):
+        """
+        Wallets whose token sets overlap most with a wallet's, by Jaccard
+        similarity, in one pass over all holdings
+        """
+        wallet, token, _ = self._holdings()
+        index = self.wallet_index[address]
+        own = np.unique(token[wallet == index])
+
+        sizes = np.bincount(wallet, minlength=len(self.addresses))
+        shared = np.bincount(wallet[np.isin(token, own)], minlength=len(self.addresses))
+        union = sizes + len(own) - shared
+        similarity = np.divide(shared, union, out=np.zeros(len(union)), where=union > 0)
+        similarity[index] = -1
+
+        order = np.argsort(-similarity, kind="stable")[:top_n]
+        return [
+            {"address": self.addresses[i], "jaccard": float(similarity[i]), "shared_tokens": int(shared[i])}
+            for i in order if similarity[i] > 0
+        ]
+
+    def overlap_matrix(self, addresses):
+        """
+        Pairwise Jaccard similarity for a small set of wallets
+        """
+        matrix = self._token_sets([self.wallet_index[a] for a in addresses]).astype(np.int64)
+        shared = matrix @ matrix.T
+        sizes = np.diag(shared)
+        union = sizes[:, None] + sizes[None, :] - shared
+        return np.divide(shared, union, out=np.zeros(shared.shape), where=union > 0)